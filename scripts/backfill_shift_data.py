@@ -11,7 +11,12 @@ SRC_DIR = PROJECT_ROOT / "src"
 if str(SRC_DIR) not in sys.path:
     sys.path.insert(0, str(SRC_DIR))
 
-from database import DATABASE_PATH
+from database import (
+    DATABASE_PATH,
+    create_connection,
+    ensure_player_database_schema,
+    ensure_xg_schema,
+)
 from shift_population import backfill_shift_data, format_shift_population_summary
 
 
@@ -30,12 +35,43 @@ def build_parser() -> argparse.ArgumentParser:
         type=int,
         help="Backfill one specific NHL game id.",
     )
+    selection.add_argument(
+        "--rebuild-on-ice-season",
+        help=(
+            "Rebuild on-ice intervals and shot on-ice slots for one season "
+            "(e.g. 20232024) from stored shifts, after an on-ice schema bump."
+        ),
+    )
+    selection.add_argument(
+        "--shift-quality-season",
+        help=(
+            "Compute QoT/QoC shift features for one season's games whose "
+            "on-ice data changed since the last run."
+        ),
+    )
     parser.add_argument(
         "--limit",
         type=int,
         default=None,
         help="Maximum number of missing games to process with --all.",
     )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=None,
+        help="Shift charts to prefetch concurrently. Defaults to 4; 1 fetches sequentially.",
+    )
+    parser.add_argument(
+        "--rating-source",
+        choices=("rapm", "toi"),
+        default="rapm",
+        help="Player ratings behind --shift-quality-season. Defaults to stored RAPM.",
+    )
+    parser.add_argument(
+        "--full-refresh",
+        action="store_true",
+        help="With --shift-quality-season, recompute every game (e.g. after a RAPM refit).",
+    )
     parser.add_argument(
         "--database-path",
         default=DATABASE_PATH,
@@ -44,17 +80,72 @@ def build_parser() -> argparse.ArgumentParser:
     return parser
 
 
+def _rebuild_on_ice_season(database_path, season) -> int:
+    # Imported lazily: the columnar engine needs numpy, the shift backfill does not.
+    from on_ice_batch import rebuild_season_on_ice_intervals
+
+    conn = create_connection(database_path)
+    ensure_player_database_schema(conn)
+    ensure_xg_schema(conn)
+    try:
+        summary = rebuild_season_on_ice_intervals(conn, season)
+    finally:
+        conn.close()
+    print(
+        f"On-ice rebuild {season}: "
+        + " ".join(f"{key}={value}" for key, value in summary.items())
+    )
+    return 0
+
+
+def _populate_shift_quality(database_path, season, rating_source, full_refresh) -> int:
+    # Imported lazily: the QoT/QoC engine needs numpy, the shift backfill does not.
+    from lineup_features import populate_shift_quality_features
+
+    conn = create_connection(database_path)
+    ensure_player_database_schema(conn)
+    ensure_xg_schema(conn)
+    try:
+        summary = populate_shift_quality_features(
+            conn, season, rating_source=rating_source, full_refresh=full_refresh
+        )
+    finally:
+        conn.close()
+    print(
+        f"Shift quality {season} ({rating_source}): "
+        + " ".join(f"{key}={value}" for key, value in summary.items())
+    )
+    return 0
+
+
 def main(argv: list[str] | None = None) -> int:
     parser = build_parser()
     args = parser.parse_args(argv)
-    if args.limit is not None and args.game_id is not None:
+    if args.limit is not None and not args.all:
         parser.error("--limit can only be used with --all.")
 
+    if args.rebuild_on_ice_season is not None:
+        return _rebuild_on_ice_season(args.database_path, args.rebuild_on_ice_season)
+    if args.shift_quality_season is not None:
+        return _populate_shift_quality(
+            args.database_path, args.shift_quality_season,
+            args.rating_source, args.full_refresh,
+        )
+    if args.full_refresh:
+        parser.error("--full-refresh can only be used with --shift-quality-season.")
+
+    if args.max_in_flight is not None and args.max_in_flight < 1:
+        parser.error("--max-in-flight must be at least 1.")
+
+    kwargs = {}
+    if args.max_in_flight is not None:
+        kwargs["max_in_flight"] = args.max_in_flight
     result = backfill_shift_data(
         database_path=args.database_path,
         all_games=args.all,
         limit=args.limit,
         game_id=args.game_id,
+        **kwargs,
     )
     print(format_shift_population_summary(result))
     return 0
@@ -0,0 +1,172 @@
+"""Benchmark the sweep-line on-ice builder against the original boundary scan.
+
+Loads every game's shift rows for one season from the database, rebuilds the
+on-ice intervals with the original scan, the per-game sweep, and the
+columnar season batch, checks that the `OnIceInterval` output is identical,
+and prints the timings.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from database import DATABASE_PATH, SEASON_SHIFT_COLUMNS, load_season_shift_rows
+from on_ice_batch import build_on_ice_intervals_batch, shift_arrays_from_rows
+from on_ice_builder import (
+    OnIceInterval,
+    _derive_strength_state,
+    _extract_sideshift_value,
+    build_on_ice_intervals,
+)
+
+
+def reference_build_on_ice_intervals(game_id, shift_rows):
+    """The original O(boundaries x shifts) implementation, kept as the oracle."""
+    rows = [row for row in shift_rows if int(row.get("end_seconds", 0)) > int(row.get("start_seconds", 0))]
+    periods = sorted({int(row["period"]) for row in rows if "period" in row})
+    intervals = []
+
+    def side_of(row):
+        return _extract_sideshift_value(row, "team_side", "side")
+
+    def is_goalie(row):
+        position = _extract_sideshift_value(row, "position", "position_code", "positionCode")
+        return str(position or "").upper() == "G"
+
+    for period in periods:
+        period_rows = [row for row in rows if int(row["period"]) == period]
+        boundaries = sorted({int(row["start_seconds"]) for row in period_rows} | {int(row["end_seconds"]) for row in period_rows})
+        for start_s, end_s in zip(boundaries, boundaries[1:]):
+            active_rows = [
+                row for row in period_rows
+                if int(row["start_seconds"]) < end_s and int(row["end_seconds"]) > start_s
+            ]
+            home_skaters = sorted({int(row["player_id"]) for row in active_rows
+                                   if side_of(row) == "home" and not is_goalie(row)})
+            away_skaters = sorted({int(row["player_id"]) for row in active_rows
+                                   if side_of(row) == "away" and not is_goalie(row)})
+            home_goalie_ids = sorted({int(row["player_id"]) for row in active_rows
+                                      if side_of(row) == "home" and is_goalie(row)})
+            away_goalie_ids = sorted({int(row["player_id"]) for row in active_rows
+                                      if side_of(row) == "away" and is_goalie(row)})
+            if not home_skaters and not away_skaters:
+                continue
+            intervals.append(
+                OnIceInterval(
+                    game_id=game_id,
+                    period=period,
+                    start_s=start_s,
+                    end_s=end_s,
+                    home_skaters_json=json.dumps(home_skaters),
+                    away_skaters_json=json.dumps(away_skaters),
+                    home_goalie_player_id=home_goalie_ids[0] if home_goalie_ids else None,
+                    away_goalie_player_id=away_goalie_ids[0] if away_goalie_ids else None,
+                    strength_state=_derive_strength_state(home_skaters, away_skaters),
+                )
+            )
+    return intervals
+
+
+def group_shift_rows_by_game(rows):
+    """Turn `load_season_shift_rows` tuples into ``{game_id: [row dict, ...]}``."""
+    rows_by_game = {}
+    for row in rows:
+        rows_by_game.setdefault(row[0], []).append(dict(zip(SEASON_SHIFT_COLUMNS, row)))
+    return rows_by_game
+
+
+def time_batch_build(rows):
+    """Return ``(seconds, {game_id: intervals})`` for the columnar season batch."""
+    started = time.perf_counter()
+    intervals = build_on_ice_intervals_batch(shift_arrays_from_rows(rows))
+    seconds = time.perf_counter() - started
+    by_game = {}
+    for interval in intervals:
+        by_game.setdefault(interval.game_id, []).append(interval)
+    return seconds, by_game
+
+
+def run_benchmark(rows_by_game, build_fns):
+    """Time each ``name -> build_fn`` over every game.
+
+    Returns ``(timings, mismatched_game_ids)``; a game mismatches when any
+    implementation's output differs from the first one's.
+    """
+    timings = {}
+    outputs = {}
+    for name, build_fn in build_fns.items():
+        started = time.perf_counter()
+        outputs[name] = {
+            game_id: build_fn(game_id, rows) for game_id, rows in rows_by_game.items()
+        }
+        timings[name] = time.perf_counter() - started
+
+    baseline_name, *other_names = build_fns
+    mismatched = sorted(
+        game_id for game_id in rows_by_game
+        if any(outputs[name][game_id] != outputs[baseline_name][game_id]
+               for name in other_names)
+    )
+    return timings, mismatched
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--season", required=True, help="Season id, e.g. 20232024.")
+    parser.add_argument(
+        "--database-path",
+        default=DATABASE_PATH,
+        help="SQLite database path. Defaults to data/nhl_data.db.",
+    )
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    conn = sqlite3.connect(args.database_path)
+    try:
+        rows = load_season_shift_rows(conn, args.season)
+    finally:
+        conn.close()
+    rows_by_game = group_shift_rows_by_game(rows)
+    if not rows_by_game:
+        print(f"No shift rows found for season {args.season}.")
+        return 1
+
+    timings, mismatched = run_benchmark(
+        rows_by_game,
+        {"reference": reference_build_on_ice_intervals, "sweep": build_on_ice_intervals},
+    )
+    timings["batch"], batch_by_game = time_batch_build(rows)
+    sweep_by_game = {
+        game_id: build_on_ice_intervals(game_id, game_rows)
+        for game_id, game_rows in rows_by_game.items()
+    }
+    mismatched = sorted(set(mismatched) | {
+        game_id for game_id in rows_by_game
+        if batch_by_game.get(game_id, []) != sweep_by_game[game_id]
+    })
+
+    print(f"Season {args.season}: {len(rows_by_game)} games, {len(rows)} shift rows")
+    for name, seconds in timings.items():
+        speedup = timings["reference"] / max(seconds, 1e-9)
+        print(f"  {name}: {seconds:.2f}s ({speedup:.1f}x)")
+    if mismatched:
+        print(f"  MISMATCH in {len(mismatched)} game(s), e.g. {mismatched[:5]}")
+        return 1
+    print("  outputs identical")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
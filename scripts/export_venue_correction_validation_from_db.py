@@ -41,6 +41,7 @@ from database import (  # noqa: E402
     _MIN_TRAINING_SEASON,
     _VENUE_CORRECTION_METHOD,
     _XG_EVENT_SCHEMA_VERSION,
+    create_connection,
 )
 from export_venue_correction_validation import (  # noqa: E402
     DEFAULT_OUTPUT_PATH,
@@ -95,8 +96,9 @@ def _progress(message: str, run_started_at: float | None = None) -> None:
 
 
 def _connect_readonly(database_path: Path) -> sqlite3.Connection:
-    uri = database_path.resolve().as_uri() + "?mode=ro"
-    conn = sqlite3.connect(uri, uri=True)
+    conn = create_connection(str(database_path), read_only=True)
+    if conn is None:
+        raise FileNotFoundError(f"Could not open database read-only: {database_path}")
     conn.row_factory = sqlite3.Row
     return conn
 
@@ -0,0 +1,147 @@
+"""Fit one season's skater RAPM from on-ice intervals and store the ratings."""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from database import (
+    DATABASE_PATH,
+    create_connection,
+    ensure_player_database_schema,
+    ensure_xg_schema,
+    load_rapm_player_ratings,
+    replace_rapm_player_ratings,
+)
+from rapm import (
+    DEFAULT_RAPM_CV_FOLDS,
+    DEFAULT_RAPM_LAMBDAS,
+    DEFAULT_RAPM_STRENGTH_STATES,
+    RAPM_MODEL_VERSION,
+    RapmRating,
+    bootstrap_rapm_standard_errors,
+    fit_rapm,
+    load_rapm_design,
+)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--season", required=True, help="Season id, e.g. 20232024.")
+    parser.add_argument(
+        "--target",
+        choices=("shots", "goals"),
+        default="shots",
+        help="Event counted per stint. Defaults to shots (all attempts).",
+    )
+    parser.add_argument(
+        "--strength-state",
+        action="append",
+        dest="strength_states",
+        help="Interval strength state to include; repeatable. Defaults to 5v5.",
+    )
+    parser.add_argument(
+        "--lambda",
+        type=float,
+        action="append",
+        dest="lambdas",
+        help="Ridge penalty candidate; repeatable. Defaults to a cross-validated grid.",
+    )
+    parser.add_argument(
+        "--cv-folds",
+        type=int,
+        default=DEFAULT_RAPM_CV_FOLDS,
+        help="Game-blocked cross-validation folds.",
+    )
+    parser.add_argument(
+        "--warm-start-season",
+        help="Start the solver from this season's stored ratings.",
+    )
+    parser.add_argument(
+        "--bootstrap-replicates",
+        type=int,
+        default=0,
+        help="Game-block bootstrap replicates for standard errors. Defaults to 0 (none).",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Bootstrap seed; results do not depend on --workers.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Bootstrap worker processes. Defaults to CPU count; 1 runs inline.",
+    )
+    parser.add_argument(
+        "--database-path",
+        default=DATABASE_PATH,
+        help="SQLite database path. Defaults to data/nhl_data.db.",
+    )
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    conn = create_connection(args.database_path)
+    ensure_player_database_schema(conn)
+    ensure_xg_schema(conn)
+    try:
+        started = time.perf_counter()
+        design = load_rapm_design(
+            conn,
+            args.season,
+            target=args.target,
+            strength_states=args.strength_states or DEFAULT_RAPM_STRENGTH_STATES,
+        )
+        if design.player_count == 0:
+            print(f"No on-ice intervals found for season {args.season}.")
+            return 1
+        loaded = time.perf_counter()
+
+        warm_start = []
+        if args.warm_start_season:
+            warm_start = [
+                RapmRating(*row[:6], model_version=row[6])
+                for row in load_rapm_player_ratings(conn, args.warm_start_season, RAPM_MODEL_VERSION)
+            ]
+        fit = fit_rapm(
+            design,
+            lambdas=args.lambdas or DEFAULT_RAPM_LAMBDAS,
+            cv_folds=args.cv_folds,
+            warm_start=warm_start,
+        )
+        fitted = time.perf_counter()
+        if args.bootstrap_replicates >= 2:
+            fit = bootstrap_rapm_standard_errors(
+                design, fit, replicates=args.bootstrap_replicates,
+                seed=args.seed, workers=args.workers,
+            )
+        bootstrapped = time.perf_counter()
+        stored = replace_rapm_player_ratings(
+            conn, args.season, RAPM_MODEL_VERSION, fit.ratings(args.season)
+        )
+    finally:
+        conn.close()
+
+    print(
+        f"RAPM {args.season}: players={stored} stints={design.matrix.shape[0] // 2} "
+        f"lambda={fit.lam:g} load={loaded - started:.1f}s fit={fitted - loaded:.1f}s "
+        f"bootstrap={bootstrapped - fitted:.1f}s"
+    )
+    for lam, error in sorted(fit.cv_errors.items()):
+        print(f"  lambda={lam:g} cv_mse={error:.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,66 @@
+"""Rebuild shot events and game metadata from stored raw play-by-play payloads."""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from main import reextract_game_data
+from raw_payload_store import RAW_PAYLOAD_DIR
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Re-extract raw events, game metadata, and shot events from the "
+            "raw payload store without calling the NHL API."
+        )
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Parser processes to run. Defaults to the CPU count; 1 runs inline.",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=None,
+        help="Maximum number of stored games to re-extract.",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-extract every stored game, not just incomplete or stale ones.",
+    )
+    parser.add_argument(
+        "--raw-payload-dir",
+        default=RAW_PAYLOAD_DIR,
+        help="Raw payload store directory. Defaults to data/raw_payloads.",
+    )
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1.")
+
+    reextract_game_data(
+        workers=args.workers,
+        limit=args.limit,
+        force=args.force,
+        raw_payload_dir=args.raw_payload_dir,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
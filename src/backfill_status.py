@@ -2,7 +2,17 @@ import argparse
 import os
 import sqlite3
 
-from database import DATABASE_PATH, get_collected_game_ids, get_last_collected_date
+from database import (
+    DATABASE_PATH,
+    GAME_STAGE_CONTEXT,
+    GAME_STAGE_METADATA,
+    GAME_STAGE_ON_ICE_SLOTS,
+    GAME_STAGE_SHIFTS,
+    GAME_STAGE_SHOT_EVENTS,
+    get_collected_game_ids,
+    get_incomplete_game_stages,
+    get_last_collected_date,
+)
 
 _PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 _DEFAULT_LOG_FILENAME = "backfill_full.log"
@@ -13,6 +23,7 @@ _TABLE_GAMES = "games"
 _TABLE_SHOT_EVENTS = "shot_events"
 _TABLE_GAME_CONTEXT = "game_context"
 _TABLE_COLLECTION_LOG = "collection_log"
+_TABLE_GAME_PIPELINE_STATE = "game_pipeline_state"
 
 
 def _table_exists(conn, table_name):
@@ -46,6 +57,48 @@ def _distinct_game_ids(conn, table_name):
     return {row[0] for row in cursor.fetchall() if row[0] is not None}
 
 
+def _pipeline_stage_counts(conn, raw_game_ids):
+    """Derive the missing-stage counts from game_pipeline_state."""
+    stale = get_incomplete_game_stages(
+        conn, stages=(GAME_STAGE_METADATA, GAME_STAGE_SHOT_EVENTS)
+    )
+    stale_context = get_incomplete_game_stages(
+        conn, stages=(GAME_STAGE_CONTEXT,), base_stage=GAME_STAGE_METADATA
+    )
+    stale_shifts = get_incomplete_game_stages(
+        conn,
+        stages=(GAME_STAGE_SHIFTS, GAME_STAGE_ON_ICE_SLOTS),
+        base_stage=GAME_STAGE_SHOT_EVENTS,
+    )
+    return {
+        "missing_metadata_games": sum(
+            GAME_STAGE_METADATA in stages for stages in stale.values()
+        ),
+        "missing_shot_event_games": sum(
+            GAME_STAGE_SHOT_EVENTS in stages for stages in stale.values()
+        ),
+        "missing_game_context_games": len(stale_context),
+        "missing_shift_games": len(stale_shifts),
+        "fully_processed_games": len(raw_game_ids) - len(stale),
+    }
+
+
+def _fact_table_stage_counts(conn, raw_game_ids):
+    """Fallback for databases created before game_pipeline_state existed."""
+    metadata_game_ids = _distinct_game_ids(conn, _TABLE_GAMES)
+    shot_event_game_ids = _distinct_game_ids(conn, _TABLE_SHOT_EVENTS)
+    game_context_ids = _distinct_game_ids(conn, _TABLE_GAME_CONTEXT)
+    return {
+        "missing_metadata_games": len(raw_game_ids - metadata_game_ids),
+        "missing_shot_event_games": len(raw_game_ids - shot_event_game_ids),
+        "missing_game_context_games": len(metadata_game_ids - game_context_ids),
+        "missing_shift_games": None,
+        "fully_processed_games": len(
+            raw_game_ids & metadata_game_ids & shot_event_game_ids
+        ),
+    }
+
+
 def _get_incomplete_collection_dates(conn):
     if not _table_exists(conn, _TABLE_COLLECTION_LOG):
         return 0
@@ -78,9 +131,10 @@ def build_status_report(log_path, tail_lines):
     conn = sqlite3.connect(DATABASE_PATH)
 
     raw_game_ids = set(get_collected_game_ids(conn))
-    metadata_game_ids = _distinct_game_ids(conn, _TABLE_GAMES)
-    shot_event_game_ids = _distinct_game_ids(conn, _TABLE_SHOT_EVENTS)
-    game_context_ids = _distinct_game_ids(conn, _TABLE_GAME_CONTEXT)
+    if _table_exists(conn, _TABLE_GAME_PIPELINE_STATE):
+        stage_counts = _pipeline_stage_counts(conn, raw_game_ids)
+    else:
+        stage_counts = _fact_table_stage_counts(conn, raw_game_ids)
 
     report = {
         "database_path": DATABASE_PATH,
@@ -98,12 +152,7 @@ def build_status_report(log_path, tail_lines):
             conn, _TABLE_SHOT_EVENTS, "faceoff_zone_code IS NOT NULL"
         ),
         "game_context_rows": _count_rows(conn, _TABLE_GAME_CONTEXT),
-        "missing_metadata_games": len(raw_game_ids - metadata_game_ids),
-        "missing_shot_event_games": len(raw_game_ids - shot_event_game_ids),
-        "missing_game_context_games": len(metadata_game_ids - game_context_ids),
-        "fully_processed_games": len(
-            raw_game_ids & metadata_game_ids & shot_event_game_ids
-        ),
+        **stage_counts,
         "last_completed_date": get_last_collected_date(conn),
         "incomplete_collection_dates": _get_incomplete_collection_dates(conn),
         "log_path": log_path,
@@ -150,6 +199,8 @@ def main():
     print(f"Missing metadata games: {report['missing_metadata_games']:,}")
     print(f"Missing shot-event games: {report['missing_shot_event_games']:,}")
     print(f"Missing game-context rows: {report['missing_game_context_games']:,}")
+    if report["missing_shift_games"] is not None:
+        print(f"Missing shift-data games: {report['missing_shift_games']:,}")
     print(f"Last completed collection date: {report['last_completed_date']}")
     print(f"Incomplete collection dates: {report['incomplete_collection_dates']:,}")
     print(f"Log file: {report['log_path']}")
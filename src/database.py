@@ -1,27 +1,38 @@
 # database.py
 
+import json
+import math
 import os
 import random
 import re
 import sqlite3
+from contextlib import contextmanager
 from datetime import date, datetime, timedelta
 from sqlite3 import Error
+from urllib.parse import quote
 
 DATABASE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
 DATABASE_FILENAME = "nhl_data.db"
 DATABASE_PATH = os.path.join(DATABASE_DIR, DATABASE_FILENAME)
+SQLITE_CACHE_SIZE_KIB = 64 * 1024
+SQLITE_MMAP_SIZE_BYTES = 256 * 1024 * 1024
+
+_SQLITE_BUSY_TIMEOUT_SECONDS = 30
+_SQLITE_JOURNAL_MODE = "WAL"
+_SQLITE_SYNCHRONOUS = "NORMAL"
+_SQLITE_TEMP_STORE = "MEMORY"
 
 _GAME_TABLE_PREFIX = "game_"
 _GAME_ID_SUFFIX_START = len(_GAME_TABLE_PREFIX)
 _SQLITE_TABLE_TYPE = "table"
 _VALID_POSITION_GROUPS = ("F", "D", "G")
-_FEATURE_SET_VERSION = "v1"
+# v3 drops the goal-only points_rolling_10g values v2 wrote.
+_FEATURE_SET_VERSION = "v3"
 _PLAYER_METADATA_COVERAGE_MIN_CAREER_SHOTS = 50
 _PLAYER_METADATA_HANDEDNESS_COVERAGE_TARGET = 0.99
+# No ingestion path writes player_game_stats.assists yet, so points features
+# stay NULL rather than publishing goal-only sums as points.
 _PLAYER_GAME_FEATURES_UNSUPPORTED_COLUMNS = (
-    "toi_rank_pos_5g",
-    "toi_rank_pos_10g",
-    "toi_rolling_mean_5g",
     "points_rolling_10g",
 )
 _PLAYER_IDS_FROM_SHOT_EVENTS_CTE = """
@@ -49,6 +60,12 @@ _XG_EVENT_SCHEMA_VERSION = "v5"
 _XG_FEATURE_SCHEMA_VERSION = "v1"
 _SHIFT_SCHEMA_VERSION = "v2"
 _ON_ICE_SCHEMA_VERSION = "v1"
+_RAW_EVENTS_SCHEMA_VERSION = "v1"
+_GAME_METADATA_SCHEMA_VERSION = "v1"
+_PLAYER_ON_ICE_SCHEMA_VERSION = "v1"
+_SHIFT_QUALITY_SCHEMA_VERSION = "v1"
+_PLAYER_STATS_SCHEMA_VERSION = "v1"
+_VENUE_SHOT_SUMS_SCHEMA_VERSION = "v1"
 _SHIFT_SIDE_HOME = "home"
 _SHIFT_SIDE_AWAY = "away"
 _VALID_SHIFT_TEAM_SIDES = (_SHIFT_SIDE_HOME, _SHIFT_SIDE_AWAY)
@@ -126,16 +143,13 @@ NORMALIZED_X_COORD_MAX = 100.0
 NORMALIZED_Y_COORD_MIN = -42.5
 NORMALIZED_Y_COORD_MAX = 42.5
 
-_RAW_GAME_TABLE_COLUMNS = """\
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    period INTEGER,
-    time TEXT,
-    event TEXT,
-    description TEXT,
-    UNIQUE(period, time, event, description)"""
+_RAW_EVENTS_TABLE = "raw_events"
+_RAW_EVENT_COLUMNS = ("period", "time", "event", "description")
+_RAW_EVENTS_MIGRATION_COMMIT_EVERY = 500
 
 
 _IDENTIFIER_RE = re.compile(r'^\w+$')
+_open_units_of_work = {}  # id(conn) -> nesting depth of open unit_of_work blocks
 
 
 def _quote_identifier(name):
@@ -149,8 +163,49 @@ def _quote_identifier(name):
     return f'"{name}"'
 
 
-def _game_table_name(game_id):
-    return f"{_GAME_TABLE_PREFIX}{game_id}"
+@contextmanager
+def unit_of_work(conn):
+    """Run a block of database writes as one transaction.
+
+    Helpers in this module commit through `_commit`, which is a no-op while a
+    unit of work is open on the connection, so the whole block commits once
+    on success and rolls back on any exception. Nested units become
+    SAVEPOINTs: a failing inner unit undoes only its own writes before the
+    exception propagates.
+    """
+    key = id(conn)
+    depth = _open_units_of_work.get(key, 0)
+    savepoint = _quote_identifier(f"unit_of_work_{depth}")
+    if depth:
+        conn.execute(f"SAVEPOINT {savepoint}")
+    elif not conn.in_transaction:
+        conn.execute("BEGIN")
+    _open_units_of_work[key] = depth + 1
+    try:
+        yield conn
+    except BaseException:
+        if depth:
+            conn.execute(f"ROLLBACK TO {savepoint}")
+            conn.execute(f"RELEASE {savepoint}")
+        else:
+            conn.rollback()
+        raise
+    else:
+        if depth:
+            conn.execute(f"RELEASE {savepoint}")
+        else:
+            conn.commit()
+    finally:
+        if depth:
+            _open_units_of_work[key] = depth
+        else:
+            del _open_units_of_work[key]
+
+
+def _commit(conn):
+    """Commit now unless an enclosing `unit_of_work` will commit instead."""
+    if id(conn) not in _open_units_of_work:
+        conn.commit()
 
 
 def _is_raw_game_table_name(table_name):
@@ -160,18 +215,13 @@ def _is_raw_game_table_name(table_name):
 
 
 def get_collected_game_ids(conn):
-    """Return sorted game IDs for collected raw game tables."""
+    """Return sorted game IDs that have rows in raw_events."""
     cursor = conn.cursor()
-    cursor.execute(
-        "SELECT name FROM sqlite_master WHERE type = ? AND name LIKE ? ORDER BY name",
-        (_SQLITE_TABLE_TYPE, f"{_GAME_TABLE_PREFIX}%"),
-    )
-
-    game_ids = []
-    for (table_name,) in cursor.fetchall():
-        if _is_raw_game_table_name(table_name):
-            game_ids.append(int(table_name[_GAME_ID_SUFFIX_START:]))
-    return game_ids
+    try:
+        cursor.execute("SELECT DISTINCT game_id FROM raw_events ORDER BY game_id")
+    except sqlite3.OperationalError:
+        return []
+    return [row[0] for row in cursor.fetchall()]
 
 
 def load_game_shots(conn, game_id):
@@ -180,16 +230,27 @@ def load_game_shots(conn, game_id):
     Each dict contains every shot_events column plus game_date, season,
     home_team_id, away_team_id, and venue_name from the games dimension.
     """
+    return load_shots_for_games(conn, [game_id])
+
+
+def load_shots_for_games(conn, game_ids):
+    """Return the shots of several games in one query, as `load_game_shots` dicts.
+
+    Rows are ordered by game_id, then event_idx.
+    """
+    ids = sorted(set(game_ids))
+    if not ids:
+        return []
     cursor = conn.cursor()
     cursor.execute(
-        """SELECT se.*,
+        f"""SELECT se.*,
                   g.game_date, g.season,
                   g.home_team_id, g.away_team_id, g.venue_name
            FROM shot_events se
            JOIN games g ON se.game_id = g.game_id
-           WHERE se.game_id = ?
-           ORDER BY se.event_idx""",
-        (game_id,),
+           WHERE se.game_id IN ({', '.join(['?'] * len(ids))})
+           ORDER BY se.game_id, se.event_idx""",
+        ids,
     )
     columns = [desc[0] for desc in cursor.description]
     return [dict(zip(columns, row)) for row in cursor.fetchall()]
@@ -298,23 +359,72 @@ def get_random_game_id(conn, season=None, min_shots=1, seed=None):
     return row[0] if row else None
 
 
-def create_table(conn, game_id):
+def create_raw_events_table(conn):
+    """Create the raw_events table holding every game's simplified plays.
+
+    Rows are clustered by ``(game_id, event_idx)``; ``event_idx`` preserves
+    insertion (play) order within a game. The unique index keeps the legacy
+    per-game ``UNIQUE(period, time, event, description)`` dedup semantics,
+    and the ``(game_id, event, event_idx)`` index covers event-type lookups.
+    """
     cursor = conn.cursor()
-    quoted = _quote_identifier(_game_table_name(game_id))
-    cursor.execute(f"CREATE TABLE IF NOT EXISTS {quoted} ({_RAW_GAME_TABLE_COLUMNS});")
-    conn.commit()
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS raw_events (
+            game_id INTEGER NOT NULL,
+            event_idx INTEGER NOT NULL,
+            period INTEGER,
+            time TEXT,
+            event TEXT,
+            description TEXT,
+            PRIMARY KEY (game_id, event_idx)
+        ) WITHOUT ROWID
+        """
+    )
+    cursor.execute(
+        """CREATE UNIQUE INDEX IF NOT EXISTS idx_raw_events_dedup
+           ON raw_events(game_id, period, time, event, description)"""
+    )
+    cursor.execute(
+        """CREATE INDEX IF NOT EXISTS idx_raw_events_game_event
+           ON raw_events(game_id, event, event_idx)"""
+    )
+    _commit(conn)
 
 
 def insert_data(conn, game_id, data_list):
+    """Append simplified play dicts for one game to raw_events.
+
+    New rows are numbered after the game's current last ``event_idx`` and
+    rows identical to an existing play are ignored, so re-inserting a game
+    is a no-op.
+    """
     if not data_list:
         return
+    for d in data_list:
+        bad_keys = set(d.keys()) - set(_RAW_EVENT_COLUMNS)
+        if bad_keys:
+            raise ValueError(f"Invalid raw event keys: {bad_keys}")
+
+    game_id = int(game_id)
     cursor = conn.cursor()
-    quoted = _quote_identifier(_game_table_name(game_id))
-    columns = ', '.join(_quote_identifier(k) for k in data_list[0].keys())
-    placeholders = ', '.join(['?' for _ in data_list[0].keys()])
-    insert_query = f"INSERT OR IGNORE INTO {quoted} ({columns}) VALUES ({placeholders})"
-    cursor.executemany(insert_query, [tuple(d.values()) for d in data_list])
-    conn.commit()
+    cursor.execute(
+        "SELECT COALESCE(MAX(event_idx), -1) + 1 FROM raw_events WHERE game_id = ?",
+        (game_id,),
+    )
+    next_event_idx = cursor.fetchone()[0]
+    cursor.executemany(
+        """INSERT OR IGNORE INTO raw_events
+               (game_id, event_idx, period, time, event, description)
+           VALUES (?, ?, ?, ?, ?, ?)""",
+        [
+            (game_id, next_event_idx + offset,
+             *(d.get(column) for column in _RAW_EVENT_COLUMNS))
+            for offset, d in enumerate(data_list)
+        ],
+    )
+    _record_game_stages(cursor, game_id, (GAME_STAGE_RAW,))
+    _commit(conn)
 
 
 def create_collection_log_table(conn):
@@ -325,14 +435,15 @@ def create_collection_log_table(conn):
                         games_collected INTEGER NOT NULL,
                         completed_at TEXT
                       );""")
-    conn.commit()
+    _commit(conn)
 
 
 def is_game_collected(conn, game_id):
-    table_name = _game_table_name(game_id)
     try:
         cursor = conn.cursor()
-        cursor.execute(f"SELECT 1 FROM {_quote_identifier(table_name)} LIMIT 1")
+        cursor.execute(
+            "SELECT 1 FROM raw_events WHERE game_id = ? LIMIT 1", (int(game_id),)
+        )
         return cursor.fetchone() is not None
     except sqlite3.OperationalError:
         return False
@@ -346,7 +457,7 @@ def mark_date_collected(conn, date_str, games_found, games_collected):
         "VALUES (?, ?, ?, ?)",
         (date_str, games_found, games_collected, completed_at)
     )
-    conn.commit()
+    _commit(conn)
 
 
 def get_last_collected_date(conn):
@@ -382,35 +493,151 @@ def fix_incomplete_collection_log(conn):
     )
     if cursor.rowcount > 0:
         print(f"Fixed {cursor.rowcount} incomplete collection_log entries")
-    conn.commit()
+    _commit(conn)
+
+
+def create_schedule_tables(conn):
+    """Create the persisted league schedule.
+
+    ``schedule_days`` has one row per date returned in an API game week,
+    with that week's ``next_start_date`` so fetched coverage survives
+    off-season gaps; ``schedule_games`` maps each game to its date and last
+    seen game state.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        """CREATE TABLE IF NOT EXISTS schedule_days (
+               game_date TEXT PRIMARY KEY,
+               next_start_date TEXT,
+               fetched_at TEXT NOT NULL
+           )"""
+    )
+    cursor.execute(
+        """CREATE TABLE IF NOT EXISTS schedule_games (
+               game_id INTEGER PRIMARY KEY,
+               game_date TEXT NOT NULL,
+               game_state TEXT
+           )"""
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_schedule_games_game_date "
+        "ON schedule_games(game_date, game_id)"
+    )
+    _commit(conn)
+
+
+def replace_schedule_week(conn, schedule, next_start_date):
+    """Store one fetched schedule week, replacing what was known for its dates.
+
+    ``schedule`` maps "YYYY-MM-DD" to lists of ``(game_id, game_state)``.
+    """
+    fetched_at = datetime.now().isoformat()
+    cursor = conn.cursor()
+    for game_date, games in schedule.items():
+        cursor.execute(
+            "INSERT OR REPLACE INTO schedule_days (game_date, next_start_date, fetched_at) "
+            "VALUES (?, ?, ?)",
+            (game_date, next_start_date, fetched_at),
+        )
+        cursor.execute("DELETE FROM schedule_games WHERE game_date = ?", (game_date,))
+        cursor.executemany(
+            "INSERT OR REPLACE INTO schedule_games (game_id, game_date, game_state) "
+            "VALUES (?, ?, ?)",
+            [(game_id, game_date, game_state) for game_id, game_state in games],
+        )
+    _commit(conn)
+
+
+def get_schedule_refresh_start(conn, start_date, live_since):
+    """Return the first date from which the stored schedule must be re-fetched.
+
+    Dates before the stored coverage, dates past it, and the live window
+    starting at ``live_since`` are refreshed; everything else is read from
+    the table. The result is never earlier than ``start_date``.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        """SELECT MIN(game_date),
+                  MAX(COALESCE(DATE(next_start_date, '-1 day'), game_date))
+           FROM schedule_days"""
+    )
+    covered_from, covered_through = cursor.fetchone()
+    if covered_from is None or start_date < date.fromisoformat(covered_from):
+        return start_date
+    refresh_start = min(
+        date.fromisoformat(covered_through) + timedelta(days=1), live_since
+    )
+    return max(start_date, refresh_start)
+
+
+def get_schedule_days(conn, start_date, end_date):
+    """Return ``[(date_str, [game_id, ...]), ...]`` for stored dates in range, in order.
+
+    Dates the API listed without games are included with an empty list.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        """SELECT d.game_date, g.game_id
+           FROM schedule_days d
+           LEFT JOIN schedule_games g ON g.game_date = d.game_date
+           WHERE d.game_date >= ? AND d.game_date <= ?
+           ORDER BY d.game_date, g.game_id""",
+        (start_date.isoformat(), end_date.isoformat()),
+    )
+    days = {}
+    for game_date, game_id in cursor.fetchall():
+        game_ids = days.setdefault(game_date, [])
+        if game_id is not None:
+            game_ids.append(game_id)
+    return list(days.items())
 
 
 def deduplicate_existing_tables(conn):
+    """One-shot migration of legacy per-game ``game_<id>`` tables into raw_events.
+
+    Each legacy table is bulk-copied with a single INSERT ... SELECT (play
+    order kept via its ``id`` column, duplicate plays dropped by the
+    raw_events unique index) and dropped in the same transaction, so an
+    interrupted run simply resumes with the tables that are left. Copied
+    plays are numbered after any raw_events rows the game already has, as
+    in `insert_data`, so only true duplicate plays are skipped.
+    """
+    create_raw_events_table(conn)
     cursor = conn.cursor()
     cursor.execute(
-        "SELECT name, sql FROM sqlite_master WHERE type='table' AND name LIKE ?",
-        (f"{_GAME_TABLE_PREFIX}%",)
+        "SELECT name FROM sqlite_master WHERE type = ? AND name LIKE ? ORDER BY name",
+        (_SQLITE_TABLE_TYPE, f"{_GAME_TABLE_PREFIX}%"),
     )
+    table_names = [
+        row[0] for row in cursor.fetchall() if _is_raw_game_table_name(row[0])
+    ]
+    if not table_names:
+        return
 
-    for table_name, create_sql in cursor.fetchall():
-        if not _is_raw_game_table_name(table_name):
-            continue
-        if "UNIQUE(period, time, event, description)" in create_sql:
-            continue
-
-        print(f"Deduplicating and migrating {table_name}...")
-        temp_name = f"{table_name}_dedup_tmp"
+    print(f"Migrating {len(table_names)} per-game tables into raw_events...")
+    for migrated, table_name in enumerate(table_names, 1):
+        game_id = int(table_name[_GAME_ID_SUFFIX_START:])
         quoted = _quote_identifier(table_name)
-        quoted_temp = _quote_identifier(temp_name)
-        cursor.execute(f"CREATE TABLE {quoted_temp} ({_RAW_GAME_TABLE_COLUMNS})")
         cursor.execute(
-            f"INSERT OR IGNORE INTO {quoted_temp} (period, time, event, description) "
-            f"SELECT period, time, event, description FROM {quoted}"
+            "SELECT COALESCE(MAX(event_idx), -1) + 1 FROM raw_events WHERE game_id = ?",
+            (game_id,),
+        )
+        next_event_idx = cursor.fetchone()[0]
+        cursor.execute(
+            f"""INSERT OR IGNORE INTO raw_events
+                    (game_id, event_idx, period, time, event, description)
+                SELECT ?, ? + ROW_NUMBER() OVER (ORDER BY id) - 1,
+                       period, time, event, description
+                FROM {quoted}
+                ORDER BY id""",
+            (game_id, next_event_idx),
         )
         cursor.execute(f"DROP TABLE {quoted}")
-        cursor.execute(f"ALTER TABLE {quoted_temp} RENAME TO {quoted}")
+        if migrated % _RAW_EVENTS_MIGRATION_COMMIT_EVERY == 0:
+            _commit(conn)
+            print(f"  migrated {migrated}/{len(table_names)} tables")
 
-    conn.commit()
+    _commit(conn)
 
 
 class PlayerMetadataNotFound(LookupError):
@@ -424,6 +651,15 @@ class PlayerMetadataNotFound(LookupError):
     def __init__(self, player_id):
         super().__init__(f"No upstream metadata for player_id={player_id}")
         self.player_id = player_id
+
+
+_TEAM_GAMES_FROM_GAMES_SQL = """
+    SELECT game_id, 1, home_team_id, game_date
+    FROM games WHERE home_team_id IS NOT NULL {and_where}
+    UNION ALL
+    SELECT game_id, 0, away_team_id, game_date
+    FROM games WHERE away_team_id IS NOT NULL {and_where}
+"""
 
 
 def create_core_dimension_tables(conn):
@@ -454,6 +690,10 @@ def create_core_dimension_tables(conn):
         )
         """
     )
+    # Season-scoped scans (venue diagnostics, season game lists).
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_games_season_venue ON games(season, venue_name)"
+    )
     cursor.execute(
         """
         CREATE TABLE IF NOT EXISTS teams (
@@ -463,7 +703,44 @@ def create_core_dimension_tables(conn):
         )
         """
     )
-    conn.commit()
+    create_team_games_table(conn)
+    _commit(conn)
+
+
+def create_team_games_table(conn):
+    """Create team_games, seeding it from games on first creation.
+
+    One row per (game, side) projects games onto each team's schedule, and
+    the (team_id, game_date) index turns "a team's games before a date"
+    into an index range scan instead of a games scan with an OR predicate.
+    `upsert_game_metadata` keeps it in sync.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = ? AND name = ? LIMIT 1",
+        (_SQLITE_TABLE_TYPE, "team_games"),
+    )
+    if cursor.fetchone() is not None:
+        return
+    cursor.execute(
+        """
+        CREATE TABLE team_games (
+            game_id INTEGER NOT NULL,
+            is_home INTEGER NOT NULL,
+            team_id INTEGER NOT NULL,
+            game_date TEXT,
+            PRIMARY KEY (game_id, is_home)
+        ) WITHOUT ROWID
+        """
+    )
+    cursor.execute(
+        "CREATE INDEX idx_team_games_team_date ON team_games(team_id, game_date, game_id)"
+    )
+    cursor.execute(
+        "INSERT INTO team_games (game_id, is_home, team_id, game_date) "
+        + _TEAM_GAMES_FROM_GAMES_SQL.format(and_where="")
+    )
+    _commit(conn)
 
 
 def create_player_game_stats_table(conn):
@@ -497,7 +774,7 @@ def create_player_game_stats_table(conn):
     cursor.execute(
         "CREATE INDEX IF NOT EXISTS idx_player_game_stats_position_group_game_id ON player_game_stats(position_group, game_id)"
     )
-    conn.commit()
+    _commit(conn)
 
 
 def create_player_game_features_table(conn):
@@ -518,7 +795,11 @@ def create_player_game_features_table(conn):
         )
         """
     )
-    conn.commit()
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_player_game_features_game_id "
+        "ON player_game_features(game_id)"
+    )
+    _commit(conn)
 
 
 def _count_invalid_enum(cursor, table, column, valid_values, nullable=False):
@@ -591,6 +872,17 @@ def validate_player_game_stats_quality(conn, max_toi_seconds=3600):
     }
 
 
+def _count_invalid_player_game_feature_values(cursor):
+    cursor.execute(
+        """SELECT COUNT(*)
+           FROM player_game_features
+           WHERE toi_rank_pos_5g < 1
+              OR toi_rank_pos_10g < 1
+              OR toi_rolling_mean_5g < 0"""
+    )
+    return cursor.fetchone()[0]
+
+
 def _count_unsupported_player_game_feature_values(cursor):
     predicates = [
         f"{_quote_identifier(column)} IS NOT NULL"
@@ -648,6 +940,8 @@ def validate_player_game_features_quality(conn):
         "orphan_player_game_feature_rows": orphan_feature_rows,
         "stale_feature_set_version_rows": stale_feature_set_version_rows,
         "null_game_number_for_player_rows": null_game_number_for_player_rows,
+        "invalid_player_game_feature_value_rows":
+            _count_invalid_player_game_feature_values(cursor),
         "unsupported_player_game_feature_value_rows":
             _count_unsupported_player_game_feature_values(cursor),
     }
@@ -753,7 +1047,7 @@ def create_player_metadata_unavailable_table(conn):
         )
         """
     )
-    conn.commit()
+    _commit(conn)
 
 
 def mark_players_metadata_unavailable(conn, player_ids):
@@ -773,7 +1067,7 @@ def mark_players_metadata_unavailable(conn, player_ids):
            ON CONFLICT(player_id) DO UPDATE SET attempted_at = excluded.attempted_at""",
         rows,
     )
-    conn.commit()
+    _commit(conn)
 
 
 def ensure_player_database_schema(conn):
@@ -831,7 +1125,7 @@ def create_shot_events_table(conn):
         "CREATE INDEX IF NOT EXISTS idx_shot_events_game_id "
         "ON shot_events(game_id)"
     )
-    conn.commit()
+    _commit(conn)
 
 
 _VALID_IS_GOAL_VALUES = (0, 1)
@@ -876,7 +1170,7 @@ def _migrate_shot_events_v1_to_v2(conn):
         cursor.execute(
             "ALTER TABLE shot_events ADD COLUMN faceoff_zone_code TEXT"
         )
-    conn.commit()
+    _commit(conn)
 
 
 _SHOT_EVENTS_ON_ICE_COLUMNS = (
@@ -905,15 +1199,15 @@ def _migrate_shot_events_v3_to_v4(conn):
             cursor.execute(
                 f"ALTER TABLE shot_events ADD COLUMN {_quote_identifier(column_name)} INTEGER"
             )
-    conn.commit()
+    _commit(conn)
 
 
 def _migrate_shot_events_v4_to_v5(conn):
     """Add shot_event_type so blocked shots can be filtered directly.
 
     Existing v4 databases may already contain current shot geometry but lack
-    the explicit event type. Reconstruct that event type from the raw
-    per-game tables when the raw shot-event sequence matches the legacy
+    the explicit event type. Reconstruct that event type from raw_events
+    when the raw shot-event sequence matches the legacy
     shot_events sequence. Games that cannot be matched are left at v4 so the
     version-aware backfill can repair them from the API.
     """
@@ -931,12 +1225,10 @@ def _migrate_shot_events_v4_to_v5(conn):
         (_LEGACY_V4_EVENT_SCHEMA_VERSION,),
     )
     legacy_game_ids = [row[0] for row in cursor.fetchall()]
+    if legacy_game_ids and not _raw_events_table_exists(cursor):
+        legacy_game_ids = []
 
     for game_id in legacy_game_ids:
-        raw_table_name = _game_table_name(game_id)
-        if not _raw_game_table_exists(cursor, raw_table_name):
-            continue
-
         cursor.execute(
             """SELECT shot_event_id
                FROM shot_events
@@ -950,11 +1242,11 @@ def _migrate_shot_events_v4_to_v5(conn):
             continue
 
         raw_event_types = _load_raw_shot_event_types(
-            cursor, raw_table_name, _NON_BLOCKED_SHOT_EVENT_TYPES
+            cursor, game_id, _NON_BLOCKED_SHOT_EVENT_TYPES
         )
         if len(raw_event_types) != len(shot_event_ids):
             raw_event_types = _load_raw_shot_event_types(
-                cursor, raw_table_name, VALID_SHOT_EVENT_TYPES
+                cursor, game_id, VALID_SHOT_EVENT_TYPES
             )
         if len(raw_event_types) != len(shot_event_ids):
             continue
@@ -969,28 +1261,28 @@ def _migrate_shot_events_v4_to_v5(conn):
                 for event_type, shot_event_id in zip(raw_event_types, shot_event_ids)
             ],
         )
-    conn.commit()
+    _commit(conn)
 
 
-def _raw_game_table_exists(cursor, table_name):
-    """Return True when a raw game table is present."""
+def _raw_events_table_exists(cursor):
+    """Return True when the raw_events table is present."""
     cursor.execute(
         "SELECT 1 FROM sqlite_master WHERE type = ? AND name = ? LIMIT 1",
-        (_SQLITE_TABLE_TYPE, table_name),
+        (_SQLITE_TABLE_TYPE, _RAW_EVENTS_TABLE),
     )
     return cursor.fetchone() is not None
 
 
-def _load_raw_shot_event_types(cursor, raw_table_name, event_types):
-    """Return raw event names in stored play order for one game table."""
+def _load_raw_shot_event_types(cursor, game_id, event_types):
+    """Return one game's raw event names of the given types in play order."""
     placeholders = ", ".join(["?"] * len(event_types))
-    quoted_table = _quote_identifier(raw_table_name)
     cursor.execute(
         f"""SELECT event
-            FROM {quoted_table}
-            WHERE event IN ({placeholders})
-            ORDER BY id""",
-        tuple(event_types),
+            FROM raw_events
+            WHERE game_id = ?
+              AND event IN ({placeholders})
+            ORDER BY event_idx""",
+        (game_id, *event_types),
     )
     return [row[0] for row in cursor.fetchall()]
 
@@ -1043,7 +1335,13 @@ def insert_shot_events(conn, shot_event_dicts):
 
     cursor = conn.cursor()
     cursor.executemany(query, rows)
-    conn.commit()
+    current_game_ids = {
+        d["game_id"] for d in shot_event_dicts
+        if d.get("event_schema_version", _XG_EVENT_SCHEMA_VERSION) == _XG_EVENT_SCHEMA_VERSION
+    }
+    for game_id in sorted(current_game_ids):
+        _record_game_stages(cursor, game_id, (GAME_STAGE_SHOT_EVENTS,))
+    _commit(conn)
 
 
 def game_has_shot_events(conn, game_id):
@@ -1066,11 +1364,38 @@ def game_has_current_shot_events(conn, game_id):
     return cursor.fetchone() is not None
 
 
+def get_game_ids_with_current_shot_events(conn):
+    """Return the set of game ids with shot_events at the current schema version."""
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT DISTINCT game_id FROM shot_events WHERE event_schema_version = ?",
+        (_XG_EVENT_SCHEMA_VERSION,),
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def get_game_ids_with_metadata(conn):
+    """Return the set of game ids present in the games dimension table."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT game_id FROM games")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def get_season_game_ids(conn, season):
+    """Return the set of game ids of one season in the games dimension table."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT game_id FROM games WHERE season = ?", (str(season),))
+    return {row[0] for row in cursor.fetchall()}
+
+
 def delete_game_shot_events(conn, game_id):
     """Delete all shot_events rows for a game (used before re-ingesting stale data)."""
     cursor = conn.cursor()
     cursor.execute("DELETE FROM shot_events WHERE game_id = ?", (game_id,))
-    conn.commit()
+    _clear_game_stages(cursor, game_id, sorted(_game_stage_closure(
+        (GAME_STAGE_SHOT_EVENTS, GAME_STAGE_ON_ICE_SLOTS)
+    )))
+    _commit(conn)
 
 
 def game_has_metadata(conn, game_id):
@@ -1084,7 +1409,7 @@ def upsert_game_metadata(conn, game_id, game_date, season,
                          home_team_id, away_team_id,
                          venue_name=None, venue_city=None,
                          venue_utc_offset=None):
-    """Insert or update a row in the games dimension table."""
+    """Insert or update a row in the games dimension table and its team_games rows."""
     cursor = conn.cursor()
     cursor.execute(
         """INSERT INTO games (game_id, game_date, season,
@@ -1102,7 +1427,14 @@ def upsert_game_metadata(conn, game_id, game_date, season,
         (game_id, game_date, season, home_team_id, away_team_id,
          venue_name, venue_city, venue_utc_offset),
     )
-    conn.commit()
+    cursor.execute("DELETE FROM team_games WHERE game_id = ?", (game_id,))
+    cursor.execute(
+        "INSERT INTO team_games (game_id, is_home, team_id, game_date) "
+        + _TEAM_GAMES_FROM_GAMES_SQL.format(and_where="AND game_id = ?"),
+        (game_id, game_id),
+    )
+    _record_game_stages(cursor, game_id, (GAME_STAGE_METADATA,))
+    _commit(conn)
 
 
 def upsert_team(conn, team_id, abbrev, name):
@@ -1116,7 +1448,7 @@ def upsert_team(conn, team_id, abbrev, name):
                team_name = excluded.team_name""",
         (team_id, abbrev, name),
     )
-    conn.commit()
+    _commit(conn)
 
 
 _PLAYERS_INSERT_COLUMNS = (
@@ -1160,7 +1492,7 @@ def upsert_player(conn, player):
     """Insert or update a row in the players dimension table."""
     cursor = conn.cursor()
     cursor.execute(_PLAYERS_UPSERT_SQL, _player_row_tuple(player))
-    conn.commit()
+    _commit(conn)
 
 
 def upsert_players(conn, players):
@@ -1170,7 +1502,7 @@ def upsert_players(conn, players):
     rows = [_player_row_tuple(p) for p in players]
     cursor = conn.cursor()
     cursor.executemany(_PLAYERS_UPSERT_SQL, rows)
-    conn.commit()
+    _commit(conn)
 
 
 def get_missing_player_ids(conn):
@@ -1196,7 +1528,7 @@ def get_missing_player_ids(conn):
     return [row[0] for row in cursor.fetchall()]
 
 
-def backfill_player_metadata(conn, fetch_fn, batch_size=50):
+def backfill_player_metadata(conn, fetch_fn, batch_size=50, upserted_ids=None):
     """Fetch and upsert players missing from the players dimension table.
 
     fetch_fn(player_id) must return a dict with `_PLAYERS_INSERT_COLUMNS`
@@ -1206,7 +1538,8 @@ def backfill_player_metadata(conn, fetch_fn, batch_size=50):
     recorded in `player_metadata_unavailable` and skipped by future runs.
 
     Writes accumulate in batches of batch_size to amortize the commit cost.
-    Returns (attempted, upserted, unavailable) counts.
+    When ``upserted_ids`` is a list, the ids of upserted players are
+    appended to it. Returns (attempted, upserted, unavailable) counts.
     """
     missing_ids = get_missing_player_ids(conn)
     total_missing = len(missing_ids)
@@ -1232,6 +1565,8 @@ def backfill_player_metadata(conn, fetch_fn, batch_size=50):
             continue
         if row is None:
             continue
+        if upserted_ids is not None:
+            upserted_ids.append(player_id)
         row_buffer.append(row)
         if len(row_buffer) >= batch_size:
             upsert_players(conn, row_buffer)
@@ -1258,153 +1593,461 @@ def _position_group(position):
     return None
 
 
-def populate_player_game_stats(conn):
-    """Derive per-player counting stats from shot_events and upsert into
-    player_game_stats.
+def _player_game_on_ice_exists(cursor):
+    cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = ? AND name = ? LIMIT 1",
+        (_SQLITE_TABLE_TYPE, "player_game_on_ice"),
+    )
+    return cursor.fetchone() is not None
 
-    Shooters contribute shot and goal counts; goalies get a row for every
-    game they appear in (with team_id derived from the games table). TOI,
-    assists, and non-shot counters remain at their NOT NULL DEFAULT 0 values
-    until richer sources (shifts, boxscore) arrive in later phases.
 
-    Stale rows for any game present in shot_events are cleared before the
-    rebuild so that a reprocessed game whose shot_events no longer reference
-    a previously-seen shooter or goalie does not leave that player's stats
-    row behind.
+_PLAYER_STATS_BATCH_GAMES = 500
+_PLAYER_STATS_BATCH_PLAYERS = 500  # player ids per regroup IN (...) list
 
-    Returns the number of rows upserted.
+
+def _player_game_stats_rows(cursor, game_ids):
+    """Aggregate (player_id, game_id, team_id, group, shots, goals, toi) rows.
+
+    ``game_ids`` restricts every source query to those games; None reads
+    the whole history.
     """
-    cursor = conn.cursor()
-
-    cursor.execute(
-        """DELETE FROM player_game_stats
-           WHERE game_id IN (SELECT DISTINCT game_id FROM shot_events)"""
-    )
+    if game_ids is None:
+        shot_filter, on_ice_filter, params = "", "", ()
+    else:
+        placeholders = ", ".join("?" * len(game_ids))
+        shot_filter = f"AND se.game_id IN ({placeholders})"
+        on_ice_filter = f"WHERE o.game_id IN ({placeholders})"
+        params = tuple(game_ids)
 
     cursor.execute(
-        """SELECT se.shooter_id, se.game_id, se.shooting_team_id,
-                  p.position,
-                  COUNT(*) AS shots,
-                  SUM(CASE WHEN se.is_goal = 1 THEN 1 ELSE 0 END) AS goals
-           FROM shot_events AS se
-           LEFT JOIN players AS p ON p.player_id = se.shooter_id
-           WHERE se.shooter_id IS NOT NULL
-           GROUP BY se.shooter_id, se.game_id, se.shooting_team_id, p.position"""
+        f"""SELECT se.shooter_id, se.game_id, se.shooting_team_id,
+                   p.position,
+                   COUNT(*) AS shots,
+                   SUM(CASE WHEN se.is_goal = 1 THEN 1 ELSE 0 END) AS goals
+            FROM shot_events AS se
+            LEFT JOIN players AS p ON p.player_id = se.shooter_id
+            WHERE se.shooter_id IS NOT NULL {shot_filter}
+            GROUP BY se.shooter_id, se.game_id, se.shooting_team_id, p.position""",
+        params,
     )
     shooter_rows = cursor.fetchall()
 
     cursor.execute(
-        """SELECT se.goalie_id, se.game_id,
-                  CASE WHEN se.shooting_team_id = g.home_team_id
-                       THEN g.away_team_id ELSE g.home_team_id END AS goalie_team_id,
-                  p.position
-           FROM shot_events AS se
-           LEFT JOIN games AS g ON g.game_id = se.game_id
-           LEFT JOIN players AS p ON p.player_id = se.goalie_id
-           WHERE se.goalie_id IS NOT NULL
-           GROUP BY se.goalie_id, se.game_id, goalie_team_id, p.position"""
+        f"""SELECT se.goalie_id, se.game_id,
+                   CASE WHEN se.shooting_team_id = g.home_team_id
+                        THEN g.away_team_id ELSE g.home_team_id END AS goalie_team_id,
+                   p.position
+            FROM shot_events AS se
+            LEFT JOIN games AS g ON g.game_id = se.game_id
+            LEFT JOIN players AS p ON p.player_id = se.goalie_id
+            WHERE se.goalie_id IS NOT NULL {shot_filter}
+            GROUP BY se.goalie_id, se.game_id, goalie_team_id, p.position""",
+        params,
     )
     goalie_rows = cursor.fetchall()
+
+    on_ice_rows = []
+    if _player_game_on_ice_exists(cursor):
+        cursor.execute(
+            f"""SELECT o.player_id, o.game_id,
+                       CASE WHEN MAX(o.team_side) = '{_SHIFT_SIDE_HOME}'
+                            THEN g.home_team_id ELSE g.away_team_id END AS team_id,
+                       p.position, MAX(o.is_goalie), SUM(o.toi_seconds)
+                FROM player_game_on_ice AS o
+                LEFT JOIN games AS g ON g.game_id = o.game_id
+                LEFT JOIN players AS p ON p.player_id = o.player_id
+                {on_ice_filter}
+                GROUP BY o.player_id, o.game_id""",
+            params,
+        )
+        on_ice_rows = cursor.fetchall()
 
     merged = {}
     for shooter_id, game_id, team_id, position, shots, goals in shooter_rows:
         group = _position_group(position) or "F"
-        merged[(shooter_id, game_id)] = [team_id, group, int(shots), int(goals or 0)]
+        merged[(shooter_id, game_id)] = [team_id, group, int(shots), int(goals or 0), 0]
 
     for goalie_id, game_id, team_id, position in goalie_rows:
         group = _position_group(position) or "G"
         key = (goalie_id, game_id)
         existing = merged.get(key)
         if existing is None:
-            merged[key] = [team_id, group, 0, 0]
+            merged[key] = [team_id, group, 0, 0, 0]
         else:
             existing[1] = group
 
-    if not merged:
-        return 0
-
-    batch = [
-        (player_id, game_id, team_id, group, shots, goals)
-        for (player_id, game_id), (team_id, group, shots, goals) in merged.items()
+    for player_id, game_id, team_id, position, is_goalie, toi_seconds in on_ice_rows:
+        key = (player_id, game_id)
+        existing = merged.get(key)
+        if existing is None:
+            group = _position_group(position) or ("G" if is_goalie else "F")
+            merged[key] = [team_id, group, 0, 0, int(toi_seconds or 0)]
+        else:
+            existing[4] = int(toi_seconds or 0)
+
+    return [
+        (player_id, game_id, team_id, group, shots, goals, toi_seconds)
+        for (player_id, game_id), (team_id, group, shots, goals, toi_seconds)
+        in merged.items()
     ]
 
+
+def _upsert_player_game_stats_rows(cursor, rows):
     cursor.executemany(
         """INSERT INTO player_game_stats
-               (player_id, game_id, team_id, position_group, shots, goals)
-           VALUES (?, ?, ?, ?, ?, ?)
+               (player_id, game_id, team_id, position_group, shots, goals, toi_seconds)
+           VALUES (?, ?, ?, ?, ?, ?, ?)
            ON CONFLICT(player_id, game_id) DO UPDATE SET
                team_id = excluded.team_id,
                position_group = excluded.position_group,
                shots = excluded.shots,
-               goals = excluded.goals""",
-        batch,
+               goals = excluded.goals,
+               toi_seconds = excluded.toi_seconds""",
+        rows,
     )
-    conn.commit()
-    return len(batch)
 
 
-def populate_player_game_features(conn):
-    """Materialize one feature row for each player_game_stats row.
+def _regroup_player_game_stats(cursor, player_ids):
+    """Re-derive position_group for `player_ids` rows whose position is now known.
+
+    Rows written before a player's metadata arrived carry the F/G default;
+    fixing them in place keeps incremental refreshes from having to revisit
+    those games. Only the given players' rows are read, through the
+    (player_id, game_id) primary key.
+    """
+    groups = (("F", _NHL_FORWARD_POSITIONS), ("D", _NHL_DEFENSE_POSITIONS),
+              ("G", _NHL_GOALIE_POSITIONS))
+    cases = " ".join(
+        f"WHEN p.position IN ({', '.join('?' * len(positions))}) THEN '{group}'"
+        for group, positions in groups
+    )
+    positions = [position for _, group_positions in groups for position in group_positions]
+    grouped = f"""(SELECT CASE {cases} END FROM players AS p
+                   WHERE p.player_id = player_game_stats.player_id)"""
+    player_ids = sorted(set(player_ids))
+    game_ids = set()
+    for offset in range(0, len(player_ids), _PLAYER_STATS_BATCH_PLAYERS):
+        batch = player_ids[offset:offset + _PLAYER_STATS_BATCH_PLAYERS]
+        regrouped = (f"player_id IN ({', '.join('?' * len(batch))}) "
+                     f"AND {grouped} IS NOT NULL AND position_group IS NOT {grouped}")
+        cursor.execute(
+            f"SELECT DISTINCT game_id FROM player_game_stats WHERE {regrouped}",
+            [*batch, *positions * 2],
+        )
+        batch_game_ids = [row[0] for row in cursor.fetchall()]
+        if not batch_game_ids:
+            continue
+        game_ids.update(batch_game_ids)
+        cursor.execute(
+            f"UPDATE player_game_stats SET position_group = {grouped} WHERE {regrouped}",
+            [*positions, *batch, *positions * 2],
+        )
+    # Position groups partition the per-game TOI ranks.
+    for game_id in sorted(game_ids):
+        _clear_game_stages(cursor, game_id, (GAME_STAGE_PLAYER_FEATURES,))
 
-    Current v1 player-game features are limited to ordering metadata because
-    TOI and assists/non-shot counters are still placeholders until shift or
-    boxscore ingestion lands. Unsupported rolling columns are explicitly set
-    to NULL so downstream consumers do not treat zero-filled source stats as
-    real deployment signal.
+
+def populate_player_game_stats(conn, game_ids=None, full_rebuild=False,
+                               regroup_player_ids=()):
+    """Derive per-player counting stats from shot_events and upsert into
+    player_game_stats.
+
+    Shooters contribute shot and goal counts; goalies get a row for every
+    game they appear in (with team_id derived from the games table). Players
+    with on-ice time in player_game_on_ice get a row too, and toi_seconds is
+    their all-strengths total. Assists and non-shot counters remain at their
+    NOT NULL DEFAULT 0 values until a boxscore source arrives.
+
+    Only dirty games are rebuilt: ``game_ids`` when given (e.g. the games an
+    ingestion run touched), otherwise games whose shot events are current
+    but whose player_stats stage is missing or stale. Rewriting shot events
+    or player on-ice rows marks a game's player_stats stage stale. Each dirty
+    game's rows are deleted and re-aggregated, so a reprocessed game whose
+    shot_events no longer reference a previously-seen shooter or goalie does
+    not leave that player's stats row behind. ``full_rebuild`` (and any
+    database without game_pipeline_state) rebuilds every game in
+    shot_events instead. ``regroup_player_ids`` are players whose metadata
+    was just backfilled; their rows in clean games get their position group
+    fixed in place.
+
+    Returns the number of rows upserted.
     """
     cursor = conn.cursor()
+    if game_ids is None and not full_rebuild and _game_pipeline_state_exists(cursor):
+        game_ids = list(get_incomplete_game_stages(
+            conn,
+            stages=(GAME_STAGE_PLAYER_STATS,),
+            base_stage=GAME_STAGE_SHOT_EVENTS,
+        ))
+    elif full_rebuild:
+        game_ids = None
+
+    upserted = 0
+    with unit_of_work(conn):
+        if game_ids is None:
+            cursor.execute(
+                """DELETE FROM player_game_stats
+                   WHERE game_id IN (SELECT DISTINCT game_id FROM shot_events)"""
+            )
+            rows = _player_game_stats_rows(cursor, None)
+            _upsert_player_game_stats_rows(cursor, rows)
+            upserted = len(rows)
+            cursor.execute("SELECT DISTINCT game_id FROM shot_events")
+            game_ids = [row[0] for row in cursor.fetchall()]
+        else:
+            game_ids = sorted(set(game_ids))
+            if regroup_player_ids:
+                _regroup_player_game_stats(cursor, regroup_player_ids)
+            for offset in range(0, len(game_ids), _PLAYER_STATS_BATCH_GAMES):
+                batch = game_ids[offset:offset + _PLAYER_STATS_BATCH_GAMES]
+                cursor.execute(
+                    f"""DELETE FROM player_game_stats
+                        WHERE game_id IN ({', '.join('?' * len(batch))})""",
+                    batch,
+                )
+                rows = _player_game_stats_rows(cursor, batch)
+                _upsert_player_game_stats_rows(cursor, rows)
+                upserted += len(rows)
+        for game_id in game_ids:
+            _record_game_stages(cursor, game_id, (GAME_STAGE_PLAYER_STATS,))
+    return upserted
+
 
+# Rolling windows end at (and include) the player's current game.
+_PLAYER_FEATURE_SHORT_WINDOW = 5
+_PLAYER_FEATURE_LONG_WINDOW = 10
+
+
+def _stage_player_feature_players(cursor, dirty_game_ids):
+    """Fill temp._feature_players with the players whose features to rewrite.
+
+    With ``dirty_game_ids`` each player of those games is staged with the
+    ordering key of their earliest dirty game, since earlier rows cannot
+    change; otherwise every player is staged from their first game.
+    """
+    cursor.execute("DROP TABLE IF EXISTS temp._feature_players")
     cursor.execute(
-        """DELETE FROM player_game_features
-           WHERE NOT EXISTS (
-               SELECT 1
-               FROM player_game_stats AS pgs
-               WHERE pgs.player_id = player_game_features.player_id
-                 AND pgs.game_id = player_game_features.game_id
+        """CREATE TEMP TABLE _feature_players (
+               player_id INTEGER PRIMARY KEY,
+               start_undated INTEGER,
+               start_date TEXT,
+               start_game INTEGER
            )"""
     )
+    if dirty_game_ids is None:
+        cursor.execute(
+            "INSERT INTO _feature_players (player_id) "
+            "SELECT DISTINCT player_id FROM player_game_stats"
+        )
+        return
 
+    cursor.execute("DROP TABLE IF EXISTS temp._feature_dirty_games")
+    cursor.execute("CREATE TEMP TABLE _feature_dirty_games (game_id INTEGER PRIMARY KEY)")
+    cursor.executemany(
+        "INSERT INTO _feature_dirty_games (game_id) VALUES (?)",
+        [(game_id,) for game_id in dirty_game_ids],
+    )
+    # Feature rows of dirty games count too: a removed stats row still moves
+    # the player's later game numbers.
     cursor.execute(
-        """INSERT OR REPLACE INTO player_game_features (
-               player_id,
-               game_id,
-               season,
-               game_number_for_player,
-               toi_rank_pos_5g,
-               toi_rank_pos_10g,
-               toi_rolling_mean_5g,
-               points_rolling_10g,
-               feature_set_version
+        """INSERT INTO _feature_players
+               (player_id, start_undated, start_date, start_game)
+           SELECT player_id, undated, game_date, game_id
+           FROM (
+               SELECT d.player_id, d.game_id,
+                      g.game_date IS NULL AS undated,
+                      COALESCE(g.game_date, '') AS game_date,
+                      ROW_NUMBER() OVER (
+                          PARTITION BY d.player_id
+                          ORDER BY g.game_date IS NULL, COALESCE(g.game_date, ''), d.game_id
+                      ) AS dirty_rank
+               FROM (
+                   SELECT player_id, game_id FROM player_game_stats
+                   WHERE game_id IN (SELECT game_id FROM _feature_dirty_games)
+                   UNION
+                   SELECT player_id, game_id FROM player_game_features
+                   WHERE game_id IN (SELECT game_id FROM _feature_dirty_games)
+               ) AS d
+               LEFT JOIN games AS g ON g.game_id = d.game_id
            )
-           SELECT
-               player_id,
-               game_id,
-               season,
-               game_number_for_player,
-               NULL,
-               NULL,
-               NULL,
-               NULL,
-               ?
+           WHERE dirty_rank = 1"""
+    )
+    cursor.execute(
+        """DELETE FROM player_game_features
+           WHERE game_id IN (SELECT game_id FROM _feature_dirty_games)
+             AND NOT EXISTS (
+                 SELECT 1
+                 FROM player_game_stats AS pgs
+                 WHERE pgs.player_id = player_game_features.player_id
+                   AND pgs.game_id = player_game_features.game_id
+             )"""
+    )
+    cursor.execute("DROP TABLE temp._feature_dirty_games")
+
+
+def _write_staged_player_game_features(cursor):
+    """Recompute features of the staged players from their start key on.
+
+    Each player's games are numbered over their whole career, but only rows
+    at or after the start key, plus the rows the longest window reaches
+    back to, are carried into the window pass, and only the former are
+    written. Per-game TOI ranks are read for just those games. Returns the
+    number of rows written.
+    """
+    context_games = _PLAYER_FEATURE_LONG_WINDOW - 1
+    cursor.execute("DROP TABLE IF EXISTS temp._feature_slice")
+    cursor.execute(
+        """CREATE TEMP TABLE _feature_slice (
+               player_id INTEGER NOT NULL,
+               game_id INTEGER NOT NULL,
+               season TEXT,
+               game_number INTEGER NOT NULL,
+               toi_seconds INTEGER,
+               is_target INTEGER NOT NULL,
+               PRIMARY KEY (player_id, game_id)
+           )"""
+    )
+    cursor.execute(
+        """INSERT INTO _feature_slice
+           SELECT player_id, game_id, season, game_number, toi_seconds, is_target
            FROM (
-               SELECT
-                   pgs.player_id,
-                   pgs.game_id,
-                   g.season,
-                   ROW_NUMBER() OVER (
-                       PARTITION BY pgs.player_id
-                       ORDER BY g.game_date IS NULL, g.game_date, pgs.game_id
-                   ) AS game_number_for_player
-               FROM player_game_stats AS pgs
-               LEFT JOIN games AS g ON g.game_id = pgs.game_id
-           ) AS ordered_player_games
-           ORDER BY player_id, game_number_for_player""",
+               SELECT c.*,
+                      MIN(CASE WHEN c.is_target THEN c.game_number END)
+                          OVER (PARTITION BY c.player_id) AS first_target
+               FROM (
+                   SELECT pgs.player_id, pgs.game_id, g.season, pgs.toi_seconds,
+                          ROW_NUMBER() OVER (
+                              PARTITION BY pgs.player_id
+                              ORDER BY g.game_date IS NULL, COALESCE(g.game_date, ''), pgs.game_id
+                          ) AS game_number,
+                          fp.start_game IS NULL
+                              OR (g.game_date IS NULL, COALESCE(g.game_date, ''), pgs.game_id)
+                                 >= (fp.start_undated, fp.start_date, fp.start_game)
+                              AS is_target
+                   FROM _feature_players AS fp
+                   JOIN player_game_stats AS pgs ON pgs.player_id = fp.player_id
+                   LEFT JOIN games AS g ON g.game_id = pgs.game_id
+               ) AS c
+           )
+           WHERE game_number >= first_target - ?""",
+        (context_games,),
+    )
+
+    # Rank 1 is the most ice time among the player's team and position
+    # group in that game; games without shift data leave TOI at 0 and
+    # get no rank.
+    cursor.execute("DROP TABLE IF EXISTS temp._feature_game_ranks")
+    cursor.execute(
+        """CREATE TEMP TABLE _feature_game_ranks (
+               player_id INTEGER NOT NULL,
+               game_id INTEGER NOT NULL,
+               toi_rank INTEGER NOT NULL,
+               PRIMARY KEY (player_id, game_id)
+           )"""
+    )
+    cursor.execute(
+        """INSERT INTO _feature_game_ranks
+           SELECT player_id, game_id,
+                  RANK() OVER (
+                      PARTITION BY game_id, team_id, position_group
+                      ORDER BY toi_seconds DESC
+                  )
+           FROM player_game_stats
+           WHERE toi_seconds > 0
+             AND game_id IN (SELECT DISTINCT game_id FROM _feature_slice)"""
+    )
+
+    cursor.execute(
+        f"""INSERT OR REPLACE INTO player_game_features (
+                player_id,
+                game_id,
+                season,
+                game_number_for_player,
+                toi_rank_pos_5g,
+                toi_rank_pos_10g,
+                toi_rolling_mean_5g,
+                points_rolling_10g,
+                feature_set_version
+            )
+            SELECT player_id, game_id, season, game_number,
+                   toi_rank_short, toi_rank_long, toi_mean_short, NULL, ?
+            FROM (
+                SELECT s.player_id, s.game_id, s.season, s.game_number, s.is_target,
+                       AVG(r.toi_rank) OVER short_window AS toi_rank_short,
+                       AVG(r.toi_rank) OVER long_window AS toi_rank_long,
+                       AVG(NULLIF(s.toi_seconds, 0)) OVER short_window AS toi_mean_short
+                FROM _feature_slice AS s
+                LEFT JOIN _feature_game_ranks AS r
+                  ON r.player_id = s.player_id AND r.game_id = s.game_id
+                WINDOW
+                    short_window AS (
+                        PARTITION BY s.player_id ORDER BY s.game_number
+                        ROWS BETWEEN {_PLAYER_FEATURE_SHORT_WINDOW - 1} PRECEDING AND CURRENT ROW
+                    ),
+                    long_window AS (
+                        PARTITION BY s.player_id ORDER BY s.game_number
+                        ROWS BETWEEN {context_games} PRECEDING AND CURRENT ROW
+                    )
+            )
+            WHERE is_target
+            ORDER BY player_id, game_number""",
         (_FEATURE_SET_VERSION,),
     )
-    conn.commit()
+    written = cursor.rowcount
+    for table in ("_feature_players", "_feature_slice", "_feature_game_ranks"):
+        cursor.execute(f"DROP TABLE temp.{table}")
+    return written
 
-    cursor.execute("SELECT COUNT(*) FROM player_game_features")
-    return cursor.fetchone()[0]
+
+def populate_player_game_features(conn, full_refresh=False):
+    """Materialize one feature row for each player_game_stats row.
+
+    Games are numbered per player by date. `toi_rolling_mean_5g` is the mean
+    TOI in seconds over the player's last 5 games, skipping games without
+    shift data; `toi_rank_pos_5g`/`toi_rank_pos_10g` average the player's
+    per-game TOI rank within their team and position group over the last 5
+    and 10 games (1 = most ice time). Windows include the current game and
+    are computed with SQLite window frames. `points_rolling_10g` stays NULL
+    until assists are ingested, so consumers do not read goal-only sums as
+    points.
+
+    Only players of games whose player_stats stage was re-recorded since
+    their player_features stage are rewritten, from their earliest such game
+    onward, so a nightly run touches the new games rather than the players'
+    whole careers. ``full_refresh`` (and any database without
+    game_pipeline_state) recomputes every row and clears rows whose stats
+    are gone. Returns the number of rows written.
+    """
+    cursor = conn.cursor()
+    dirty_game_ids = None
+    if not full_refresh and _game_pipeline_state_exists(cursor):
+        dirty_game_ids = list(get_incomplete_game_stages(
+            conn,
+            stages=(GAME_STAGE_PLAYER_FEATURES,),
+            base_stage=GAME_STAGE_PLAYER_STATS,
+        ))
+        if not dirty_game_ids:
+            return 0
+
+    with unit_of_work(conn):
+        if dirty_game_ids is None:
+            cursor.execute(
+                """DELETE FROM player_game_features
+                   WHERE NOT EXISTS (
+                       SELECT 1
+                       FROM player_game_stats AS pgs
+                       WHERE pgs.player_id = player_game_features.player_id
+                         AND pgs.game_id = player_game_features.game_id
+                   )"""
+            )
+        _stage_player_feature_players(cursor, dirty_game_ids)
+        written = _write_staged_player_game_features(cursor)
+        if dirty_game_ids is None:
+            cursor.execute("SELECT DISTINCT game_id FROM player_game_stats")
+            dirty_game_ids = [row[0] for row in cursor.fetchall()]
+        for game_id in dirty_game_ids:
+            _record_game_stages(cursor, game_id, (GAME_STAGE_PLAYER_FEATURES,))
+    return written
 
 
 # ── Phase 2, Area 1: game_context table ─────────────────────────────
@@ -1431,14 +2074,16 @@ def create_game_context_table(conn):
         )
         """
     )
-    conn.commit()
+    _commit(conn)
 
 
 def game_has_context(conn, game_id):
-    """Return True if game_context has a row for game_id."""
+    """Return True if game_context has a current-version row for game_id."""
     cursor = conn.cursor()
     cursor.execute(
-        "SELECT 1 FROM game_context WHERE game_id = ? LIMIT 1", (game_id,)
+        "SELECT 1 FROM game_context "
+        "WHERE game_id = ? AND context_schema_version = ? LIMIT 1",
+        (game_id, _GAME_CONTEXT_SCHEMA_VERSION),
     )
     return cursor.fetchone() is not None
 
@@ -1447,12 +2092,12 @@ def _get_previous_game_date(conn, team_id, game_date, game_id):
     """Return the most recent game_date for team_id before game_date, or None."""
     cursor = conn.cursor()
     cursor.execute(
-        """SELECT game_date FROM games
-           WHERE (home_team_id = ? OR away_team_id = ?)
+        """SELECT game_date FROM team_games
+           WHERE team_id = ?
              AND game_date < ?
              AND game_id != ?
            ORDER BY game_date DESC LIMIT 1""",
-        (team_id, team_id, game_date, game_id),
+        (team_id, game_date, game_id),
     )
     row = cursor.fetchone()
     return row[0] if row else None
@@ -1462,7 +2107,8 @@ def populate_game_context(conn, game_id):
     """Compute and insert rest/travel context for a single game.
 
     Queries games table for schedule info and arena_reference for locations.
-    Skips if game_context row already exists for game_id.
+    Skips if a current-version game_context row already exists for game_id;
+    rows from an older context version are replaced.
     """
     if game_has_context(conn, game_id):
         return
@@ -1511,7 +2157,7 @@ def populate_game_context(conn, game_id):
         tz_delta = None
 
     cursor.execute(
-        """INSERT OR IGNORE INTO game_context
+        """INSERT OR REPLACE INTO game_context
            (game_id, home_rest_days, away_rest_days, rest_advantage,
             home_is_back_to_back, away_is_back_to_back,
             travel_distance_km, timezone_delta, context_schema_version)
@@ -1520,8 +2166,128 @@ def populate_game_context(conn, game_id):
          home_b2b, away_b2b, travel_dist, tz_delta,
          _GAME_CONTEXT_SCHEMA_VERSION),
     )
-    conn.commit()
+    _record_game_stages(cursor, game_id, (GAME_STAGE_CONTEXT,))
+    _commit(conn)
 
+
+def _game_rest_rows(cursor):
+    """Yield (game_id, home_rest_days, away_rest_days) for every dated game.
+
+    Each team's distinct game dates in team_games get their predecessor from
+    one LAG() window, matching `_get_previous_game_date` (latest strictly
+    earlier date).
+    """
+    cursor.execute(
+        """WITH team_dates AS (
+               SELECT team_id, game_date,
+                      LAG(game_date) OVER (
+                          PARTITION BY team_id ORDER BY game_date
+                      ) AS previous_date
+               FROM (
+                   SELECT DISTINCT team_id, game_date FROM team_games
+                   WHERE game_date IS NOT NULL
+               )
+           ),
+           rest AS (
+               SELECT tg.game_id, tg.is_home,
+                      CAST(julianday(tg.game_date) - julianday(td.previous_date)
+                           AS INTEGER) AS rest_days
+               FROM team_games AS tg
+               JOIN team_dates AS td
+                 ON td.team_id = tg.team_id AND td.game_date = tg.game_date
+           )
+           SELECT game_id,
+                  MAX(CASE WHEN is_home = 1 THEN rest_days END),
+                  MAX(CASE WHEN is_home = 0 THEN rest_days END)
+           FROM rest
+           GROUP BY game_id"""
+    )
+    return cursor.fetchall()
+
+
+def populate_game_contexts(conn, game_ids=None):
+    """Compute and insert rest/travel context for many games in one pass.
+
+    Rest days for every team-game come from a single window query over
+    `games`, and travel distance / timezone delta are computed once per
+    (away, home) arena pair rather than per game. Writes the given
+    ``game_ids`` (default: every game whose context stage is missing or
+    stale, or every game without a current-version row when there is no
+    game_pipeline_state) inside one transaction, replacing older-version
+    rows. Values match `populate_game_context`. Returns the number of rows
+    written.
+    """
+    cursor = conn.cursor()
+    if game_ids is None:
+        if _game_pipeline_state_exists(cursor):
+            game_ids = get_incomplete_game_stages(
+                conn, stages=(GAME_STAGE_CONTEXT,), base_stage=GAME_STAGE_METADATA
+            )
+        else:
+            cursor.execute(
+                """SELECT g.game_id FROM games AS g
+                   LEFT JOIN game_context AS gc
+                     ON gc.game_id = g.game_id
+                    AND gc.context_schema_version = ?
+                   WHERE gc.game_id IS NULL""",
+                (_GAME_CONTEXT_SCHEMA_VERSION,),
+            )
+            game_ids = [row[0] for row in cursor.fetchall()]
+    wanted = set(game_ids)
+    if not wanted:
+        return 0
+
+    from xg_features import is_back_to_back, haversine_distance, compute_timezone_delta
+    from arena_reference import get_arena_info
+
+    rest_by_game = {
+        game_id: (home_rest, away_rest)
+        for game_id, home_rest, away_rest in _game_rest_rows(cursor)
+        if game_id in wanted
+    }
+
+    travel_by_pair = {}
+
+    def travel(away_team_id, home_team_id):
+        key = (away_team_id, home_team_id)
+        if key not in travel_by_pair:
+            home_arena = get_arena_info(home_team_id)
+            away_arena = get_arena_info(away_team_id)
+            if home_arena and away_arena:
+                travel_by_pair[key] = (
+                    haversine_distance(away_arena["lat"], away_arena["lon"],
+                                       home_arena["lat"], home_arena["lon"]),
+                    compute_timezone_delta(away_arena["timezone_utc_offset"],
+                                           home_arena["timezone_utc_offset"]),
+                )
+            else:
+                travel_by_pair[key] = (None, None)
+        return travel_by_pair[key]
+
+    cursor.execute("SELECT game_id, home_team_id, away_team_id FROM games")
+    rows = []
+    for game_id, home_team_id, away_team_id in cursor.fetchall():
+        if game_id not in wanted:
+            continue
+        home_rest, away_rest = rest_by_game.get(game_id, (None, None))
+        rest_advantage = (home_rest - away_rest) if (home_rest is not None and away_rest is not None) else None
+        travel_dist, tz_delta = travel(away_team_id, home_team_id)
+        rows.append((game_id, home_rest, away_rest, rest_advantage,
+                     is_back_to_back(home_rest), is_back_to_back(away_rest),
+                     travel_dist, tz_delta, _GAME_CONTEXT_SCHEMA_VERSION))
+
+    with unit_of_work(conn):
+        cursor.executemany(
+            """INSERT OR REPLACE INTO game_context
+               (game_id, home_rest_days, away_rest_days, rest_advantage,
+                home_is_back_to_back, away_is_back_to_back,
+                travel_distance_km, timezone_delta, context_schema_version)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            rows,
+        )
+        for row in rows:
+            _record_game_stages(cursor, row[0], (GAME_STAGE_CONTEXT,))
+    return len(rows)
 
 # ── Phase 2, Area 4: venue bias diagnostics ─────────────────────────
 
@@ -1570,18 +2336,16 @@ def validate_game_context_quality(conn):
         """SELECT COUNT(*) FROM game_context gc
            JOIN games g ON g.game_id = gc.game_id
            WHERE NOT EXISTS (
-               SELECT 1 FROM games g2
-               WHERE g2.game_id != g.game_id
-                 AND g2.game_date < g.game_date
-                 AND (g2.home_team_id = g.home_team_id
-                      OR g2.away_team_id = g.home_team_id)
+               SELECT 1 FROM team_games tg
+               WHERE tg.team_id = g.home_team_id
+                 AND tg.game_date < g.game_date
+                 AND tg.game_id != g.game_id
            )
               OR NOT EXISTS (
-               SELECT 1 FROM games g3
-               WHERE g3.game_id != g.game_id
-                 AND g3.game_date < g.game_date
-                 AND (g3.home_team_id = g.away_team_id
-                      OR g3.away_team_id = g.away_team_id)
+               SELECT 1 FROM team_games tg
+               WHERE tg.team_id = g.away_team_id
+                 AND tg.game_date < g.game_date
+                 AND tg.game_id != g.game_id
            )"""
     )
     structural_null_rest_rows = cursor.fetchone()[0]
@@ -1625,20 +2389,64 @@ def create_venue_bias_diagnostics_table(conn):
         )
         """
     )
-    conn.commit()
-
-
-def create_shifts_table(conn):
-    """Create raw shift table used for on-ice reconstruction."""
+    _commit(conn)
+
+
+def create_venue_shot_sums_tables(conn):
+    """Create the mergeable venue shot-statistic tables.
+
+    game_venue_shot_sums holds each game's count/sum/sum-of-squares
+    contribution (see `_VENUE_SHOT_SUM_COLUMNS`) so a re-ingested game can
+    be replaced; venue_season_shot_sums is their per-venue-season total.
+    venue_name is NULL for games without a venue, whose shots count toward
+    league totals only.
+    """
+    sum_columns = ",\n            ".join(
+        f"{column} {'INTEGER' if column.endswith(('shots', 'count')) else 'REAL'} NOT NULL"
+        for column in _VENUE_SHOT_SUM_COLUMNS
+    )
     cursor = conn.cursor()
     cursor.execute(
         f"""
-        CREATE TABLE IF NOT EXISTS shifts (
-            game_id INTEGER NOT NULL,
-            player_id INTEGER NOT NULL,
-            team_id INTEGER,
-            team_side TEXT,
-            position TEXT,
+        CREATE TABLE IF NOT EXISTS game_venue_shot_sums (
+            game_id INTEGER PRIMARY KEY,
+            season TEXT NOT NULL,
+            venue_name TEXT,
+            {sum_columns}
+        )
+        """
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_game_venue_shot_sums_season "
+        "ON game_venue_shot_sums(season)"
+    )
+    cursor.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS venue_season_shot_sums (
+            season TEXT NOT NULL,
+            venue_name TEXT,
+            {sum_columns}
+        )
+        """
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_venue_season_shot_sums_season "
+        "ON venue_season_shot_sums(season, venue_name)"
+    )
+    _commit(conn)
+
+
+def create_shifts_table(conn):
+    """Create raw shift table used for on-ice reconstruction."""
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS shifts (
+            game_id INTEGER NOT NULL,
+            player_id INTEGER NOT NULL,
+            team_id INTEGER,
+            team_side TEXT,
+            position TEXT,
             period INTEGER NOT NULL,
             start_seconds INTEGER NOT NULL,
             end_seconds INTEGER NOT NULL,
@@ -1651,7 +2459,7 @@ def create_shifts_table(conn):
         "CREATE INDEX IF NOT EXISTS idx_shifts_game_period "
         "ON shifts(game_id, period)"
     )
-    conn.commit()
+    _commit(conn)
 
 
 def _migrate_shifts_add_context_columns(conn):
@@ -1668,11 +2476,11 @@ def _migrate_shifts_add_context_columns(conn):
         cursor.execute("ALTER TABLE shifts ADD COLUMN team_side TEXT")
     if "position" not in existing_cols:
         cursor.execute("ALTER TABLE shifts ADD COLUMN position TEXT")
-    conn.commit()
+    _commit(conn)
 
 
 def create_on_ice_intervals_table(conn):
-    """Create normalized on-ice interval table."""
+    """Create normalized on-ice interval table and its per-player projection."""
     cursor = conn.cursor()
     cursor.execute(
         f"""
@@ -1695,7 +2503,63 @@ def create_on_ice_intervals_table(conn):
         "CREATE INDEX IF NOT EXISTS idx_on_ice_intervals_game_period "
         "ON on_ice_intervals(game_id, period)"
     )
-    conn.commit()
+    _commit(conn)
+    create_on_ice_interval_players_table(conn)
+
+
+def create_on_ice_interval_players_table(conn):
+    """Create the per-player projection of on_ice_intervals.
+
+    One row per (interval, player) with the player's side and goalie flag,
+    indexed on player, so "every interval containing player X" is an index
+    lookup instead of a JSON scan. Seeded from the skater JSON columns when
+    first created.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'on_ice_interval_players'"
+    )
+    if cursor.fetchone() is not None:
+        return
+
+    cursor.execute(
+        """
+        CREATE TABLE on_ice_interval_players (
+            game_id INTEGER NOT NULL,
+            period INTEGER NOT NULL,
+            start_s INTEGER NOT NULL,
+            end_s INTEGER NOT NULL,
+            player_id INTEGER NOT NULL,
+            side TEXT NOT NULL,
+            is_goalie INTEGER NOT NULL,
+            PRIMARY KEY (game_id, period, start_s, end_s, side, player_id)
+        ) WITHOUT ROWID
+        """
+    )
+    cursor.execute(
+        "CREATE INDEX idx_on_ice_interval_players_player "
+        "ON on_ice_interval_players(player_id, game_id)"
+    )
+    # Set-based seed: skaters first, so OR IGNORE keeps the skater row of a
+    # player also listed as the side's goalie, as `_on_ice_interval_player_rows` does.
+    for side in _VALID_SHIFT_TEAM_SIDES:
+        cursor.execute(
+            f"""INSERT OR IGNORE INTO on_ice_interval_players
+                    (game_id, period, start_s, end_s, player_id, side, is_goalie)
+                SELECT i.game_id, i.period, i.start_s, i.end_s, skater.value, ?, 0
+                FROM on_ice_intervals i, json_each(i.{side}_skaters_json) skater""",
+            (side,),
+        )
+    for side in _VALID_SHIFT_TEAM_SIDES:
+        cursor.execute(
+            f"""INSERT OR IGNORE INTO on_ice_interval_players
+                    (game_id, period, start_s, end_s, player_id, side, is_goalie)
+                SELECT game_id, period, start_s, end_s, {side}_goalie_player_id, ?, 1
+                FROM on_ice_intervals
+                WHERE {side}_goalie_player_id IS NOT NULL""",
+            (side,),
+        )
+    _commit(conn)
 
 
 _SHIFT_INSERT_COLUMNS = (
@@ -1759,7 +2623,7 @@ def insert_shift_records(conn, shift_records, commit=True):
     cursor.execute("SELECT COUNT(*) FROM shifts")
     inserted = cursor.fetchone()[0] - before_count
     if commit:
-        conn.commit()
+        _commit(conn)
     return inserted
 
 
@@ -1777,11 +2641,50 @@ _ON_ICE_INTERVAL_INSERT_COLUMNS = (
 )
 
 
+def _on_ice_interval_player_rows(interval):
+    """Yield on_ice_interval_players tuples for one interval record."""
+    key = tuple(
+        _record_value(interval, column_name)
+        for column_name in ("game_id", "period", "start_s", "end_s")
+    )
+    for side in _VALID_SHIFT_TEAM_SIDES:
+        for player_id in json.loads(_record_value(interval, f"{side}_skaters_json") or "[]"):
+            yield key + (player_id, side, 0)
+        goalie_id = _record_value(interval, f"{side}_goalie_player_id")
+        if goalie_id is not None:
+            yield key + (goalie_id, side, 1)
+
+
+def _insert_on_ice_interval_player_rows(cursor, rows):
+    # OR IGNORE: a player listed both as skater and goalie on one side keeps
+    # the skater row, matching the slot projection.
+    cursor.executemany(
+        """INSERT OR IGNORE INTO on_ice_interval_players
+               (game_id, period, start_s, end_s, player_id, side, is_goalie)
+           VALUES (?, ?, ?, ?, ?, ?, ?)""",
+        rows,
+    )
+
+
 def replace_game_on_ice_intervals(conn, game_id, intervals, commit=True):
     """Replace intervalized on-ice rows for one game."""
+    return replace_on_ice_intervals_for_games(conn, [game_id], intervals, commit=commit)
+
+
+def replace_on_ice_intervals_for_games(conn, game_ids, intervals, commit=True):
+    """Replace intervalized on-ice rows for several games in one pass.
+
+    Every game in ``game_ids`` loses its existing rows, including games with
+    no new intervals; ``intervals`` may span any of those games.
+    """
+    ids = sorted(set(game_ids))
+    if not ids:
+        return 0
     interval_rows = list(intervals)
+    id_placeholders = ", ".join(["?"] * len(ids))
     cursor = conn.cursor()
-    cursor.execute("DELETE FROM on_ice_intervals WHERE game_id = ?", (game_id,))
+    cursor.execute(f"DELETE FROM on_ice_intervals WHERE game_id IN ({id_placeholders})", ids)
+    cursor.execute(f"DELETE FROM on_ice_interval_players WHERE game_id IN ({id_placeholders})", ids)
 
     if interval_rows:
         cols = ", ".join(_ON_ICE_INTERVAL_INSERT_COLUMNS)
@@ -1797,12 +2700,169 @@ def replace_game_on_ice_intervals(conn, game_id, intervals, commit=True):
             for interval in interval_rows
         ]
         cursor.executemany(query, rows)
+        _insert_on_ice_interval_player_rows(
+            cursor,
+            [row for interval in interval_rows for row in _on_ice_interval_player_rows(interval)],
+        )
 
     if commit:
-        conn.commit()
+        _commit(conn)
     return len(interval_rows)
 
 
+# ── Player on-ice TOI and shot share ─────────────────────────────────
+
+_UNKNOWN_STRENGTH_STATE = "unknown"
+_PLAYER_ON_ICE_BATCH_GAMES = 500
+
+
+def create_player_game_on_ice_table(conn):
+    """Create per-player, per-game, per-strength on-ice aggregates.
+
+    ``strength_state`` is "{own skaters}v{opponent skaters}" from the
+    player's side. TOI comes from on_ice_intervals; shots and goals for and
+    against count every shot_events row (all attempts) with the player in an
+    on-ice slot, bucketed by the shot's manpower state.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS player_game_on_ice (
+            player_id INTEGER NOT NULL,
+            game_id INTEGER NOT NULL,
+            strength_state TEXT NOT NULL,
+            team_side TEXT NOT NULL,
+            is_goalie INTEGER NOT NULL DEFAULT 0,
+            toi_seconds INTEGER NOT NULL DEFAULT 0,
+            shots_for INTEGER NOT NULL DEFAULT 0,
+            shots_against INTEGER NOT NULL DEFAULT 0,
+            goals_for INTEGER NOT NULL DEFAULT 0,
+            goals_against INTEGER NOT NULL DEFAULT 0,
+            stats_schema_version TEXT NOT NULL DEFAULT '{_PLAYER_ON_ICE_SCHEMA_VERSION}',
+            PRIMARY KEY (player_id, game_id, strength_state)
+        )
+        """
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_player_game_on_ice_game_id "
+        "ON player_game_on_ice(game_id)"
+    )
+    _commit(conn)
+
+
+def _own_strength_sql(strength_expr, is_own_expr):
+    """SQL for a "{a}v{b}" strength seen from one side: flipped when not own."""
+    flipped = (
+        f"substr({strength_expr}, instr({strength_expr}, 'v') + 1) || 'v' || "
+        f"substr({strength_expr}, 1, instr({strength_expr}, 'v') - 1)"
+    )
+    return (
+        f"CASE WHEN {strength_expr} IS NULL OR instr({strength_expr}, 'v') = 0 "
+        f"THEN '{_UNKNOWN_STRENGTH_STATE}' "
+        f"WHEN {is_own_expr} THEN {strength_expr} ELSE {flipped} END"
+    )
+
+
+def _shot_slot_union_sql(id_placeholders):
+    """UNION ALL of the 12 shot_events on-ice slots, one row per (shot, player)."""
+    selects = []
+    for side, team_column in ((_SHIFT_SIDE_HOME, "home_team_id"),
+                              (_SHIFT_SIDE_AWAY, "away_team_id")):
+        for slot in range(1, 7):
+            column = f"se.{side}_on_ice_{slot}_player_id"
+            selects.append(
+                f"""SELECT {column} AS player_id, se.game_id, '{side}' AS side,
+                           {int(slot == 6)} AS is_goalie,
+                           se.shooting_team_id = g.{team_column} AS is_for,
+                           se.is_goal, se.manpower_state
+                    FROM shot_events AS se
+                    JOIN games AS g ON g.game_id = se.game_id
+                    WHERE se.game_id IN ({id_placeholders}) AND {column} IS NOT NULL"""
+            )
+    return " UNION ALL ".join(selects)
+
+
+def _populate_player_game_on_ice_batch(cursor, game_ids):
+    id_placeholders = ", ".join(["?"] * len(game_ids))
+    cursor.execute(
+        f"DELETE FROM player_game_on_ice WHERE game_id IN ({id_placeholders})",
+        game_ids,
+    )
+    interval_strength = _own_strength_sql(
+        "i.strength_state", f"p.side = '{_SHIFT_SIDE_HOME}'"
+    )
+    cursor.execute(
+        f"""INSERT INTO player_game_on_ice
+               (player_id, game_id, strength_state, team_side, is_goalie, toi_seconds)
+           SELECT p.player_id, p.game_id, {interval_strength}, MAX(p.side),
+                  MAX(p.is_goalie), SUM(p.end_s - p.start_s)
+           FROM on_ice_interval_players AS p
+           JOIN on_ice_intervals AS i
+             ON i.game_id = p.game_id AND i.period = p.period
+            AND i.start_s = p.start_s AND i.end_s = p.end_s
+           WHERE p.game_id IN ({id_placeholders})
+           GROUP BY p.player_id, p.game_id, 3""",
+        game_ids,
+    )
+    shot_strength = _own_strength_sql("manpower_state", "is_for")
+    cursor.execute(
+        f"""INSERT INTO player_game_on_ice
+               (player_id, game_id, strength_state, team_side, is_goalie,
+                shots_for, shots_against, goals_for, goals_against)
+           SELECT player_id, game_id, {shot_strength}, MAX(side), MAX(is_goalie),
+                  SUM(is_for), SUM(NOT is_for),
+                  SUM(is_for AND is_goal = 1), SUM(NOT is_for AND is_goal = 1)
+           FROM ({_shot_slot_union_sql(id_placeholders)})
+           GROUP BY player_id, game_id, 3
+           ON CONFLICT(player_id, game_id, strength_state) DO UPDATE SET
+               shots_for = excluded.shots_for,
+               shots_against = excluded.shots_against,
+               goals_for = excluded.goals_for,
+               goals_against = excluded.goals_against""",
+        game_ids * 12,
+    )
+    # player_game_stats.toi_seconds is the all-strengths total.
+    cursor.execute(
+        f"""UPDATE player_game_stats
+            SET toi_seconds = COALESCE((
+                SELECT SUM(o.toi_seconds) FROM player_game_on_ice AS o
+                WHERE o.player_id = player_game_stats.player_id
+                  AND o.game_id = player_game_stats.game_id
+            ), 0)
+            WHERE game_id IN ({id_placeholders})""",
+        game_ids,
+    )
+    for game_id in game_ids:
+        _record_game_stages(cursor, game_id, (GAME_STAGE_PLAYER_ON_ICE,))
+
+
+def populate_player_game_on_ice(conn, game_ids=None):
+    """Aggregate player on-ice TOI and shot share for shifted games.
+
+    By default only games whose on-ice slots are current but whose
+    player_on_ice stage is missing or stale are processed, so a nightly run
+    touches just the newly shifted games. Pass ``game_ids`` to force a set.
+    Work is set-based SQL in batches of `_PLAYER_ON_ICE_BATCH_GAMES` games,
+    and also refreshes those games' `player_game_stats.toi_seconds`.
+    Returns the number of games processed.
+    """
+    if game_ids is None:
+        game_ids = list(get_incomplete_game_stages(
+            conn,
+            stages=(GAME_STAGE_PLAYER_ON_ICE,),
+            base_stage=GAME_STAGE_ON_ICE_SLOTS,
+        ))
+    game_ids = sorted(set(game_ids))
+
+    cursor = conn.cursor()
+    with unit_of_work(conn):
+        for offset in range(0, len(game_ids), _PLAYER_ON_ICE_BATCH_GAMES):
+            _populate_player_game_on_ice_batch(
+                cursor, game_ids[offset:offset + _PLAYER_ON_ICE_BATCH_GAMES]
+            )
+    return len(game_ids)
+
+
 def update_shot_event_on_ice_slots(conn, shot_rows, commit=True):
     """Update shot_events on-ice slot columns from enriched shot rows."""
     rows_to_update = list(shot_rows)
@@ -1823,105 +2883,46 @@ def update_shot_event_on_ice_slots(conn, shot_rows, commit=True):
     cursor.executemany(query, values)
     updated = cursor.rowcount
     if commit:
-        conn.commit()
+        _commit(conn)
     return updated
 
 
 def game_has_current_shift_data(conn, game_id):
-    """Return True when current shifts have resolved context and intervals exist."""
-    cursor = conn.cursor()
-    cursor.execute(
-        """SELECT 1
-           FROM shifts
-           WHERE game_id = ?
-             AND shift_schema_version = ?
-           LIMIT 1""",
-        (game_id, _SHIFT_SCHEMA_VERSION),
-    )
-    if cursor.fetchone() is None:
-        return False
-
-    cursor.execute(
-        """SELECT 1
-           FROM shifts
-           WHERE game_id = ?
-             AND shift_schema_version = ?
-             AND (
-                 position IS NULL
-                 OR position = ''
-                 OR team_side IS NULL
-                 OR team_side NOT IN (?, ?)
-             )
-           LIMIT 1""",
-        (game_id, _SHIFT_SCHEMA_VERSION, *_VALID_SHIFT_TEAM_SIDES),
-    )
-    if cursor.fetchone() is not None:
-        return False
+    """Return True when the game's shift and on-ice slot stages are current.
 
-    cursor.execute(
-        """SELECT 1
-           FROM on_ice_intervals
-           WHERE game_id = ?
-             AND on_ice_schema_version = ?
-           LIMIT 1""",
-        (game_id, _ON_ICE_SCHEMA_VERSION),
-    )
-    return cursor.fetchone() is not None
+    Thin wrapper over game_pipeline_state: shift population records both
+    stages only once every shift has a resolved position and team side and
+    the on-ice intervals are written.
+    """
+    return {GAME_STAGE_SHIFTS, GAME_STAGE_ON_ICE_SLOTS} <= get_current_game_stages(
+        conn, game_id)
 
 
 def get_shift_backfill_game_ids(conn, limit=None):
-    """Return games with shot events that still need shift population."""
-    cursor = conn.cursor()
-    query = (
-        """SELECT DISTINCT se.game_id
-           FROM shot_events se
-           WHERE NOT EXISTS (
-               SELECT 1
-               FROM shifts sh
-               WHERE sh.game_id = se.game_id
-                 AND sh.shift_schema_version = ?
-           )
-              OR EXISTS (
-               SELECT 1
-               FROM shifts sh
-               WHERE sh.game_id = se.game_id
-                 AND sh.shift_schema_version = ?
-                 AND (
-                     sh.position IS NULL
-                     OR sh.position = ''
-                     OR sh.team_side IS NULL
-                     OR sh.team_side NOT IN (?, ?)
-                 )
-           )
-              OR NOT EXISTS (
-               SELECT 1
-               FROM on_ice_intervals oi
-               WHERE oi.game_id = se.game_id
-                 AND oi.on_ice_schema_version = ?
-           )
-           ORDER BY se.game_id"""
-    )
-    params = [
-        _SHIFT_SCHEMA_VERSION,
-        _SHIFT_SCHEMA_VERSION,
-        *_VALID_SHIFT_TEAM_SIDES,
-        _ON_ICE_SCHEMA_VERSION,
-    ]
-    if limit is not None:
-        query += " LIMIT ?"
-        params.append(limit)
-    cursor.execute(query, tuple(params))
-    return [row[0] for row in cursor.fetchall()]
+    """Return games with current shot events that still need shift population."""
+    game_ids = list(get_incomplete_game_stages(
+        conn,
+        stages=(GAME_STAGE_SHIFTS, GAME_STAGE_ON_ICE_SLOTS),
+        base_stage=GAME_STAGE_SHOT_EVENTS,
+    ))
+    return game_ids if limit is None else game_ids[:limit]
+
 
+def load_player_positions(conn, player_ids=None):
+    """Return player_id -> position for known players.
+
+    ``player_ids=None`` returns every player in the dimension.
+    """
+    cursor = conn.cursor()
+    if player_ids is None:
+        cursor.execute("SELECT player_id, position FROM players")
+        return {row[0]: row[1] for row in cursor.fetchall()}
 
-def load_player_positions(conn, player_ids):
-    """Return player_id -> position for known players."""
     ids = sorted({player_id for player_id in player_ids if player_id is not None})
     if not ids:
         return {}
 
     placeholders = ", ".join(["?"] * len(ids))
-    cursor = conn.cursor()
     cursor.execute(
         f"""SELECT player_id, position
             FROM players
@@ -1944,6 +2945,137 @@ def load_game_team_ids(conn, game_id):
     return row[0], row[1]
 
 
+SEASON_SHIFT_COLUMNS = (
+    "game_id",
+    "period",
+    "start_seconds",
+    "end_seconds",
+    "player_id",
+    "team_side",
+    "position",
+)
+
+
+def load_season_shift_rows(conn, season, game_ids=None):
+    """Return one season's shift rows as tuples in `SEASON_SHIFT_COLUMNS` order.
+
+    Rows are ordered by game_id, period, and start. Pass ``game_ids`` to
+    restrict the load to a subset of the season's games.
+    """
+    cols = ", ".join(f"s.{column}" for column in SEASON_SHIFT_COLUMNS)
+    query = (
+        f"SELECT {cols} FROM shifts s "
+        "JOIN games g ON g.game_id = s.game_id "
+        "WHERE g.season = ?"
+    )
+    params = [str(season)]
+    if game_ids is not None:
+        ids = sorted(set(game_ids))
+        if not ids:
+            return []
+        query += f" AND s.game_id IN ({', '.join(['?'] * len(ids))})"
+        params.extend(ids)
+    query += " ORDER BY s.game_id, s.period, s.start_seconds"
+
+    cursor = conn.cursor()
+    cursor.execute(query, params)
+    return cursor.fetchall()
+
+
+SEASON_STINT_PLAYER_COLUMNS = (
+    "game_id",
+    "period",
+    "start_s",
+    "end_s",
+    "side",
+    "player_id",
+)
+
+
+def load_season_stint_player_rows(conn, season, strength_states=None, game_ids=None):
+    """Return one season's on-ice skaters per interval, in `SEASON_STINT_PLAYER_COLUMNS` order.
+
+    Goalies are excluded. Pass ``strength_states`` (e.g. ``("5v5",)``) to
+    keep only intervals in those states, and ``game_ids`` to restrict the
+    load to a subset of the season's games. Rows are ordered by interval.
+    """
+    query = (
+        "SELECT p.game_id, p.period, p.start_s, p.end_s, p.side, p.player_id "
+        "FROM on_ice_interval_players p "
+        "JOIN on_ice_intervals i ON i.game_id = p.game_id AND i.period = p.period "
+        "AND i.start_s = p.start_s AND i.end_s = p.end_s "
+        "JOIN games g ON g.game_id = p.game_id "
+        "WHERE g.season = ? AND p.is_goalie = 0"
+    )
+    params = [str(season)]
+    if strength_states is not None:
+        states = sorted(set(strength_states))
+        if not states:
+            return []
+        query += f" AND i.strength_state IN ({', '.join(['?'] * len(states))})"
+        params.extend(states)
+    if game_ids is not None:
+        ids = sorted(set(game_ids))
+        if not ids:
+            return []
+        query += f" AND p.game_id IN ({', '.join(['?'] * len(ids))})"
+        params.extend(ids)
+    query += " ORDER BY p.game_id, p.period, p.start_s, p.side, p.player_id"
+
+    cursor = conn.cursor()
+    cursor.execute(query, params)
+    return cursor.fetchall()
+
+
+SEASON_SHOT_COLUMNS = (
+    "shot_event_id",
+    "game_id",
+    "period",
+    "seconds_in_period",
+    "is_home_shot",
+    "is_goal",
+)
+
+
+def load_season_shot_rows(conn, season):
+    """Return one season's shot events as tuples in `SEASON_SHOT_COLUMNS` order.
+
+    ``seconds_in_period`` is parsed from the "MM:SS" clock and
+    ``is_home_shot`` compares the shooting team with the game's home team.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        """SELECT se.shot_event_id, se.game_id, se.period,
+                  CAST(substr(se.time_in_period, 1, instr(se.time_in_period, ':') - 1) AS INTEGER) * 60
+                  + CAST(substr(se.time_in_period, instr(se.time_in_period, ':') + 1) AS INTEGER),
+                  se.shooting_team_id = g.home_team_id, se.is_goal
+           FROM shot_events se
+           JOIN games g ON g.game_id = se.game_id
+           WHERE g.season = ?
+           ORDER BY se.game_id, se.period, se.event_idx""",
+        (str(season),),
+    )
+    return cursor.fetchall()
+
+
+def load_season_player_toi(conn, season):
+    """Return ``(player_id, toi_seconds, games)`` per player for one season.
+
+    Totals come from player_game_on_ice across all strength states.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        """SELECT o.player_id, SUM(o.toi_seconds), COUNT(DISTINCT o.game_id)
+           FROM player_game_on_ice o
+           JOIN games g ON g.game_id = o.game_id
+           WHERE g.season = ?
+           GROUP BY o.player_id
+           ORDER BY o.player_id""",
+        (str(season),),
+    )
+    return cursor.fetchall()
+
+
 def create_player_team_history_table(conn):
     """Create transaction ledger table for team history."""
     cursor = conn.cursor()
@@ -1959,7 +3091,7 @@ def create_player_team_history_table(conn):
         )
         """
     )
-    conn.commit()
+    _commit(conn)
 
 
 def create_player_absences_table(conn):
@@ -1978,7 +3110,7 @@ def create_player_absences_table(conn):
         )
         """
     )
-    conn.commit()
+    _commit(conn)
 
 
 def create_shift_quality_features_table(conn):
@@ -2000,7 +3132,45 @@ def create_shift_quality_features_table(conn):
         )
         """
     )
-    conn.commit()
+    _commit(conn)
+
+
+SHIFT_QUALITY_FEATURE_COLUMNS = (
+    "game_id",
+    "period",
+    "start_seconds",
+    "end_seconds",
+    "focal_player_id",
+    "qot_off",
+    "qot_def",
+    "qoc_off",
+    "qoc_def",
+)
+
+
+def replace_shift_quality_features(conn, game_ids, rows):
+    """Replace the shift_quality_features rows of ``game_ids``; returns rows inserted.
+
+    ``rows`` are tuples in `SHIFT_QUALITY_FEATURE_COLUMNS` order. Each game
+    gets its shift_quality stage recorded.
+    """
+    ids = sorted(set(game_ids))
+    cursor = conn.cursor()
+    if ids:
+        cursor.execute(
+            f"DELETE FROM shift_quality_features WHERE game_id IN ({', '.join(['?'] * len(ids))})",
+            ids,
+        )
+    rows = list(rows)
+    cursor.executemany(
+        f"INSERT INTO shift_quality_features ({', '.join(SHIFT_QUALITY_FEATURE_COLUMNS)}) "
+        f"VALUES ({', '.join(['?'] * len(SHIFT_QUALITY_FEATURE_COLUMNS))})",
+        rows,
+    )
+    for game_id in ids:
+        _record_game_stages(cursor, game_id, (GAME_STAGE_SHIFT_QUALITY,))
+    _commit(conn)
+    return len(rows)
 
 
 def create_rapm_player_ratings_table(conn):
@@ -2020,7 +3190,54 @@ def create_rapm_player_ratings_table(conn):
         )
         """
     )
-    conn.commit()
+    _commit(conn)
+
+
+_RAPM_RATING_COLUMNS = (
+    "season",
+    "player_id",
+    "rapm_off",
+    "rapm_def",
+    "rapm_off_se",
+    "rapm_def_se",
+    "model_version",
+)
+
+
+def replace_rapm_player_ratings(conn, season, model_version, ratings):
+    """Replace one season's ratings for a model version; returns rows inserted.
+
+    ``ratings`` are dicts or objects with `_RAPM_RATING_COLUMNS` attributes
+    (e.g. `rapm.RapmRating`).
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        "DELETE FROM rapm_player_ratings WHERE season = ? AND model_version = ?",
+        (str(season), model_version),
+    )
+    rows = [
+        tuple(_record_value(rating, column) for column in _RAPM_RATING_COLUMNS)
+        for rating in ratings
+    ]
+    if rows:
+        cursor.executemany(
+            f"INSERT INTO rapm_player_ratings ({', '.join(_RAPM_RATING_COLUMNS)}) "
+            f"VALUES ({', '.join(['?'] * len(_RAPM_RATING_COLUMNS))})",
+            rows,
+        )
+    _commit(conn)
+    return len(rows)
+
+
+def load_rapm_player_ratings(conn, season, model_version):
+    """Return one season's ratings as tuples in `_RAPM_RATING_COLUMNS` order."""
+    cursor = conn.cursor()
+    cursor.execute(
+        f"SELECT {', '.join(_RAPM_RATING_COLUMNS)} FROM rapm_player_ratings "
+        "WHERE season = ? AND model_version = ? ORDER BY player_id",
+        (str(season), model_version),
+    )
+    return cursor.fetchall()
 
 
 def _migrate_games_add_venue_columns(conn):
@@ -2040,28 +3257,75 @@ def _migrate_games_add_venue_columns(conn):
         cursor.execute("ALTER TABLE games ADD COLUMN venue_city TEXT")
     if "venue_utc_offset" not in existing_cols:
         cursor.execute("ALTER TABLE games ADD COLUMN venue_utc_offset TEXT")
-    conn.commit()
-
-
-def compute_venue_season_stats(conn, venue_name, season):
-    """Compute shot statistics for a venue in a given season.
+    _commit(conn)
+
+
+# Per-venue sufficient statistics of a season's shots, all restricted to
+# shots with an x coordinate. `shots`, the coordinate sums and the
+# `distance_*` sums further require a y coordinate (the diagnostics sample);
+# `located_*` cover every shot with an x coordinate (the league's per-venue
+# z-score sample).
+_VENUE_SHOT_SUM_COLUMNS = (
+    "shots",
+    "x_sum",
+    "x_sq_sum",
+    "y_sum",
+    "y_sq_sum",
+    "distance_count",
+    "distance_sum",
+    "located_shots",
+    "located_distance_count",
+    "located_distance_sum",
+)
 
-    Returns dict with total_shots, avg_distance, x/y coord mean/stddev.
-    Standard deviation is computed in Python since SQLite lacks STDEV().
+
+_VENUE_SHOT_SUM_AGGREGATES = """
+    COUNT(se.y_coord),
+    TOTAL(CASE WHEN se.y_coord IS NOT NULL THEN se.x_coord END),
+    TOTAL(CASE WHEN se.y_coord IS NOT NULL THEN se.x_coord * se.x_coord END),
+    TOTAL(se.y_coord),
+    TOTAL(se.y_coord * se.y_coord),
+    COUNT(CASE WHEN se.y_coord IS NOT NULL THEN se.distance_to_goal END),
+    TOTAL(CASE WHEN se.y_coord IS NOT NULL THEN se.distance_to_goal END),
+    COUNT(*),
+    COUNT(se.distance_to_goal),
+    TOTAL(se.distance_to_goal)"""
+_VENUE_SHOT_SUMS_BATCH_GAMES = 500
+
+
+def _season_venue_shot_sums(cursor, season):
+    """Return {venue_name: sums} for a season from one grouped scan.
+
+    Shots at games without a venue are grouped under None; they count
+    toward league totals only.
     """
-    cursor = conn.cursor()
     cursor.execute(
-        """SELECT se.distance_to_goal, se.x_coord, se.y_coord
-           FROM shot_events se
-           JOIN games g ON se.game_id = g.game_id
-           WHERE g.venue_name = ? AND g.season = ?
-             AND se.x_coord IS NOT NULL
-             AND se.y_coord IS NOT NULL""",
-        (venue_name, season),
+        f"""SELECT g.venue_name, {_VENUE_SHOT_SUM_AGGREGATES}
+            FROM games g
+            JOIN shot_events se ON se.game_id = g.game_id
+            WHERE g.season = ?
+              AND se.x_coord IS NOT NULL
+            GROUP BY g.venue_name""",
+        (season,),
     )
-    rows = cursor.fetchall()
+    return {
+        row[0]: dict(zip(_VENUE_SHOT_SUM_COLUMNS, row[1:]))
+        for row in cursor.fetchall()
+    }
 
-    if not rows:
+
+def _stddev_from_sums(count, total, sq_total):
+    """Population standard deviation from count, sum and sum of squares."""
+    if count < 2:
+        return 0.0
+    mean = total / count
+    return math.sqrt(max(sq_total / count - mean * mean, 0.0))
+
+
+def _venue_stats_from_sums(sums):
+    """`compute_venue_season_stats` dict from one venue's sufficient statistics."""
+    total = sums["shots"] if sums else 0
+    if not total:
         return {
             "total_shots": 0,
             "avg_distance": None,
@@ -2070,49 +3334,21 @@ def compute_venue_season_stats(conn, venue_name, season):
             "y_coord_mean": None,
             "y_coord_stddev": None,
         }
-
-    distances = [r[0] for r in rows if r[0] is not None]
-    x_coords = [r[1] for r in rows]
-    y_coords = [r[2] for r in rows]
-
-    total = len(rows)
-    avg_dist = sum(distances) / len(distances) if distances else None
-
-    x_mean = sum(x_coords) / total
-    y_mean = sum(y_coords) / total
-
-    x_stddev = _stddev(x_coords, x_mean)
-    y_stddev = _stddev(y_coords, y_mean)
-
     return {
         "total_shots": total,
-        "avg_distance": avg_dist,
-        "x_coord_mean": x_mean,
-        "x_coord_stddev": x_stddev,
-        "y_coord_mean": y_mean,
-        "y_coord_stddev": y_stddev,
+        "avg_distance": (sums["distance_sum"] / sums["distance_count"]
+                         if sums["distance_count"] else None),
+        "x_coord_mean": sums["x_sum"] / total,
+        "x_coord_stddev": _stddev_from_sums(total, sums["x_sum"], sums["x_sq_sum"]),
+        "y_coord_mean": sums["y_sum"] / total,
+        "y_coord_stddev": _stddev_from_sums(total, sums["y_sum"], sums["y_sq_sum"]),
     }
 
 
-def compute_league_season_stats(conn, season):
-    """Compute league-wide shot statistics for a season.
-
-    Returns dict with total_shots, avg_distance, x/y coord mean/stddev,
-    plus per-venue shot count mean/stddev for z-score computation.
-    """
-    cursor = conn.cursor()
-    cursor.execute(
-        """SELECT se.distance_to_goal, se.x_coord, se.y_coord
-           FROM shot_events se
-           JOIN games g ON se.game_id = g.game_id
-           WHERE g.season = ?
-             AND se.x_coord IS NOT NULL
-             AND se.y_coord IS NOT NULL""",
-        (season,),
-    )
-    rows = cursor.fetchall()
-
-    if not rows:
+def _league_stats_from_sums(venue_sums):
+    """`compute_league_season_stats` dict from a season's per-venue sums."""
+    total = sum(sums["shots"] for sums in venue_sums.values())
+    if not total:
         return {
             "total_shots": 0,
             "avg_distance": None,
@@ -2125,27 +3361,16 @@ def compute_league_season_stats(conn, season):
             "venue_avg_distance_stddev": None,
         }
 
-    distances = [r[0] for r in rows if r[0] is not None]
-    x_coords = [r[1] for r in rows]
-    y_coords = [r[2] for r in rows]
-
-    total = len(rows)
-    avg_dist = sum(distances) / len(distances) if distances else None
+    distance_count = sum(sums["distance_count"] for sums in venue_sums.values())
+    distance_sum = sum(sums["distance_sum"] for sums in venue_sums.values())
 
     # Per-venue aggregates for z-score denominators
-    cursor.execute(
-        """SELECT g.venue_name, COUNT(*) as cnt,
-                  AVG(se.distance_to_goal) as avg_d
-           FROM shot_events se
-           JOIN games g ON se.game_id = g.game_id
-           WHERE g.season = ? AND g.venue_name IS NOT NULL
-             AND se.x_coord IS NOT NULL
-           GROUP BY g.venue_name""",
-        (season,),
-    )
-    venue_rows = cursor.fetchall()
-    venue_counts = [r[1] for r in venue_rows]
-    venue_avg_dists = [r[2] for r in venue_rows if r[2] is not None]
+    named = [sums for venue, sums in venue_sums.items() if venue is not None]
+    venue_counts = [sums["located_shots"] for sums in named]
+    venue_avg_dists = [
+        sums["located_distance_sum"] / sums["located_distance_count"]
+        for sums in named if sums["located_distance_count"]
+    ]
 
     vc_mean = sum(venue_counts) / len(venue_counts) if venue_counts else None
     vc_stddev = _stddev(venue_counts, vc_mean) if vc_mean is not None else None
@@ -2155,13 +3380,154 @@ def compute_league_season_stats(conn, season):
 
     return {
         "total_shots": total,
-        "avg_distance": avg_dist,
-        "x_coord_mean": sum(x_coords) / total,
-        "y_coord_mean": sum(y_coords) / total,
+        "avg_distance": distance_sum / distance_count if distance_count else None,
+        "x_coord_mean": sum(sums["x_sum"] for sums in venue_sums.values()) / total,
+        "y_coord_mean": sum(sums["y_sum"] for sums in venue_sums.values()) / total,
         "venue_shot_count_mean": vc_mean,
         "venue_shot_count_stddev": vc_stddev,
         "venue_avg_distance_mean": vd_mean,
         "venue_avg_distance_stddev": vd_stddev,
+    }
+
+
+def compute_venue_season_stats(conn, venue_name, season):
+    """Compute shot statistics for a venue in a given season.
+
+    Returns dict with total_shots, avg_distance, x/y coord mean/stddev.
+    Means and standard deviations come from SQL count/sum/sum-of-squares
+    aggregates.
+    """
+    return _venue_stats_from_sums(
+        _season_venue_shot_sums(conn.cursor(), season).get(venue_name)
+    )
+
+
+def compute_league_season_stats(conn, season):
+    """Compute league-wide shot statistics for a season.
+
+    Returns dict with total_shots, avg_distance, x/y coord mean/stddev,
+    plus per-venue shot count mean/stddev for z-score computation.
+    """
+    return _league_stats_from_sums(_season_venue_shot_sums(conn.cursor(), season))
+
+
+def _write_game_venue_shot_sums(cursor, game_ids):
+    """Replace the stored sums of `game_ids` (None: every game); return their seasons.
+
+    Seasons are collected before and after the rewrite, so a game that
+    moved season or lost its shots marks its old season dirty too.
+    """
+    if game_ids is None:
+        batches = [None]
+    else:
+        batches = [game_ids[offset:offset + _VENUE_SHOT_SUMS_BATCH_GAMES]
+                   for offset in range(0, len(game_ids), _VENUE_SHOT_SUMS_BATCH_GAMES)]
+    seasons = set()
+    for batch in batches:
+        if batch is None:
+            in_batch, params = "IS NOT NULL", ()
+        else:
+            in_batch, params = f"IN ({', '.join('?' * len(batch))})", tuple(batch)
+        cursor.execute(
+            f"SELECT DISTINCT season FROM game_venue_shot_sums WHERE game_id {in_batch}",
+            params,
+        )
+        seasons.update(row[0] for row in cursor.fetchall())
+        cursor.execute(f"DELETE FROM game_venue_shot_sums WHERE game_id {in_batch}", params)
+        cursor.execute(
+            f"""INSERT INTO game_venue_shot_sums
+                   (game_id, season, venue_name, {', '.join(_VENUE_SHOT_SUM_COLUMNS)})
+                SELECT g.game_id, g.season, g.venue_name, {_VENUE_SHOT_SUM_AGGREGATES}
+                FROM games g
+                JOIN shot_events se ON se.game_id = g.game_id
+                WHERE g.game_id {in_batch}
+                  AND g.season IS NOT NULL
+                  AND se.x_coord IS NOT NULL
+                GROUP BY g.game_id""",
+            params,
+        )
+        # Games without located shots still mark their season dirty.
+        cursor.execute(
+            f"SELECT DISTINCT season FROM games WHERE game_id {in_batch} AND season IS NOT NULL",
+            params,
+        )
+        seasons.update(row[0] for row in cursor.fetchall())
+    return seasons
+
+
+def populate_venue_shot_sums(conn, full_refresh=False):
+    """Refresh the stored venue shot sums; return the seasons that changed.
+
+    Only dirty games are re-aggregated: games whose metadata is current but
+    whose venue_stats stage is missing or stale. Recording a game's
+    metadata or shot events marks that stage stale, so a nightly run costs
+    O(new shots). Each changed season's venue_season_shot_sums rows are then
+    re-merged from the per-game rows. ``full_refresh`` (and any database
+    without game_pipeline_state) re-aggregates every game instead. Seasons
+    are returned sorted.
+    """
+    create_venue_shot_sums_tables(conn)
+    cursor = conn.cursor()
+    game_ids = None
+    if not full_refresh and _game_pipeline_state_exists(cursor):
+        dirty = set(get_incomplete_game_stages(
+            conn,
+            stages=(GAME_STAGE_VENUE_STATS,),
+            base_stage=GAME_STAGE_METADATA,
+        ))
+        # Stored games whose shots or metadata were deleted.
+        cursor.execute(
+            f"""SELECT s.game_id
+                FROM game_venue_shot_sums s
+                LEFT JOIN {_GAME_PIPELINE_STATE_TABLE} p
+                  ON p.game_id = s.game_id
+                 AND p.stage = ?
+                 AND p.stage_version = ?
+                WHERE p.game_id IS NULL""",
+            (GAME_STAGE_VENUE_STATS, _VENUE_SHOT_SUMS_SCHEMA_VERSION),
+        )
+        dirty.update(row[0] for row in cursor.fetchall())
+        game_ids = sorted(dirty)
+        if not game_ids:
+            return []
+
+    with unit_of_work(conn):
+        seasons = sorted(str(season) for season in
+                         _write_game_venue_shot_sums(cursor, game_ids) if season is not None)
+        if game_ids is None:
+            cursor.execute("SELECT DISTINCT season FROM venue_season_shot_sums")
+            seasons = sorted(set(seasons) | {row[0] for row in cursor.fetchall()})
+            cursor.execute("SELECT game_id FROM games")
+            game_ids = [row[0] for row in cursor.fetchall()]
+        sum_columns = ", ".join(_VENUE_SHOT_SUM_COLUMNS)
+        for season in seasons:
+            cursor.execute("DELETE FROM venue_season_shot_sums WHERE season = ?", (season,))
+            cursor.execute(
+                f"""INSERT INTO venue_season_shot_sums (season, venue_name, {sum_columns})
+                    SELECT season, venue_name,
+                           {', '.join(f'SUM({column})' for column in _VENUE_SHOT_SUM_COLUMNS)}
+                    FROM game_venue_shot_sums
+                    WHERE season = ?
+                    GROUP BY venue_name""",
+                (season,),
+            )
+        for game_id in game_ids:
+            _record_game_stages(cursor, game_id, (GAME_STAGE_VENUE_STATS,))
+    return seasons
+
+
+def load_venue_season_shot_sums(conn, season):
+    """Return a season's stored {venue_name: sums}, as `populate_venue_diagnostics` takes."""
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""SELECT venue_name, {', '.join(_VENUE_SHOT_SUM_COLUMNS)}
+            FROM venue_season_shot_sums
+            WHERE season = ?""",
+        (str(season),),
+    )
+    return {
+        row[0]: dict(zip(_VENUE_SHOT_SUM_COLUMNS, row[1:]))
+        for row in cursor.fetchall()
     }
 
 
@@ -2172,22 +3538,24 @@ _VENUE_CORRECTION_METHOD = "distance_mean_shrinkage_v1"
 _MIN_CORRECTED_DISTANCE_TO_GOAL = 0.0
 
 
-def populate_venue_diagnostics(conn, season):
-    """Compute and insert venue bias diagnostics for all venues in a season."""
-    league = compute_league_season_stats(conn, season)
+def populate_venue_diagnostics(conn, season, venue_sums=None):
+    """Compute and insert venue bias diagnostics for all venues in a season.
+
+    League and venue statistics come from one grouped scan of the season's
+    shots, or from ``venue_sums`` (`load_venue_season_shot_sums`) when
+    given. Returns the league stats so callers can reuse them.
+    """
+    cursor = conn.cursor()
+    if venue_sums is None:
+        venue_sums = _season_venue_shot_sums(cursor, season)
+    league = _league_stats_from_sums(venue_sums)
     if league["total_shots"] == 0:
-        return
-
-    cursor = conn.cursor()
-    cursor.execute(
-        """SELECT DISTINCT g.venue_name FROM games g
-           WHERE g.season = ? AND g.venue_name IS NOT NULL""",
-        (season,),
-    )
-    venues = [r[0] for r in cursor.fetchall()]
+        return league
 
-    for venue_name in venues:
-        stats = compute_venue_season_stats(conn, venue_name, season)
+    for venue_name, sums in venue_sums.items():
+        if venue_name is None:
+            continue
+        stats = _venue_stats_from_sums(sums)
         if stats["total_shots"] == 0:
             continue
 
@@ -2226,7 +3594,8 @@ def populate_venue_diagnostics(conn, season):
              sc_z, dist_z, bias_flag),
         )
 
-    conn.commit()
+    _commit(conn)
+    return league
 
 
 def create_venue_bias_corrections_table(conn):
@@ -2248,7 +3617,7 @@ def create_venue_bias_corrections_table(conn):
         )
         """
     )
-    conn.commit()
+    _commit(conn)
 
 
 def _compute_shrinkage_weight(sample_shots, prior_shots):
@@ -2269,15 +3638,20 @@ def populate_venue_bias_corrections(
         conn,
         season,
         min_shots_required=_VENUE_CORRECTION_MIN_SHOTS,
-        shrinkage_prior_shots=_VENUE_CORRECTION_PRIOR_SHOTS):
+        shrinkage_prior_shots=_VENUE_CORRECTION_PRIOR_SHOTS,
+        league_stats=None):
     """Populate venue-season correction parameters for one season.
 
     Correction is an additive distance adjustment toward league average.
     The raw venue delta is shrunk toward 0 using a sample-size-dependent
-    weight to avoid over-correcting low-sample venues.
+    weight to avoid over-correcting low-sample venues. ``league_stats`` is
+    the season's `compute_league_season_stats` dict when the caller already
+    has it (e.g. from `populate_venue_diagnostics`).
     """
     create_venue_bias_corrections_table(conn)
-    league = compute_league_season_stats(conn, season)
+    league = league_stats
+    if league is None:
+        league = compute_league_season_stats(conn, season)
     league_avg_distance = league["avg_distance"]
     if league["total_shots"] == 0 or league_avg_distance is None:
         cursor = conn.cursor()
@@ -2285,7 +3659,7 @@ def populate_venue_bias_corrections(
             "DELETE FROM venue_bias_corrections WHERE season = ? AND correction_method = ?",
             (season, _VENUE_CORRECTION_METHOD),
         )
-        conn.commit()
+        _commit(conn)
         return 0
 
     cursor = conn.cursor()
@@ -2308,7 +3682,7 @@ def populate_venue_bias_corrections(
                 "DELETE FROM venue_bias_corrections WHERE season = ? AND correction_method = ?",
                 (season, _VENUE_CORRECTION_METHOD),
             )
-            conn.commit()
+            _commit(conn)
             return 0
 
     inserts = []
@@ -2335,7 +3709,7 @@ def populate_venue_bias_corrections(
             "DELETE FROM venue_bias_corrections WHERE season = ? AND correction_method = ?",
             (season, _VENUE_CORRECTION_METHOD),
         )
-        conn.commit()
+        _commit(conn)
         return 0
 
     cursor.execute(
@@ -2350,7 +3724,7 @@ def populate_venue_bias_corrections(
            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
         inserts,
     )
-    conn.commit()
+    _commit(conn)
     return len(inserts)
 
 
@@ -2392,9 +3766,295 @@ def _stddev(values, mean):
     """Compute population standard deviation given values and their mean."""
     if not values or len(values) < 2:
         return 0.0
-    import math
     variance = sum((v - mean) ** 2 for v in values) / len(values)
     return math.sqrt(variance)
+
+
+# ── Game pipeline state ─────────────────────────────────────────────
+
+GAME_STAGE_RAW = "raw"
+GAME_STAGE_METADATA = "metadata"
+GAME_STAGE_SHOT_EVENTS = "shots"
+GAME_STAGE_CONTEXT = "context"
+GAME_STAGE_SHIFTS = "shifts"
+GAME_STAGE_ON_ICE_SLOTS = "on_ice_slots"
+GAME_STAGE_PLAYER_ON_ICE = "player_on_ice"
+GAME_STAGE_SHIFT_QUALITY = "shift_quality"
+GAME_STAGE_PLAYER_STATS = "player_stats"
+GAME_STAGE_PLAYER_FEATURES = "player_features"
+GAME_STAGE_VENUE_STATS = "venue_stats"
+
+_GAME_STAGE_VERSIONS = {
+    GAME_STAGE_RAW: _RAW_EVENTS_SCHEMA_VERSION,
+    GAME_STAGE_METADATA: _GAME_METADATA_SCHEMA_VERSION,
+    GAME_STAGE_SHOT_EVENTS: _XG_EVENT_SCHEMA_VERSION,
+    GAME_STAGE_CONTEXT: _GAME_CONTEXT_SCHEMA_VERSION,
+    GAME_STAGE_SHIFTS: _SHIFT_SCHEMA_VERSION,
+    GAME_STAGE_ON_ICE_SLOTS: _ON_ICE_SCHEMA_VERSION,
+    GAME_STAGE_PLAYER_ON_ICE: _PLAYER_ON_ICE_SCHEMA_VERSION,
+    GAME_STAGE_SHIFT_QUALITY: _SHIFT_QUALITY_SCHEMA_VERSION,
+    GAME_STAGE_PLAYER_STATS: _PLAYER_STATS_SCHEMA_VERSION,
+    GAME_STAGE_PLAYER_FEATURES: _FEATURE_SET_VERSION,
+    GAME_STAGE_VENUE_STATS: _VENUE_SHOT_SUMS_SCHEMA_VERSION,
+}
+# Recording a stage invalidates the stages computed from its output.
+_GAME_STAGE_DEPENDENTS = {
+    GAME_STAGE_METADATA: (GAME_STAGE_VENUE_STATS,),
+    GAME_STAGE_SHOT_EVENTS: (GAME_STAGE_PLAYER_STATS, GAME_STAGE_VENUE_STATS),
+    GAME_STAGE_ON_ICE_SLOTS: (GAME_STAGE_PLAYER_ON_ICE, GAME_STAGE_SHIFT_QUALITY),
+    GAME_STAGE_PLAYER_ON_ICE: (GAME_STAGE_PLAYER_STATS,),
+    GAME_STAGE_PLAYER_STATS: (GAME_STAGE_PLAYER_FEATURES,),
+}
+_GAME_PIPELINE_STATE_TABLE = "game_pipeline_state"
+
+
+def _game_stage_closure(stages):
+    """Return `stages` plus every stage transitively computed from them."""
+    closure = set()
+    pending = list(stages)
+    while pending:
+        stage = pending.pop()
+        if stage not in closure:
+            closure.add(stage)
+            pending.extend(_GAME_STAGE_DEPENDENTS.get(stage, ()))
+    return closure
+
+
+# Set-based "which games already have this stage at its current version"
+# queries, used once to seed game_pipeline_state from existing fact tables.
+_GAME_STAGE_SEED_QUERIES = {
+    GAME_STAGE_RAW: ("SELECT DISTINCT game_id FROM raw_events", ()),
+    GAME_STAGE_METADATA: ("SELECT game_id FROM games", ()),
+    GAME_STAGE_SHOT_EVENTS: (
+        "SELECT DISTINCT game_id FROM shot_events WHERE event_schema_version = ?",
+        (_XG_EVENT_SCHEMA_VERSION,),
+    ),
+    GAME_STAGE_CONTEXT: (
+        "SELECT game_id FROM game_context WHERE context_schema_version = ?",
+        (_GAME_CONTEXT_SCHEMA_VERSION,),
+    ),
+    GAME_STAGE_SHIFTS: (
+        """SELECT game_id
+           FROM shifts
+           WHERE shift_schema_version = ?
+           GROUP BY game_id
+           HAVING SUM(
+               position IS NULL
+               OR position = ''
+               OR team_side IS NULL
+               OR team_side NOT IN (?, ?)
+           ) = 0""",
+        (_SHIFT_SCHEMA_VERSION, *_VALID_SHIFT_TEAM_SIDES),
+    ),
+    GAME_STAGE_ON_ICE_SLOTS: (
+        """SELECT DISTINCT game_id
+           FROM on_ice_intervals
+           WHERE on_ice_schema_version = ?""",
+        (_ON_ICE_SCHEMA_VERSION,),
+    ),
+    GAME_STAGE_PLAYER_ON_ICE: (
+        """SELECT DISTINCT game_id
+           FROM player_game_on_ice
+           WHERE stats_schema_version = ?""",
+        (_PLAYER_ON_ICE_SCHEMA_VERSION,),
+    ),
+    GAME_STAGE_SHIFT_QUALITY: (
+        "SELECT DISTINCT game_id FROM shift_quality_features",
+        (),
+    ),
+    GAME_STAGE_PLAYER_STATS: (
+        "SELECT DISTINCT game_id FROM player_game_stats",
+        (),
+    ),
+    GAME_STAGE_PLAYER_FEATURES: (
+        """SELECT DISTINCT game_id
+           FROM player_game_features
+           WHERE feature_set_version = ?""",
+        (_FEATURE_SET_VERSION,),
+    ),
+    GAME_STAGE_VENUE_STATS: ("SELECT game_id FROM game_venue_shot_sums", ()),
+}
+
+
+def _game_pipeline_state_exists(cursor):
+    cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = ? AND name = ? LIMIT 1",
+        (_SQLITE_TABLE_TYPE, _GAME_PIPELINE_STATE_TABLE),
+    )
+    return cursor.fetchone() is not None
+
+
+def create_game_pipeline_state_table(conn):
+    """Create game_pipeline_state, seeding it from the fact tables on first creation.
+
+    One row per (game_id, stage) records the stage version and time that
+    produced the game's derived rows. A stage whose stored version differs
+    from `_GAME_STAGE_VERSIONS` is stale, so a version bump only recomputes
+    that stage.
+    """
+    cursor = conn.cursor()
+    if _game_pipeline_state_exists(cursor):
+        return
+
+    cursor.execute(
+        f"""
+        CREATE TABLE {_GAME_PIPELINE_STATE_TABLE} (
+            game_id INTEGER NOT NULL,
+            stage TEXT NOT NULL,
+            stage_version TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (game_id, stage)
+        ) WITHOUT ROWID
+        """
+    )
+    updated_at = datetime.now().isoformat()
+    for stage, (query, params) in _GAME_STAGE_SEED_QUERIES.items():
+        try:
+            cursor.execute(query, params)
+        except sqlite3.OperationalError:
+            continue
+        cursor.executemany(
+            f"""INSERT INTO {_GAME_PIPELINE_STATE_TABLE}
+                   (game_id, stage, stage_version, updated_at)
+               VALUES (?, ?, ?, ?)""",
+            [(row[0], stage, _GAME_STAGE_VERSIONS[stage], updated_at)
+             for row in cursor.fetchall()],
+        )
+    # on-ice slots are only meaningful on top of resolved shifts.
+    cursor.execute(
+        f"""DELETE FROM {_GAME_PIPELINE_STATE_TABLE}
+            WHERE stage = ?
+              AND game_id NOT IN (
+                  SELECT game_id FROM {_GAME_PIPELINE_STATE_TABLE} WHERE stage = ?
+              )""",
+        (GAME_STAGE_ON_ICE_SLOTS, GAME_STAGE_SHIFTS),
+    )
+    _commit(conn)
+
+
+def _record_game_stages(cursor, game_id, stages):
+    _record_stages_for_games(cursor, [game_id], stages)
+
+
+def _record_stages_for_games(cursor, game_ids, stages):
+    if not _game_pipeline_state_exists(cursor):
+        return
+    updated_at = datetime.now().isoformat()
+    cursor.executemany(
+        f"""INSERT INTO {_GAME_PIPELINE_STATE_TABLE}
+               (game_id, stage, stage_version, updated_at)
+           VALUES (?, ?, ?, ?)
+           ON CONFLICT(game_id, stage) DO UPDATE SET
+               stage_version = excluded.stage_version,
+               updated_at = excluded.updated_at""",
+        [(game_id, stage, _GAME_STAGE_VERSIONS[stage], updated_at)
+         for game_id in game_ids for stage in stages],
+    )
+    dependents = sorted(_game_stage_closure(stages) - set(stages))
+    cursor.executemany(
+        f"DELETE FROM {_GAME_PIPELINE_STATE_TABLE} WHERE game_id = ? AND stage = ?",
+        [(game_id, stage) for game_id in game_ids for stage in dependents],
+    )
+
+
+def _clear_game_stages(cursor, game_id, stages):
+    if not _game_pipeline_state_exists(cursor):
+        return
+    cursor.executemany(
+        f"DELETE FROM {_GAME_PIPELINE_STATE_TABLE} WHERE game_id = ? AND stage = ?",
+        [(game_id, stage) for stage in stages],
+    )
+
+
+def record_game_stages(conn, game_id, stages):
+    """Mark `stages` of a game as produced at their current versions.
+
+    A no-op until game_pipeline_state exists; creating the table later seeds
+    it from the fact tables.
+    """
+    _record_game_stages(conn.cursor(), game_id, stages)
+    _commit(conn)
+
+
+def record_stages_for_games(conn, game_ids, stages):
+    """Mark `stages` as produced for every game in ``game_ids`` at once."""
+    _record_stages_for_games(conn.cursor(), list(game_ids), stages)
+    _commit(conn)
+
+
+def get_current_game_stages(conn, game_id):
+    """Return the set of a game's stages recorded at their current versions."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"SELECT stage, stage_version FROM {_GAME_PIPELINE_STATE_TABLE} "
+            "WHERE game_id = ?",
+            (game_id,),
+        )
+    except sqlite3.OperationalError:
+        return frozenset()
+    return frozenset(
+        stage for stage, version in cursor.fetchall()
+        if _GAME_STAGE_VERSIONS.get(stage) == version
+    )
+
+
+def get_game_ids_with_current_stages(conn, stages):
+    """Return the set of game ids whose `stages` are all at their current versions."""
+    where = " OR ".join("(stage = ? AND stage_version = ?)" for _ in stages)
+    params = [value for stage in stages
+              for value in (stage, _GAME_STAGE_VERSIONS[stage])]
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"""SELECT game_id FROM {_GAME_PIPELINE_STATE_TABLE}
+                WHERE {where}
+                GROUP BY game_id
+                HAVING COUNT(*) = ?""",
+            (*params, len(stages)),
+        )
+    except sqlite3.OperationalError:
+        return set()
+    return {row[0] for row in cursor.fetchall()}
+
+
+def get_incomplete_game_stages(conn, stages=(GAME_STAGE_METADATA,
+                                             GAME_STAGE_SHOT_EVENTS),
+                               base_stage=GAME_STAGE_RAW):
+    """Return {game_id: stale stages} for games whose `base_stage` is current.
+
+    One anti-join over game_pipeline_state, so planning a backfill never
+    probes fact tables per game. Stale means missing or recorded at an older
+    version; each value lists the stale subset of `stages` in the order
+    given. Game ids are ascending.
+    """
+    wanted = " UNION ALL ".join(
+        "SELECT ? AS ord, ? AS stage, ? AS stage_version" for _ in stages
+    )
+    params = [value for ord_, stage in enumerate(stages)
+              for value in (ord_, stage, _GAME_STAGE_VERSIONS[stage])]
+    params.extend([base_stage, _GAME_STAGE_VERSIONS[base_stage]])
+    query = f"""SELECT base.game_id, wanted.stage
+               FROM {_GAME_PIPELINE_STATE_TABLE} base
+               CROSS JOIN ({wanted}) wanted
+               LEFT JOIN {_GAME_PIPELINE_STATE_TABLE} done
+                 ON done.game_id = base.game_id
+                AND done.stage = wanted.stage
+                AND done.stage_version = wanted.stage_version
+               WHERE base.stage = ?
+                 AND base.stage_version = ?
+                 AND done.game_id IS NULL
+               ORDER BY base.game_id, wanted.ord"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query, params)
+    except sqlite3.OperationalError:
+        return {}
+
+    incomplete = {}
+    for game_id, stage in cursor.fetchall():
+        incomplete.setdefault(game_id, []).append(stage)
+    return {game_id: tuple(missing) for game_id, missing in incomplete.items()}
 
 
 def ensure_xg_schema(conn):
@@ -2406,26 +4066,62 @@ def ensure_xg_schema(conn):
     create_game_context_table(conn)
     create_venue_bias_diagnostics_table(conn)
     create_venue_bias_corrections_table(conn)
+    create_venue_shot_sums_tables(conn)
     create_shifts_table(conn)
     _migrate_shifts_add_context_columns(conn)
     create_on_ice_intervals_table(conn)
+    create_player_game_on_ice_table(conn)
     create_player_team_history_table(conn)
     create_player_absences_table(conn)
     create_shift_quality_features_table(conn)
     create_rapm_player_ratings_table(conn)
+    create_game_pipeline_state_table(conn)
 
 
-def create_connection(database_file):
+def _apply_connection_pragmas(conn, read_only, cache_size_kib, mmap_size_bytes):
+    cursor = conn.cursor()
+    if read_only:
+        cursor.execute("PRAGMA query_only = ON")
+    else:
+        cursor.execute(f"PRAGMA journal_mode = {_SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous = {_SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA cache_size = {-int(cache_size_kib)}")
+    cursor.execute(f"PRAGMA mmap_size = {int(mmap_size_bytes)}")
+    cursor.execute(f"PRAGMA temp_store = {_SQLITE_TEMP_STORE}")
+    cursor.close()
+
+
+def create_connection(database_file, read_only=False,
+                      cache_size_kib=SQLITE_CACHE_SIZE_KIB,
+                      mmap_size_bytes=SQLITE_MMAP_SIZE_BYTES):
     """
     Create a database connection to the SQLite database specified by the database_file
+
+    Read-write connections switch the database to WAL journaling with
+    synchronous=NORMAL, so readers never block the writer and each commit
+    is an append to the WAL rather than a full fsync. Read-only connections
+    open the file with ``mode=ro`` and ``query_only`` so scripts and
+    notebooks can read while the scraper writes. Both modes get an in-memory
+    temp store, a ``cache_size_kib`` page cache, and ``mmap_size_bytes`` of
+    memory-mapped I/O.
     :param database_file: database file
+    :param read_only: open the existing file read-only
     :return: Connection object or None
     """
     conn = None
     try:
-        conn = sqlite3.connect(database_file)
-        print(f"SQLite connection established to {database_file}")
+        if read_only:
+            uri = f"file:{quote(os.path.abspath(database_file))}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, timeout=_SQLITE_BUSY_TIMEOUT_SECONDS)
+        else:
+            conn = sqlite3.connect(database_file, timeout=_SQLITE_BUSY_TIMEOUT_SECONDS)
+        _apply_connection_pragmas(conn, read_only, cache_size_kib, mmap_size_bytes)
+        mode = "read-only" if read_only else "read-write"
+        print(f"SQLite {mode} connection established to {database_file}")
     except Error as e:
         print(e)
+        if conn is not None:
+            conn.close()
+            conn = None
 
     return conn
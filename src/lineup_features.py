@@ -1,6 +1,247 @@
-"""QoT / QoC feature scaffolding."""
+"""QoT / QoC features for every shift, from on-ice intervals and player ratings.
 
+For a focal skater's shift, quality of teammates (QoT) is the mean rating of
+the other skaters on their side and quality of competition (QoC) the mean
+rating of the opposing skaters, averaged over the on-ice intervals inside
+the shift weighted by interval length. Ratings are a season's RAPM (offense
+and defense) or TOI per game, looked up by array indexing, so each batch
+of games is one vectorized pass with no per-row queries.
+"""
 
-def compute_shift_quality_features(game_id: int) -> list[dict]:
-    _ = game_id
-    return []
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from database import (
+    GAME_STAGE_ON_ICE_SLOTS,
+    GAME_STAGE_SHIFT_QUALITY,
+    get_game_ids_with_current_stages,
+    get_incomplete_game_stages,
+    get_season_game_ids,
+    load_rapm_player_ratings,
+    load_season_player_toi,
+    load_season_shift_rows,
+    load_season_stint_player_rows,
+    replace_shift_quality_features,
+    unit_of_work,
+)
+from on_ice_batch import _segment_memberships
+
+RATING_SOURCES = ("rapm", "toi")
+_SHIFT_QUALITY_BATCH_GAMES = 200
+_SIDE_CODES = {"home": 0, "away": 1}
+_PERIOD_KEY_SPAN = 100
+_TIME_KEY_SPAN = 1 << 13  # seconds; longer than any period
+# Row layouts of `load_season_shift_rows` and `load_season_stint_player_rows`;
+# one structured conversion is much cheaper than per-column unpacking.
+_SHIFT_ROW_DTYPE = np.dtype([
+    ("game_id", "i8"), ("period", "i8"), ("start", "i8"), ("end", "i8"),
+    ("player_id", "i8"), ("side", "U8"), ("position", "U8"),
+])
+_STINT_PLAYER_ROW_DTYPE = np.dtype([
+    ("game_id", "i8"), ("period", "i8"), ("start", "i8"), ("end", "i8"),
+    ("side", "U8"), ("player_id", "i8"),
+])
+
+
+@dataclass(frozen=True)
+class PlayerRatingVector:
+    """Per-player offense/defense ratings; ``player_ids`` is sorted ascending."""
+
+    player_ids: np.ndarray
+    offense: np.ndarray
+    defense: np.ndarray
+
+    def lookup(self, player_ids) -> tuple[np.ndarray, np.ndarray]:
+        """Return ``(offense, defense)`` for each id; unrated players get 0."""
+        player_ids = np.asarray(player_ids, dtype=np.int64)
+        if not len(self.player_ids):
+            zeros = np.zeros(len(player_ids))
+            return zeros, zeros.copy()
+        positions = np.minimum(np.searchsorted(self.player_ids, player_ids),
+                               len(self.player_ids) - 1)
+        found = self.player_ids[positions] == player_ids
+        return (np.where(found, self.offense[positions], 0.0),
+                np.where(found, self.defense[positions], 0.0))
+
+
+def _rating_vector(rows) -> PlayerRatingVector:
+    """Build a vector from ``(player_id, offense, defense)`` rows."""
+    rows = sorted(rows)
+    player_ids, offense, defense = (list(column) for column in zip(*rows)) if rows else ([], [], [])
+    return PlayerRatingVector(
+        player_ids=np.asarray(player_ids, dtype=np.int64),
+        offense=np.asarray([value or 0.0 for value in offense], dtype=float),
+        defense=np.asarray([value or 0.0 for value in defense], dtype=float),
+    )
+
+
+def rapm_rating_vector(conn, season, model_version: str | None = None) -> PlayerRatingVector:
+    """Stored RAPM ratings of one season (defense is goals-against impact)."""
+    if model_version is None:
+        # Imported lazily: the RAPM solver needs scipy, TOI ratings do not.
+        from rapm import RAPM_MODEL_VERSION as model_version
+    return _rating_vector(
+        (player_id, rapm_off, rapm_def)
+        for _, player_id, rapm_off, rapm_def, *_ in load_rapm_player_ratings(conn, season, model_version)
+    )
+
+
+def toi_rating_vector(conn, season) -> PlayerRatingVector:
+    """Average TOI per game in minutes, used for both offense and defense."""
+    rows = [
+        (player_id, toi_seconds / games / 60.0, toi_seconds / games / 60.0)
+        for player_id, toi_seconds, games in load_season_player_toi(conn, season)
+        if games
+    ]
+    return _rating_vector(rows)
+
+
+def _interval_keys(game_ids, periods, seconds):
+    return (game_ids * _PERIOD_KEY_SPAN + periods) * _TIME_KEY_SPAN + seconds
+
+
+def _side_codes(sides: np.ndarray) -> np.ndarray:
+    """Vectorized `_SIDE_CODES` lookup; unsided rows get -1."""
+    codes = np.full(len(sides), -1, dtype=np.int64)
+    for side, code in _SIDE_CODES.items():
+        codes[sides == side] = code
+    return codes
+
+
+def _nullable(column: np.ndarray) -> list:
+    values = column.tolist()
+    for index in np.flatnonzero(np.isnan(column)).tolist():
+        values[index] = None
+    return values
+
+
+def compute_shift_quality_features(shift_rows, stint_player_rows,
+                                   ratings: PlayerRatingVector) -> list[tuple]:
+    """Return QoT/QoC rows for every sided skater shift.
+
+    ``shift_rows`` are `load_season_shift_rows` tuples and
+    ``stint_player_rows`` `load_season_stint_player_rows` tuples for the same
+    games. Output tuples follow `SHIFT_QUALITY_FEATURE_COLUMNS`; a value is
+    None when the shift never had a teammate (or opponent) on the ice.
+    """
+    shift_rows = list(shift_rows)
+    stint_player_rows = list(stint_player_rows)
+    if not shift_rows or not stint_player_rows:
+        return []
+
+    shifts = np.array(shift_rows, dtype=_SHIFT_ROW_DTYPE)
+    focal_sides = _side_codes(shifts["side"])
+    is_goalie = np.char.upper(shifts["position"]) == "G"
+    shifts = shifts[(focal_sides >= 0) & (shifts["end"] > shifts["start"]) & ~is_goalie]
+    if not len(shifts):
+        return []
+    focal_sides = _side_codes(shifts["side"])
+    shift_games, shift_periods = shifts["game_id"], shifts["period"]
+    shift_starts, shift_ends, focal_ids = shifts["start"], shifts["end"], shifts["player_id"]
+
+    members = np.array(stint_player_rows, dtype=_STINT_PLAYER_ROW_DTYPE)
+    members = members[_side_codes(members["side"]) >= 0]
+    member_sides = _side_codes(members["side"])
+    member_games, member_periods = members["game_id"], members["period"]
+    member_starts, member_ends, member_ids = members["start"], members["end"], members["player_id"]
+
+    interval_keys, first_member, member_intervals = np.unique(
+        _interval_keys(member_games, member_periods, member_starts),
+        return_index=True, return_inverse=True,
+    )
+    member_intervals = member_intervals.reshape(-1)
+    interval_lengths = (member_ends - member_starts)[first_member].astype(float)
+    interval_count = len(interval_keys)
+
+    # Per (interval, side) skater count and rating sums, indexed 2 * interval + side.
+    member_offense, member_defense = ratings.lookup(member_ids)
+    cells = 2 * member_intervals + member_sides
+    side_counts = np.bincount(cells, minlength=2 * interval_count)
+    side_offense = np.bincount(cells, weights=member_offense, minlength=2 * interval_count)
+    side_defense = np.bincount(cells, weights=member_defense, minlength=2 * interval_count)
+
+    # Intervals are split at every shift boundary, so a shift covers exactly
+    # the intervals starting inside it.
+    pair_intervals, pair_shifts = _segment_memberships(
+        _interval_keys(shift_games, shift_periods, shift_starts),
+        _interval_keys(shift_games, shift_periods, shift_ends),
+        interval_keys,
+        np.ones(interval_count, dtype=bool),
+    )
+    focal_offense, focal_defense = ratings.lookup(focal_ids)
+    own_cells = 2 * pair_intervals + focal_sides[pair_shifts]
+    other_cells = 2 * pair_intervals + 1 - focal_sides[pair_shifts]
+    weights = interval_lengths[pair_intervals]
+
+    mate_counts = side_counts[own_cells] - 1
+    opponent_counts = side_counts[other_cells]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        averages = [
+            (side_offense[own_cells] - focal_offense[pair_shifts]) / mate_counts,
+            (side_defense[own_cells] - focal_defense[pair_shifts]) / mate_counts,
+            side_offense[other_cells] / opponent_counts,
+            side_defense[other_cells] / opponent_counts,
+        ]
+    present = [mate_counts > 0, mate_counts > 0, opponent_counts > 0, opponent_counts > 0]
+
+    columns = []
+    shift_count = len(shifts)
+    for average, mask in zip(averages, present):
+        pair_weights = np.where(mask, weights, 0.0)
+        total = np.bincount(pair_shifts, weights=pair_weights, minlength=shift_count)
+        weighted = np.bincount(pair_shifts, weights=np.where(mask, average, 0.0) * pair_weights,
+                               minlength=shift_count)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            column = weighted / total
+        columns.append(_nullable(column))
+
+    return list(zip(shift_games.tolist(), shift_periods.tolist(), shift_starts.tolist(),
+                    shift_ends.tolist(), focal_ids.tolist(), *columns))
+
+
+def populate_shift_quality_features(conn, season, rating_source: str = "rapm",
+                                    rating_season=None, full_refresh: bool = False) -> dict:
+    """Write QoT/QoC features for one season's shifts.
+
+    By default only games whose on-ice slots are current but whose
+    shift_quality stage is missing or stale are recomputed, so a refresh
+    only touches new or rebuilt games; ``full_refresh`` recomputes every
+    game with current on-ice slots (e.g. after refitting the ratings).
+    ``rating_season`` defaults to ``season``. Games are loaded and computed
+    `_SHIFT_QUALITY_BATCH_GAMES` at a time inside one transaction. Returns
+    game and row counts.
+    """
+    if rating_source not in RATING_SOURCES:
+        raise ValueError(f"Unknown rating source {rating_source!r}; expected one of {RATING_SOURCES}")
+    if full_refresh:
+        candidates = get_game_ids_with_current_stages(conn, (GAME_STAGE_ON_ICE_SLOTS,))
+    else:
+        candidates = get_incomplete_game_stages(
+            conn,
+            stages=(GAME_STAGE_SHIFT_QUALITY,),
+            base_stage=GAME_STAGE_ON_ICE_SLOTS,
+        )
+    game_ids = sorted(set(candidates) & get_season_game_ids(conn, season))
+    if not game_ids:
+        return {"games_refreshed": 0, "feature_rows_inserted": 0}
+
+    rating_season = season if rating_season is None else rating_season
+    if rating_source == "rapm":
+        ratings = rapm_rating_vector(conn, rating_season)
+    else:
+        ratings = toi_rating_vector(conn, rating_season)
+
+    inserted = 0
+    with unit_of_work(conn):
+        for offset in range(0, len(game_ids), _SHIFT_QUALITY_BATCH_GAMES):
+            batch = game_ids[offset:offset + _SHIFT_QUALITY_BATCH_GAMES]
+            rows = compute_shift_quality_features(
+                load_season_shift_rows(conn, season, game_ids=batch),
+                load_season_stint_player_rows(conn, season, game_ids=batch),
+                ratings,
+            )
+            inserted += replace_shift_quality_features(conn, batch, rows)
+    return {"games_refreshed": len(game_ids), "feature_rows_inserted": inserted}
@@ -1,25 +1,47 @@
+import argparse
 import datetime
+import functools
+import multiprocessing
 import os
-
-from nhl_api import get_weekly_schedule, get_full_play_by_play, get_player_metadata
-from database import (create_table, insert_data, create_connection,
-                      create_collection_log_table, is_game_collected,
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from nhl_api import (ConcurrentFetcher, configure_game_api_rate_limit,
+                     configure_stats_api_rate_limit, get_weekly_schedule_games,
+                     get_full_play_by_play, get_player_metadata,
+                     is_final_game_payload, set_raw_payload_store)
+from raw_payload_store import ENDPOINT_PLAY_BY_PLAY, RAW_PAYLOAD_DIR, RawPayloadStore
+from database import (create_raw_events_table, insert_data, create_connection,
+                      create_collection_log_table,
                       mark_date_collected, get_last_collected_date,
+                      create_schedule_tables, replace_schedule_week,
+                      get_schedule_refresh_start, get_schedule_days,
                       fix_incomplete_collection_log,
                       deduplicate_existing_tables,
                       ensure_xg_schema, game_has_shot_events,
-                      game_has_current_shot_events,
                       delete_game_shot_events,
-                      insert_shot_events, game_has_metadata,
+                      insert_shot_events,
                       upsert_game_metadata, upsert_team,
                       ensure_player_database_schema,
                       backfill_player_metadata,
+                      populate_player_game_on_ice,
                       populate_player_game_stats,
                       populate_player_game_features,
-                      populate_game_context,
+                      populate_game_context, populate_game_contexts,
+                      populate_venue_shot_sums,
+                      load_venue_season_shot_sums,
                       populate_venue_diagnostics,
                       populate_venue_bias_corrections,
-                      get_collected_game_ids,
+                      get_incomplete_game_stages,
+                      get_current_game_stages,
+                      get_game_ids_with_current_stages,
+                      load_game_team_ids, load_player_positions,
+                      GAME_STAGE_RAW, GAME_STAGE_METADATA,
+                      GAME_STAGE_SHOT_EVENTS, GAME_STAGE_CONTEXT,
+                      GAME_STAGE_SHIFTS, GAME_STAGE_ON_ICE_SLOTS,
+                      unit_of_work,
                       DATABASE_DIR, DATABASE_PATH)
 from xg_features import extract_shot_events, extract_game_metadata
 from backup import run_backup_cycle_safe
@@ -27,76 +49,78 @@ from shift_population import (
     format_shift_population_summary,
     populate_shift_data_for_game,
 )
+from shifts import (extract_shift_player_ids, fetch_shift_rows_for_game,
+                    load_stored_shift_rows, parse_shift_rows)
 
 NHL_FIRST_GAME_DATE = datetime.date(2007, 10, 3)  # earliest available game in NHL API
+_PIPELINE_QUEUE_DAYS = 4  # schedule days buffered between ingestion stages
+_PIPELINE_POLL_SECONDS = 0.1
+_SCHEDULE_LIVE_WINDOW_DAYS = 3  # recent days whose schedule is always re-fetched
 
 
 def _init_database():
-    """Create/open the database and run all schema migrations."""
+    """Create/open the database, run all schema migrations, and enable the
+    raw payload store so finished games are only downloaded once."""
     os.makedirs(DATABASE_DIR, exist_ok=True)
+    set_raw_payload_store(RawPayloadStore(RAW_PAYLOAD_DIR))
     conn = create_connection(DATABASE_PATH)
     create_collection_log_table(conn)
     fix_incomplete_collection_log(conn)
+    create_schedule_tables(conn)
+    create_raw_events_table(conn)
     deduplicate_existing_tables(conn)
     ensure_player_database_schema(conn)
     ensure_xg_schema(conn)
     return conn
 
 
+_COMPLETE_GAME_STAGES = frozenset(
+    (GAME_STAGE_RAW, GAME_STAGE_METADATA, GAME_STAGE_SHOT_EVENTS)
+)
+_SHIFT_GAME_STAGES = frozenset((GAME_STAGE_SHIFTS, GAME_STAGE_ON_ICE_SLOTS))
+
+
 def _game_is_complete(conn, game_id):
     """Return True when raw events, metadata, and current-version shot events all exist."""
-    return (is_game_collected(conn, game_id)
-            and game_has_metadata(conn, game_id)
-            and game_has_current_shot_events(conn, game_id))
+    return _COMPLETE_GAME_STAGES <= get_current_game_stages(conn, game_id)
 
 
-def _process_game(conn, game_id):
-    """Ensure a game has raw events, metadata, and shot events.
+def _simplified_raw_rows(full_data):
+    return [
+        {
+            "period": play.get("periodDescriptor", {}).get("number"),
+            "time": play.get("timeInPeriod"),
+            "event": play.get("typeDescKey"),
+            "description": play.get("typeDescKey"),
+        }
+        for play in full_data.get("plays", [])
+    ]
 
-    Fetches play-by-play from the API only when at least one piece is missing.
-    Returns True when the game can be counted as collected.
+
+def _parse_game_payload(full_data):
+    """Derive raw rows, game metadata, and shot events from a play-by-play payload.
+
+    Pure (no DB or HTTP), so it can run in a worker process.
     """
-    raw_present = is_game_collected(conn, game_id)
-    meta_present = game_has_metadata(conn, game_id)
-    shots_current = game_has_current_shot_events(conn, game_id)
+    return {
+        "raw_rows": _simplified_raw_rows(full_data),
+        "metadata": extract_game_metadata(full_data),
+        "shot_events": extract_shot_events(full_data),
+    }
 
-    if raw_present and meta_present and shots_current:
-        shift_result = populate_shift_data_for_game(conn, game_id)
-        if shift_result.games_populated:
-            print(f"  game {game_id}: {format_shift_population_summary(shift_result)}")
-        return True
 
-    if raw_present:
-        missing = []
-        if not meta_present:
-            missing.append("metadata")
-        if not shots_current:
-            missing.append("shot events")
-        print(f"  Backfilling game {game_id} ({', '.join(missing)})")
-    else:
-        print(f"  Collecting game {game_id} (new)")
+def _write_parsed_game(conn, game_id, parsed, write_raw, write_metadata,
+                       write_shots):
+    """Persist the requested parts of a `_parse_game_payload` result.
 
-    full_data = get_full_play_by_play(game_id)
-    if full_data is None:
-        print(f"No data returned for game {game_id}, skipping")
-        return True
+    Runs as one unit of work, so a game's rows are committed together.
+    """
+    with unit_of_work(conn):
+        if write_raw:
+            insert_data(conn, game_id, parsed["raw_rows"])
 
-    if not raw_present:
-        simplified_rows = [
-            {
-                "period": play.get("periodDescriptor", {}).get("number"),
-                "time": play.get("timeInPeriod"),
-                "event": play.get("typeDescKey"),
-                "description": play.get("typeDescKey"),
-            }
-            for play in full_data.get("plays", [])
-        ]
-        create_table(conn, game_id)
-        insert_data(conn, game_id, simplified_rows)
-
-    if not meta_present:
-        metadata = extract_game_metadata(full_data)
-        if metadata:
+        metadata = parsed["metadata"]
+        if write_metadata and metadata:
             for prefix in ("home", "away"):
                 tid = metadata.get(f"{prefix}_team_id")
                 abbrev = metadata.get(f"{prefix}_team_abbrev")
@@ -114,39 +138,113 @@ def _process_game(conn, game_id):
             )
             populate_game_context(conn, game_id)
 
-    if not shots_current:
-        if game_has_shot_events(conn, game_id):
-            delete_game_shot_events(conn, game_id)
-        shot_events = extract_shot_events(full_data)
-        if shot_events:
-            insert_shot_events(conn, shot_events)
-            print(f"  game {game_id}: inserted {len(shot_events)} shot events")
-        else:
-            print(f"  game {game_id}: no shot events extracted")
-
-    if game_has_current_shot_events(conn, game_id):
-        shift_result = populate_shift_data_for_game(conn, game_id)
-        if shift_result.games_populated:
-            print(f"  game {game_id}: {format_shift_population_summary(shift_result)}")
+        if write_shots:
+            if game_has_shot_events(conn, game_id):
+                delete_game_shot_events(conn, game_id)
+            shot_events = parsed["shot_events"]
+            if shot_events:
+                insert_shot_events(conn, shot_events)
+                print(f"  game {game_id}: inserted {len(shot_events)} shot events")
+            else:
+                print(f"  game {game_id}: no shot events extracted")
+
+
+def _populate_shift_data(conn, game_id, shift_fetch_fn=None, shift_records_fn=None):
+    if shift_records_fn is not None:
+        shift_records = shift_records_fn(game_id)
+        if shift_records is None:
+            return
+        kwargs = {"shift_records": shift_records}
+    else:
+        kwargs = {} if shift_fetch_fn is None else {"fetch_fn": shift_fetch_fn}
+    shift_result = populate_shift_data_for_game(conn, game_id, **kwargs)
+    if shift_result.games_populated:
+        print(f"  game {game_id}: {format_shift_population_summary(shift_result)}")
+
+
+def _process_game(conn, game_id, fetch_fn=None, parsed_fn=None,
+                  shift_fetch_fn=None, shift_records_fn=None):
+    """Ensure a game has raw events, metadata, and shot events.
+
+    Plans from `game_pipeline_state`: play-by-play is fetched from the API
+    only when raw, metadata, or shot stages are missing or stale, and a stale
+    context stage is recomputed from the games table alone.
+    `fetch_fn(game_id)` defaults to `get_full_play_by_play`; callers that
+    prefetch payloads through a `ConcurrentFetcher` pass a lookup instead.
+    `parsed_fn(game_id)`, when given, returns an already-parsed
+    `_parse_game_payload` result (or None) and replaces fetch and parse.
+    `shift_fetch_fn` is passed through to `populate_shift_data_for_game`.
+    `shift_records_fn(game_id)`, when given, returns already-parsed shift
+    records instead, or None to leave the game's shift data for a later run.
+    Returns True when the game can be counted as collected.
+    """
+    current = get_current_game_stages(conn, game_id)
+    raw_present = GAME_STAGE_RAW in current
+    meta_present = GAME_STAGE_METADATA in current
+    shots_current = GAME_STAGE_SHOT_EVENTS in current
+
+    if meta_present and GAME_STAGE_CONTEXT not in current:
+        populate_game_context(conn, game_id)
+
+    if raw_present and meta_present and shots_current:
+        _populate_shift_data(conn, game_id, shift_fetch_fn, shift_records_fn)
+        return True
+
+    if raw_present:
+        missing = []
+        if not meta_present:
+            missing.append(GAME_STAGE_METADATA)
+        if not shots_current:
+            missing.append(GAME_STAGE_SHOT_EVENTS)
+        print(f"  Backfilling game {game_id} ({', '.join(missing)})")
+    else:
+        print(f"  Collecting game {game_id} (new)")
+
+    if parsed_fn is not None:
+        parsed = parsed_fn(game_id)
+    else:
+        fetch = fetch_fn if fetch_fn is not None else get_full_play_by_play
+        full_data = fetch(game_id)
+        parsed = None if full_data is None else _parse_game_payload(full_data)
+    if parsed is None:
+        print(f"No data returned for game {game_id}, skipping")
+        return True
+
+    with unit_of_work(conn):
+        _write_parsed_game(
+            conn, game_id, parsed,
+            write_raw=not raw_present,
+            write_metadata=not meta_present,
+            write_shots=not shots_current,
+        )
+
+        if GAME_STAGE_SHOT_EVENTS in get_current_game_stages(conn, game_id):
+            _populate_shift_data(conn, game_id, shift_fetch_fn, shift_records_fn)
 
     return True
 
 
-def finalize_season_diagnostics(conn):
-    """Populate `venue_bias_diagnostics` for every season present in `games`.
+def _prefetched(full_data):
+    """Return a fetch_fn that hands back an already-fetched payload."""
+    return lambda _game_id: full_data
+
+
+def finalize_season_diagnostics(conn, full_refresh=False):
+    """Refresh `venue_bias_diagnostics` for seasons whose shots changed.
 
-    Runs after the scraper/backfill loop. Safe to re-run: the underlying
+    Runs after the scraper/backfill loop. `populate_venue_shot_sums` merges
+    the shots of new or changed games into the stored per-venue-season sums
+    and returns the seasons it touched; only those seasons' diagnostics and
+    corrections are recomputed, from the stored sums. ``full_refresh``
+    re-aggregates every season. Safe to re-run: the underlying
     `populate_venue_diagnostics` uses `INSERT OR REPLACE`.
     """
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT DISTINCT season FROM games "
-        "WHERE season IS NOT NULL ORDER BY season"
-    )
-    seasons = [row[0] for row in cursor.fetchall()]
+    seasons = populate_venue_shot_sums(conn, full_refresh=full_refresh)
     for season in seasons:
-        populate_venue_diagnostics(conn, season)
-        populate_venue_bias_corrections(conn, season)
+        league = populate_venue_diagnostics(
+            conn, season, venue_sums=load_venue_season_shot_sums(conn, season)
+        )
+        populate_venue_bias_corrections(conn, season, league_stats=league)
     print(f"Populated venue diagnostics for {len(seasons)} seasons")
     return len(seasons)
 
@@ -156,17 +254,22 @@ def refresh_player_tables(conn):
 
     Runs after the scraper/backfill loop: the player-landing endpoint is
     only queried for shooter/goalie ids that are still missing from the
-    players dimension. Player-game stats and features are rebuilt
-    idempotently from the current shot-event foundation.
+    players dimension. Player on-ice TOI and shot share are aggregated for
+    games whose on-ice slots changed, then player-game stats are rebuilt for
+    games whose shot events or on-ice rows changed (and regrouped in place
+    for the players just backfilled), and features are refreshed from them.
     """
+    upserted_ids = []
     attempted, upserted, unavailable = backfill_player_metadata(
-        conn, get_player_metadata
+        conn, get_player_metadata, upserted_ids=upserted_ids
     )
     print(
         f"Player metadata backfill: attempted={attempted} "
         f"upserted={upserted} unavailable={unavailable}"
     )
-    stats_rows = populate_player_game_stats(conn)
+    on_ice_games = populate_player_game_on_ice(conn)
+    print(f"Populated player_game_on_ice games={on_ice_games}")
+    stats_rows = populate_player_game_stats(conn, regroup_player_ids=upserted_ids)
     print(f"Populated player_game_stats rows={stats_rows}")
     feature_rows = populate_player_game_features(conn)
     print(f"Populated player_game_features rows={feature_rows}")
@@ -174,6 +277,7 @@ def refresh_player_tables(conn):
         "metadata_attempted": attempted,
         "metadata_upserted": upserted,
         "metadata_unavailable": unavailable,
+        "player_on_ice_games": on_ice_games,
         "player_game_stats_rows": stats_rows,
         "player_game_features_rows": feature_rows,
     }
@@ -183,9 +287,11 @@ def backfill_missing_game_data(limit=None):
     """Backfill metadata and shot events for already-collected raw games."""
     conn = _init_database()
 
-    game_ids = get_collected_game_ids(conn)
-    missing_game_ids = [gid for gid in game_ids
-                        if not _game_is_complete(conn, gid)]
+    context_rows = populate_game_contexts(conn)
+    if context_rows:
+        print(f"Recomputed game context for {context_rows} games")
+
+    missing_game_ids = list(get_incomplete_game_stages(conn))
 
     if limit is not None:
         missing_game_ids = missing_game_ids[:limit]
@@ -194,10 +300,12 @@ def backfill_missing_game_data(limit=None):
 
     processed_games = 0
     total_missing = len(missing_game_ids)
-    for i, game_id in enumerate(missing_game_ids, 1):
-        print(f"[{i}/{total_missing}] game {game_id}")
-        if _process_game(conn, game_id):
-            processed_games += 1
+    with ConcurrentFetcher(get_full_play_by_play) as fetcher:
+        fetched = fetcher.imap(missing_game_ids)
+        for i, (game_id, full_data) in enumerate(fetched, 1):
+            print(f"[{i}/{total_missing}] game {game_id}")
+            if _process_game(conn, game_id, fetch_fn=_prefetched(full_data)):
+                processed_games += 1
 
     finalize_season_diagnostics(conn)
     refresh_player_tables(conn)
@@ -207,6 +315,112 @@ def backfill_missing_game_data(limit=None):
     return processed_games
 
 
+_PARSE_PENDING_PER_WORKER = 4
+_reextract_worker_store = None
+
+
+def _init_reextract_worker(raw_payload_dir):
+    global _reextract_worker_store
+    _reextract_worker_store = RawPayloadStore(raw_payload_dir)
+
+
+def _reextract_worker(game_id_and_sha256):
+    """Load one stored play-by-play payload and parse it (worker process)."""
+    game_id, sha256 = game_id_and_sha256
+    full_data = _reextract_worker_store.load_object(sha256)
+    if full_data is None:
+        return game_id, None
+    return game_id, _parse_game_payload(full_data)
+
+
+def _ordered_pool_map(executor, fn, items, max_pending):
+    """Like `executor.map`, but with at most `max_pending` unconsumed results."""
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def reextract_game_data(workers=None, limit=None, force=False,
+                        raw_payload_dir=None):
+    """Rebuild raw rows, metadata, and shot events from stored payloads.
+
+    Offline counterpart to `backfill_missing_game_data`: play-by-play JSON is
+    read from the raw payload store instead of the API. Parsing fans out
+    across a process pool of `workers` processes (default: CPU count; 1 runs
+    inline), and the results funnel into this process, the single SQLite
+    writer. Work is planned from `game_pipeline_state`: only games whose
+    raw, metadata, or shot stages are missing or stale are rebuilt unless
+    `force` is set. Rewritten shots get their on-ice slots back from the
+    stored shift charts; games without stored shift charts keep empty slots
+    until `backfill_shift_data` fetches them.
+    """
+    conn = _init_database()
+    store = RawPayloadStore(raw_payload_dir or RAW_PAYLOAD_DIR)
+
+    complete_ids = get_game_ids_with_current_stages(conn, _COMPLETE_GAME_STAGES)
+    raw_ids = get_game_ids_with_current_stages(conn, (GAME_STAGE_RAW,))
+    meta_ids = get_game_ids_with_current_stages(conn, (GAME_STAGE_METADATA,))
+    shot_ids = get_game_ids_with_current_stages(conn, (GAME_STAGE_SHOT_EVENTS,))
+    work = [
+        (entry.game_id, entry.sha256)
+        for entry in store.entries(ENDPOINT_PLAY_BY_PLAY)
+        if force or entry.game_id not in complete_ids
+    ]
+    if limit is not None:
+        work = work[:limit]
+
+    workers = workers or os.cpu_count() or 1
+    print(f"Re-extracting {len(work)} stored games with {workers} worker(s)")
+
+    if workers == 1:
+        _init_reextract_worker(store.root_dir)
+        results = map(_reextract_worker, work)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_reextract_worker,
+            initargs=(store.root_dir,),
+        )
+        results = _ordered_pool_map(
+            executor, _reextract_worker, work,
+            max_pending=workers * _PARSE_PENDING_PER_WORKER,
+        )
+
+    shift_fetch_fn = functools.partial(load_stored_shift_rows, store)
+    processed_games = 0
+    try:
+        for i, (game_id, parsed) in enumerate(results, 1):
+            if parsed is None:
+                print(f"[{i}/{len(work)}] game {game_id}: stored payload missing, skipping")
+                continue
+            with unit_of_work(conn):
+                _write_parsed_game(
+                    conn, game_id, parsed,
+                    write_raw=game_id not in raw_ids,
+                    write_metadata=force or game_id not in meta_ids,
+                    write_shots=force or game_id not in shot_ids,
+                )
+                # Rewriting shots clears their on-ice slots.
+                if GAME_STAGE_SHOT_EVENTS in get_current_game_stages(conn, game_id):
+                    _populate_shift_data(conn, game_id, shift_fetch_fn)
+            processed_games += 1
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    finalize_season_diagnostics(conn)
+    refresh_player_tables(conn)
+
+    conn.close()
+    print(f"Finished re-extraction for {processed_games} games")
+    return processed_games
+
+
 def run_scraper_and_backfill(backfill_limit=None):
     """Run the scheduled scraper update, then backfill missing derived data."""
     main()
@@ -215,7 +429,198 @@ def run_scraper_and_backfill(backfill_limit=None):
     return processed
 
 
-def main():
+class _StageFailed:
+    def __init__(self, exc):
+        self.exc = exc
+
+
+_STAGE_DONE = object()
+
+
+def _put_unless_stopped(out, item, stop):
+    while not stop.is_set():
+        try:
+            out.put(item, timeout=_PIPELINE_POLL_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _pipeline_stage(items, fn, stop, name, maxsize=_PIPELINE_QUEUE_DAYS):
+    """Apply `fn` to `items` on a background thread, yielding results in order.
+
+    Results pass through a bounded queue, so a stage runs at most `maxsize`
+    items ahead of its consumer. Stages chain by passing one stage's
+    generator as the next stage's `items`; an exception in any stage is
+    re-raised in the consumer, and setting `stop` winds every stage down.
+    """
+    out = queue.Queue(maxsize=maxsize)
+
+    def run():
+        try:
+            for item in items:
+                if not _put_unless_stopped(out, fn(item), stop):
+                    return
+        except BaseException as exc:
+            _put_unless_stopped(out, _StageFailed(exc), stop)
+            return
+        _put_unless_stopped(out, _STAGE_DONE, stop)
+
+    threading.Thread(target=run, name=f"ingest-{name}", daemon=True).start()
+    while not stop.is_set():
+        try:
+            item = out.get(timeout=_PIPELINE_POLL_SECONDS)
+        except queue.Empty:
+            continue
+        if item is _STAGE_DONE:
+            return
+        if isinstance(item, _StageFailed):
+            raise item.exc
+        yield item
+
+
+def _sync_schedule(conn, start_date, end_date):
+    """Bring the stored schedule up to date for ``start_date..end_date``.
+
+    Only weeks past the stored coverage and the recent live window are
+    fetched; on a fresh database this walks the whole range once, following
+    each week's ``nextStartDate`` across off-season gaps.
+    """
+    live_since = end_date - datetime.timedelta(days=_SCHEDULE_LIVE_WINDOW_DAYS)
+    current_date = get_schedule_refresh_start(conn, start_date, live_since)
+    weeks_fetched = 0
+    while current_date <= end_date:
+        schedule, next_start_date = get_weekly_schedule_games(current_date)
+        replace_schedule_week(conn, schedule, next_start_date)
+        weeks_fetched += 1
+        if not next_start_date:
+            break
+        current_date = datetime.date.fromisoformat(next_start_date)
+    print(f"Schedule synced ({weeks_fetched} week(s) fetched)")
+
+
+def _fetch_schedule_day(day, fetcher, shift_fetcher, complete_ids, shift_complete_ids):
+    """Fetch stage: play-by-play for the day's incomplete games, then shift charts.
+
+    Shift charts are prefetched only for finished games (already complete,
+    or with a final play-by-play payload), mirroring the raw-store gating in
+    `get_full_play_by_play`, so rate-limited stats API requests are not
+    spent on live or future games.
+    """
+    date_str, game_ids = day
+    payloads = fetcher.fetch_all(
+        [gid for gid in game_ids if gid not in complete_ids]
+    )
+    shift_rows = shift_fetcher.fetch_all(
+        [gid for gid in game_ids
+         if gid not in shift_complete_ids
+         and (gid in complete_ids or is_final_game_payload(payloads.get(gid)))]
+    )
+    return {"date": date_str, "game_ids": game_ids,
+            "payloads": payloads, "shift_rows": shift_rows}
+
+
+def _parse_schedule_game(item):
+    """Parse one game's play-by-play and shift rows (worker process).
+
+    Pure (no DB or HTTP). Team ids come from the parsed play-by-play when
+    there is one, otherwise from the stored game row passed in.
+    """
+    game_id, payload, shift_rows, team_ids, player_positions = item
+    parsed = None if payload is None else _parse_game_payload(payload)
+    if parsed is not None and parsed["metadata"]:
+        metadata = parsed["metadata"]
+        team_ids = (metadata["home_team_id"], metadata["away_team_id"])
+    shift_records = None
+    if shift_rows:
+        home_team_id, away_team_id = team_ids
+        shift_records = parse_shift_rows(
+            game_id,
+            shift_rows,
+            home_team_id=home_team_id,
+            away_team_id=away_team_id,
+            player_positions=player_positions,
+        )
+    return game_id, parsed, shift_records
+
+
+def _parse_schedule_day(day, executor, max_pending, team_ids, player_positions):
+    """Parse stage: turn the day's payloads and shift rows into parsed results.
+
+    Games are parsed in `executor`'s worker processes (inline when it is
+    None), so extraction runs in parallel with the writer instead of
+    contending for its GIL. `team_ids` and `player_positions` are
+    snapshots taken before the pipeline starts, since only the writer
+    thread may read the database.
+    """
+    payloads = day.pop("payloads")
+    shift_rows = day.pop("shift_rows")
+    items = [
+        (
+            gid,
+            payloads.get(gid),
+            shift_rows.get(gid),
+            team_ids.get(gid, (None, None)),
+            {
+                player_id: player_positions[player_id]
+                for player_id in extract_shift_player_ids(shift_rows.get(gid) or ())
+                if player_id in player_positions
+            },
+        )
+        for gid in day["game_ids"]
+        if payloads.get(gid) is not None or shift_rows.get(gid)
+    ]
+    if executor is None:
+        results = map(_parse_schedule_game, items)
+    else:
+        results = _ordered_pool_map(executor, _parse_schedule_game, items, max_pending)
+    day["parsed"] = {}
+    day["shift_records"] = {}
+    for gid, parsed, shift_records in results:
+        if parsed is not None:
+            day["parsed"][gid] = parsed
+        if shift_records is not None:
+            day["shift_records"][gid] = shift_records
+    return day
+
+
+def _write_schedule_day(conn, day):
+    """Writer stage: persist one parsed day and mark it collected, atomically.
+
+    Never touches the network: games whose shift charts were not prefetched
+    keep their shift stages stale until a later run or `backfill_shift_data`.
+    """
+    date_str, game_ids = day["date"], day["game_ids"]
+    games_found = len(game_ids)
+    games_collected = 0
+
+    print(f"Processing date {date_str} ({games_found} games)")
+
+    # One commit per schedule day; each game is a nested savepoint.
+    with unit_of_work(conn):
+        for i, game_id in enumerate(game_ids, 1):
+            print(f"  [{i}/{games_found}] game {game_id}")
+            if _process_game(conn, game_id, parsed_fn=day["parsed"].get,
+                             shift_records_fn=day["shift_records"].get):
+                games_collected += 1
+
+        mark_date_collected(conn, date_str, games_found, games_collected)
+
+
+def main(parse_workers=None):
+    """Collect every scheduled game from the resume date through today.
+
+    The schedule is read from the persisted schedule tables, refreshed
+    first by `_sync_schedule`. Games then flow through a staged pipeline
+    over bounded queues so network, CPU, and disk overlap: a fetch stage
+    pulls play-by-play and shift charts (each rate-limited, concurrent), a parse
+    stage extracts shot events, metadata, and shift records in a pool of
+    `parse_workers` processes (default: CPU count; 1 parses inline), and this
+    thread is the single SQLite writer. Days reach the writer in schedule
+    order and each commits together with its `mark_date_collected` row, so a
+    crash resumes from the first uncommitted day.
+    """
     start_date = NHL_FIRST_GAME_DATE
     end_date = datetime.date.today()
 
@@ -229,30 +634,52 @@ def main():
         current_date = start_date
         print(f"Starting fresh collection from {current_date}")
 
-    while current_date <= end_date:
-        schedule, next_start_date = get_weekly_schedule(current_date)
-
-        for date_str in sorted(schedule):
-            date_obj = datetime.date.fromisoformat(date_str)
-            if date_obj < current_date or date_obj > end_date:
-                continue
-
-            game_ids = schedule[date_str]
-            games_found = len(game_ids)
-            games_collected = 0
-
-            print(f"Processing date {date_str} ({games_found} games)")
-
-            for i, game_id in enumerate(game_ids, 1):
-                print(f"  [{i}/{games_found}] game {game_id}")
-                if _process_game(conn, game_id):
-                    games_collected += 1
-
-            mark_date_collected(conn, date_str, games_found, games_collected)
-
-        if not next_start_date:
-            break
-        current_date = datetime.date.fromisoformat(next_start_date)
+    _sync_schedule(conn, current_date, end_date)
+    schedule_days = get_schedule_days(conn, current_date, end_date)
+
+    # Snapshot once: games are only scheduled on one date, so nothing this
+    # run writes changes the answer for a later day.
+    complete_ids = get_game_ids_with_current_stages(conn, _COMPLETE_GAME_STAGES)
+    shift_complete_ids = get_game_ids_with_current_stages(conn, _SHIFT_GAME_STAGES)
+    # Shift rows of already-complete games are parsed against their stored
+    # teams; the parse stage cannot read the database itself.
+    team_ids = {
+        gid: load_game_team_ids(conn, gid)
+        for _, game_ids in schedule_days
+        for gid in game_ids
+        if gid in complete_ids and gid not in shift_complete_ids
+    }
+    player_positions = load_player_positions(conn)
+
+    parse_workers = parse_workers or os.cpu_count() or 1
+    # Spawned rather than forked: workers start once the fetch threads run.
+    executor = (None if parse_workers == 1 else ProcessPoolExecutor(
+        max_workers=parse_workers, mp_context=multiprocessing.get_context("spawn")))
+    stop = threading.Event()
+    fetcher = ConcurrentFetcher(get_full_play_by_play)
+    shift_fetcher = ConcurrentFetcher(fetch_shift_rows_for_game)
+    try:
+        fetched = _pipeline_stage(
+            schedule_days,
+            lambda day: _fetch_schedule_day(day, fetcher, shift_fetcher,
+                                            complete_ids, shift_complete_ids),
+            stop, "fetch",
+        )
+        parsed_days = _pipeline_stage(
+            fetched,
+            lambda day: _parse_schedule_day(
+                day, executor, parse_workers * _PARSE_PENDING_PER_WORKER,
+                team_ids, player_positions),
+            stop, "parse",
+        )
+        for day in parsed_days:
+            _write_schedule_day(conn, day)
+    finally:
+        stop.set()
+        fetcher.close()
+        shift_fetcher.close()
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
 
     finalize_season_diagnostics(conn)
     refresh_player_tables(conn)
@@ -260,5 +687,67 @@ def main():
     conn.close()
 
 
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Scrape NHL games through today, then backfill derived data."
+    )
+    parser.add_argument(
+        "--game-api-rps",
+        type=float,
+        default=None,
+        help="Sustained play-by-play request rate. Defaults to 0.5 (one request every 2 s).",
+    )
+    parser.add_argument(
+        "--game-api-burst",
+        type=int,
+        default=None,
+        help="Play-by-play requests allowed back to back after an idle period. Defaults to 2.",
+    )
+    parser.add_argument(
+        "--stats-api-rps",
+        type=float,
+        default=None,
+        help="Sustained shift-chart request rate. Defaults to 2.",
+    )
+    parser.add_argument(
+        "--stats-api-burst",
+        type=int,
+        default=None,
+        help="Shift-chart requests allowed back to back after an idle period. Defaults to 4.",
+    )
+    parser.add_argument(
+        "--backfill-limit",
+        type=int,
+        default=None,
+        help="Maximum number of incomplete games to backfill after the scrape.",
+    )
+    return parser
+
+
+def _rate_limit_kwargs(requests_per_second, burst):
+    kwargs = {}
+    if requests_per_second is not None:
+        kwargs["requests_per_second"] = requests_per_second
+    if burst is not None:
+        kwargs["burst"] = burst
+    return kwargs
+
+
+def cli(argv=None):
+    """Command-line entry point: apply rate-limit overrides, then scrape and backfill."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    game_kwargs = _rate_limit_kwargs(args.game_api_rps, args.game_api_burst)
+    stats_kwargs = _rate_limit_kwargs(args.stats_api_rps, args.stats_api_burst)
+    try:
+        if game_kwargs:
+            configure_game_api_rate_limit(**game_kwargs)
+        if stats_kwargs:
+            configure_stats_api_rate_limit(**stats_kwargs)
+    except ValueError as exc:
+        parser.error(str(exc))
+    return run_scraper_and_backfill(backfill_limit=args.backfill_limit)
+
+
 if __name__ == "__main__":
-    run_scraper_and_backfill()
+    cli()
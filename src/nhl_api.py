@@ -1,23 +1,163 @@
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from database import PlayerMetadataNotFound
+from raw_payload_store import ENDPOINT_PLAY_BY_PLAY
 
 _NHL_API_BASE_URL = "https://api-web.nhle.com/v1"
-_GAME_API_MIN_INTERVAL = 2  # seconds between game API calls
+_GAME_API_REQUESTS_PER_SECOND = 0.5  # one request every 2 s, sustained
+_GAME_API_BURST = 2  # lets concurrent requests overlap latency, not raise the rate
+_GAME_API_MAX_IN_FLIGHT = 4  # concurrent game API requests
+_STATS_API_REQUESTS_PER_SECOND = 2.0  # api.nhle.com/stats (shift charts)
+_STATS_API_BURST = 4
 _USER_AGENT = "Mozilla/5.0"
 _HTTP_OK = 200
 _HTTP_NOT_FOUND = 404
 _HTTP_REQUEST_EXCEPTION_STATUS = 0
-_last_game_api_call = 0
+_HTTP_POOL_MAXSIZE = 16
+_ETAG_HEADER = "ETag"
+_FINAL_GAME_STATES = ("OFF", "FINAL")
 
 _session = requests.Session()
 _session.headers.update({"User-Agent": _USER_AGENT})
-
-
-def _api_get_with_status(url, silent_status_codes=()):
-    """Perform a GET request. Returns (parsed_json_or_None, status_code).
+_session.mount("https://", HTTPAdapter(pool_maxsize=_HTTP_POOL_MAXSIZE))
+_session.mount("http://", HTTPAdapter(pool_maxsize=_HTTP_POOL_MAXSIZE))
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by every caller of one API host.
+
+    Holds up to ``burst`` tokens and refills at ``rate`` tokens per second.
+    ``acquire`` blocks until a token is available, so a pool of workers can
+    keep several requests in flight while the long-run request rate stays
+    at ``rate``.
+    """
+
+    def __init__(self, rate, burst):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate!r}")
+        if burst < 1:
+            raise ValueError(f"burst must be at least 1, got {burst!r}")
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = float(burst)
+        self._last_refill = None
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        if self._last_refill is not None:
+            elapsed = max(0.0, now - self._last_refill)
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+        self._last_refill = now
+
+    def acquire(self):
+        """Take one token, sleeping until one is available.
+
+        Returns the number of seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return waited
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+_game_api_bucket = TokenBucket(_GAME_API_REQUESTS_PER_SECOND, _GAME_API_BURST)
+
+
+def configure_game_api_rate_limit(requests_per_second=_GAME_API_REQUESTS_PER_SECOND,
+                                  burst=_GAME_API_BURST):
+    """Replace the shared game API token bucket. Returns the new bucket."""
+    global _game_api_bucket
+    _game_api_bucket = TokenBucket(requests_per_second, burst)
+    return _game_api_bucket
+
+
+_stats_api_bucket = TokenBucket(_STATS_API_REQUESTS_PER_SECOND, _STATS_API_BURST)
+
+
+def configure_stats_api_rate_limit(requests_per_second=_STATS_API_REQUESTS_PER_SECOND,
+                                   burst=_STATS_API_BURST):
+    """Replace the shared stats API (shift charts) token bucket. Returns the new bucket."""
+    global _stats_api_bucket
+    _stats_api_bucket = TokenBucket(requests_per_second, burst)
+    return _stats_api_bucket
+
+
+def acquire_stats_api_token():
+    """Block until the shared stats API bucket allows one more request.
+
+    Returns the number of seconds spent waiting.
+    """
+    return _stats_api_bucket.acquire()
+
+
+_NO_KEY = object()
+
+
+class ConcurrentFetcher:
+    """Keep up to ``max_in_flight`` calls of ``fetch_fn`` running at once.
+
+    ``fetch_fn(key)`` does the actual request; pass a throttled function such
+    as `get_full_play_by_play` so every worker draws from the shared token
+    bucket. Results come back in input order, and at most ``max_in_flight``
+    unconsumed results are held at any time.
+    """
+
+    def __init__(self, fetch_fn, max_in_flight=_GAME_API_MAX_IN_FLIGHT):
+        if max_in_flight < 1:
+            raise ValueError(f"max_in_flight must be at least 1, got {max_in_flight!r}")
+        self._fetch_fn = fetch_fn
+        self.max_in_flight = max_in_flight
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_in_flight, thread_name_prefix="nhl-api-fetch"
+        )
+
+    def imap(self, keys):
+        """Yield ``(key, result)`` pairs in input order."""
+        pending = deque()
+        key_iter = iter(keys)
+        for key in key_iter:
+            pending.append((key, self._executor.submit(self._fetch_fn, key)))
+            if len(pending) >= self.max_in_flight:
+                break
+
+        while pending:
+            key, future = pending.popleft()
+            next_key = next(key_iter, _NO_KEY)
+            if next_key is not _NO_KEY:
+                pending.append(
+                    (next_key, self._executor.submit(self._fetch_fn, next_key))
+                )
+            yield key, future.result()
+
+    def fetch_all(self, keys):
+        """Return ``{key: result}`` for every key."""
+        return dict(self.imap(keys))
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def _api_get_response(url, silent_status_codes=()):
+    """Perform a GET request. Returns (parsed_json_or_None, status_code, etag).
 
     Prints an error for non-200 codes unless the code appears in
     silent_status_codes — used for endpoints where certain responses are
@@ -28,12 +168,18 @@ def _api_get_with_status(url, silent_status_codes=()):
         response = _session.get(url)
     except requests.RequestException as exc:
         print(f"Error fetching {url}. Request failed: {exc}")
-        return None, _HTTP_REQUEST_EXCEPTION_STATUS
+        return None, _HTTP_REQUEST_EXCEPTION_STATUS, None
     if response.status_code != _HTTP_OK:
         if response.status_code not in silent_status_codes:
             print(f"Error fetching {url}. Status code: {response.status_code}")
-        return None, response.status_code
-    return response.json(), _HTTP_OK
+        return None, response.status_code, None
+    return response.json(), _HTTP_OK, response.headers.get(_ETAG_HEADER)
+
+
+def _api_get_with_status(url, silent_status_codes=()):
+    """Perform a GET request. Returns (parsed_json_or_None, status_code)."""
+    data, status, _ = _api_get_response(url, silent_status_codes)
+    return data, status
 
 
 def _api_get(url):
@@ -47,12 +193,13 @@ def get_game_ids_for_date(date):
     return schedule.get(str(date), [])
 
 
-def get_weekly_schedule(date):
-    """Fetch a full week of schedule data in one API call.
+def get_weekly_schedule_games(date):
+    """Fetch a full week of schedule data, keeping each game's state.
 
     Returns (schedule_by_date, next_start_date) where schedule_by_date
-    maps "YYYY-MM-DD" strings to lists of game IDs, and next_start_date
-    is the date string for the next week (or None if unavailable).
+    maps "YYYY-MM-DD" strings to lists of ``(game_id, game_state)`` tuples
+    (``game_state`` is e.g. "FUT", "LIVE", "OFF", or None when absent), and
+    next_start_date is the date string for the next week (or None).
     """
     date_str = str(date)
     url = f"{_NHL_API_BASE_URL}/schedule/{date_str}"
@@ -67,7 +214,7 @@ def get_weekly_schedule(date):
         return {}, None
 
     schedule = {
-        entry["date"]: [game["id"] for game in entry["games"]]
+        entry["date"]: [(game["id"], game.get("gameState")) for game in entry["games"]]
         for entry in game_week
     }
 
@@ -75,26 +222,76 @@ def get_weekly_schedule(date):
     return schedule, next_start_date
 
 
+def get_weekly_schedule(date):
+    """Fetch a full week of schedule data in one API call.
+
+    Returns (schedule_by_date, next_start_date) where schedule_by_date
+    maps "YYYY-MM-DD" strings to lists of game IDs, and next_start_date
+    is the date string for the next week (or None if unavailable).
+    """
+    schedule, next_start_date = get_weekly_schedule_games(date)
+    return (
+        {day: [game_id for game_id, _ in games] for day, games in schedule.items()},
+        next_start_date,
+    )
+
+
 def _rate_limited_game_api_get(game_id):
-    """Rate-limited GET for a game play-by-play endpoint. Returns parsed JSON or None."""
-    global _last_game_api_call
-    elapsed = time.monotonic() - _last_game_api_call
-    if elapsed < _GAME_API_MIN_INTERVAL:
-        wait = _GAME_API_MIN_INTERVAL - elapsed
-        print(f"Rate limiting: waiting {wait:.1f}s before next game API call")
-        time.sleep(wait)
+    """Rate-limited GET for a game play-by-play endpoint.
 
+    Returns (parsed JSON or None, ETag or None). Draws a token from the
+    shared game API bucket first, so it is safe to call from several
+    `ConcurrentFetcher` workers at once.
+    """
+    _game_api_bucket.acquire()
     url = f"{_NHL_API_BASE_URL}/gamecenter/{game_id}/play-by-play"
-    data = _api_get(url)
-    _last_game_api_call = time.monotonic()
+    data, _, etag = _api_get_response(url)
+    return data, etag
+
+
+_raw_payload_store = None
+
+
+def set_raw_payload_store(store):
+    """Route play-by-play and shift-chart fetches through ``store``.
+
+    Pass None to disable the read-through cache. Returns the previous store.
+    """
+    global _raw_payload_store
+    previous = _raw_payload_store
+    _raw_payload_store = store
+    return previous
+
+
+def get_raw_payload_store():
+    """Return the configured `RawPayloadStore`, or None."""
+    return _raw_payload_store
+
+
+def is_final_game_payload(data):
+    """Return True when a play-by-play payload describes a finished game."""
+    return isinstance(data, dict) and data.get("gameState") in _FINAL_GAME_STATES
+
+
+def get_full_play_by_play(game_id):
+    """Fetch complete play-by-play JSON for a game, or None on failure.
+
+    Reads through the raw payload store when one is configured. Only
+    finished games are written to the store, so live and future games are
+    always fetched fresh.
+    """
+    store = _raw_payload_store
+    if store is not None:
+        cached = store.get(ENDPOINT_PLAY_BY_PLAY, game_id)
+        if cached is not None:
+            return cached
+
+    data, etag = _rate_limited_game_api_get(game_id)
+    if store is not None and is_final_game_payload(data):
+        store.put(ENDPOINT_PLAY_BY_PLAY, game_id, data, etag=etag)
     return data
 
 
-def get_full_play_by_play(game_id):
-    """Fetch complete play-by-play JSON for a game, or None on failure."""
-    return _rate_limited_game_api_get(game_id)
-
-
 def get_play_by_play_data(game_id):
     data = get_full_play_by_play(game_id)
 
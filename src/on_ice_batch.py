@@ -0,0 +1,234 @@
+"""Columnar on-ice interval engine for season-scale rebuilds.
+
+`build_on_ice_intervals` sweeps one game at a time. This module builds the
+same `OnIceInterval` rows for every game of a season in one vectorized pass:
+all (game, period, time) boundaries go into one sorted array, each shift is
+mapped to the boundary segments it covers, and membership is kept as a
+sparse (segment, group, player) table instead of per-game Python sets.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+
+import numpy as np
+
+from database import (
+    GAME_STAGE_ON_ICE_SLOTS,
+    GAME_STAGE_SHIFTS,
+    get_game_ids_with_current_stages,
+    get_season_game_ids,
+    load_season_shift_rows,
+    load_shots_for_games,
+    record_stages_for_games,
+    replace_on_ice_intervals_for_games,
+    unit_of_work,
+    update_shot_event_on_ice_slots,
+)
+from on_ice_builder import OnIceInterval, _derive_strength_state, attach_on_ice_slots_to_shots
+
+SIDE_HOME = 0
+SIDE_AWAY = 1
+SIDE_NONE = -1
+_SIDE_CODES = {"home": SIDE_HOME, "away": SIDE_AWAY}
+_GROUP_COUNT = 4  # side * 2 + is_goalie
+_GROUP_HOME_SKATERS = SIDE_HOME * 2
+_GROUP_HOME_GOALIES = SIDE_HOME * 2 + 1
+_GROUP_AWAY_SKATERS = SIDE_AWAY * 2
+_GROUP_AWAY_GOALIES = SIDE_AWAY * 2 + 1
+_REBUILD_BATCH_GAMES = 500
+
+
+@dataclass(frozen=True)
+class ShiftArrays:
+    """Parallel per-shift columns; ``sides`` uses the ``SIDE_*`` codes."""
+
+    game_ids: np.ndarray
+    periods: np.ndarray
+    starts: np.ndarray
+    ends: np.ndarray
+    player_ids: np.ndarray
+    sides: np.ndarray
+    is_goalie: np.ndarray
+
+    def __len__(self):
+        return len(self.game_ids)
+
+
+def shift_arrays_from_rows(rows) -> ShiftArrays:
+    """Convert `load_season_shift_rows` tuples into `ShiftArrays`."""
+    rows = list(rows)
+    if not rows:
+        empty = np.zeros(0, dtype=np.int64)
+        return ShiftArrays(empty, empty, empty, empty, empty,
+                           np.zeros(0, dtype=np.int8), np.zeros(0, dtype=bool))
+
+    game_ids, periods, starts, ends, player_ids, team_sides, positions = zip(*rows)
+    return ShiftArrays(
+        game_ids=np.asarray(game_ids, dtype=np.int64),
+        periods=np.asarray(periods, dtype=np.int64),
+        starts=np.asarray(starts, dtype=np.int64),
+        ends=np.asarray(ends, dtype=np.int64),
+        player_ids=np.asarray(player_ids, dtype=np.int64),
+        sides=np.asarray([_SIDE_CODES.get(side, SIDE_NONE) for side in team_sides],
+                         dtype=np.int8),
+        is_goalie=np.asarray([str(position or "").upper() == "G" for position in positions],
+                             dtype=bool),
+    )
+
+
+def _segment_memberships(shift_starts, shift_ends, boundaries, is_segment):
+    """Expand each shift into the boundary segments it covers.
+
+    Returns ``(segment_index, shift_index)`` arrays. A shift starting at
+    boundary ``a`` and ending at boundary ``b`` covers segments ``a..b-1``.
+    """
+    first = np.searchsorted(boundaries, shift_starts)
+    stop = np.searchsorted(boundaries, shift_ends)
+    lengths = stop - first
+    shift_index = np.repeat(np.arange(len(first)), lengths)
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    segment_index = first[shift_index] + offsets
+    keep = is_segment[segment_index]
+    return segment_index[keep], shift_index[keep]
+
+
+def build_on_ice_intervals_batch(shifts: ShiftArrays) -> list[OnIceInterval]:
+    """Build on-ice intervals for every game in ``shifts`` in one pass.
+
+    Output matches concatenating `build_on_ice_intervals` over the games in
+    ascending game_id order.
+    """
+    valid = shifts.ends > shifts.starts
+    if not valid.any():
+        return []
+    game_ids = shifts.game_ids[valid]
+    periods = shifts.periods[valid]
+    starts = shifts.starts[valid]
+    ends = shifts.ends[valid]
+    player_ids = shifts.player_ids[valid]
+    sides = shifts.sides[valid]
+    is_goalie = shifts.is_goalie[valid]
+
+    # Encode (game, period, time) as one sortable int64 per boundary.
+    group_keys, group_codes = np.unique(
+        np.stack([game_ids, periods], axis=1), axis=0, return_inverse=True
+    )
+    group_codes = group_codes.reshape(-1)
+    time_span = int(max(ends.max(), 0)) + 1
+    start_keys = group_codes * time_span + starts
+    end_keys = group_codes * time_span + ends
+
+    boundaries = np.unique(np.concatenate([start_keys, end_keys]))
+    boundary_groups = boundaries // time_span
+    # Segment i runs from boundary i to boundary i+1 inside one (game, period).
+    is_segment = np.zeros(len(boundaries), dtype=bool)
+    is_segment[:-1] = boundary_groups[:-1] == boundary_groups[1:]
+
+    sided = sides != SIDE_NONE
+    segment_index, shift_index = _segment_memberships(
+        start_keys[sided], end_keys[sided], boundaries, is_segment
+    )
+    member_groups = (sides[sided] * 2 + is_goalie[sided])[shift_index].astype(np.int64)
+    member_players = player_ids[sided][shift_index]
+
+    # Sort by (segment, group, player) and drop overlapping duplicate shifts.
+    order = np.lexsort((member_players, member_groups, segment_index))
+    segment_index = segment_index[order]
+    member_groups = member_groups[order]
+    member_players = member_players[order]
+    if len(order):
+        distinct = np.ones(len(order), dtype=bool)
+        distinct[1:] = (
+            (np.diff(segment_index) != 0)
+            | (np.diff(member_groups) != 0)
+            | (np.diff(member_players) != 0)
+        )
+        segment_index = segment_index[distinct]
+        member_groups = member_groups[distinct]
+        member_players = member_players[distinct]
+
+    cell_counts = np.bincount(
+        segment_index * _GROUP_COUNT + member_groups,
+        minlength=len(boundaries) * _GROUP_COUNT,
+    ).reshape(len(boundaries), _GROUP_COUNT)
+    cell_offsets = np.concatenate([[0], np.cumsum(cell_counts.reshape(-1))])
+
+    has_skaters = (cell_counts[:, _GROUP_HOME_SKATERS] + cell_counts[:, _GROUP_AWAY_SKATERS]) > 0
+    emitted = np.flatnonzero(is_segment & has_skaters)
+
+    players = member_players.tolist()
+    boundary_times = (boundaries - boundary_groups * time_span).tolist()
+    group_list = group_keys.tolist()
+    offsets = cell_offsets.tolist()
+    codes = boundary_groups.tolist()
+
+    encoded_lineups: dict[tuple, str] = {}
+
+    def cell(segment, group):
+        base = segment * _GROUP_COUNT + group
+        return tuple(players[offsets[base]:offsets[base + 1]])
+
+    def lineup_json(lineup):
+        # Line combinations repeat all season; encode each distinct one once.
+        encoded = encoded_lineups.get(lineup)
+        if encoded is None:
+            encoded = encoded_lineups[lineup] = json.dumps(list(lineup))
+        return encoded
+
+    intervals: list[OnIceInterval] = []
+    for segment in emitted.tolist():
+        game_id, period = group_list[codes[segment]]
+        home_skaters = cell(segment, _GROUP_HOME_SKATERS)
+        away_skaters = cell(segment, _GROUP_AWAY_SKATERS)
+        home_goalies = cell(segment, _GROUP_HOME_GOALIES)
+        away_goalies = cell(segment, _GROUP_AWAY_GOALIES)
+        intervals.append(
+            OnIceInterval(
+                game_id=game_id,
+                period=period,
+                start_s=boundary_times[segment],
+                end_s=boundary_times[segment + 1],
+                home_skaters_json=lineup_json(home_skaters),
+                away_skaters_json=lineup_json(away_skaters),
+                home_goalie_player_id=home_goalies[0] if home_goalies else None,
+                away_goalie_player_id=away_goalies[0] if away_goalies else None,
+                strength_state=_derive_strength_state(home_skaters, away_skaters),
+            )
+        )
+    return intervals
+
+
+def rebuild_season_on_ice_intervals(conn, season) -> dict:
+    """Rebuild on_ice_intervals and shot on-ice slots for one season.
+
+    Meant for `_ON_ICE_SCHEMA_VERSION` bumps: only the season's games whose
+    shifts are already current are rebuilt, `_REBUILD_BATCH_GAMES` at a time
+    in one transaction. Each batch is written set-wise: one delete and one
+    executemany insert for its intervals, one shot load and slot update, and
+    one stage write. A game whose shifts yield no intervals has its stale
+    on-ice rows cleared, as in the per-game path. Returns games/interval/shot
+    counts.
+    """
+    game_ids = sorted(
+        get_game_ids_with_current_stages(conn, (GAME_STAGE_SHIFTS,))
+        & get_season_game_ids(conn, season)
+    )
+
+    interval_rows = 0
+    shot_rows = 0
+    with unit_of_work(conn):
+        for offset in range(0, len(game_ids), _REBUILD_BATCH_GAMES):
+            batch = game_ids[offset:offset + _REBUILD_BATCH_GAMES]
+            rows = load_season_shift_rows(conn, season, game_ids=batch)
+            intervals = build_on_ice_intervals_batch(shift_arrays_from_rows(rows))
+            interval_rows += replace_on_ice_intervals_for_games(conn, batch, intervals)
+            enriched = attach_on_ice_slots_to_shots(load_shots_for_games(conn, batch), intervals)
+            shot_rows += update_shot_event_on_ice_slots(conn, enriched)
+            record_stages_for_games(conn, batch, (GAME_STAGE_ON_ICE_SLOTS,))
+    return {
+        "games_rebuilt": len(game_ids),
+        "interval_rows_inserted": interval_rows,
+        "shot_rows_updated": shot_rows,
+    }
@@ -1,7 +1,9 @@
 """On-ice interval builder for roster-change impact analysis."""
 
 import json
+from bisect import bisect_right
 from dataclasses import dataclass
+from itertools import accumulate
 from typing import Iterable
 
 from shifts import clock_to_seconds
@@ -38,113 +40,186 @@ def _derive_strength_state(home_skaters: list[int], away_skaters: list[int]) ->
     return f"{len(home_skaters)}v{len(away_skaters)}"
 
 
-def _interval_contains(interval: OnIceInterval, seconds_in_period: int) -> bool:
-    return interval.start_s <= seconds_in_period < interval.end_s
-
-
 def _finalize_slots(skaters: list[int], goalie_id: int | None) -> list[int | None]:
     sorted_skaters = sorted(skaters)[:ON_ICE_SKATER_COUNT]
     padded_skaters = sorted_skaters + [None] * (ON_ICE_SKATER_COUNT - len(sorted_skaters))
     return padded_skaters + [goalie_id]
 
 
-def build_on_ice_intervals(game_id: int, shift_rows: Iterable[dict]) -> list[OnIceInterval]:
-    """Build intervalized on-ice representation from normalized shift rows."""
-    rows = [row for row in shift_rows if int(row.get("end_seconds", 0)) > int(row.get("start_seconds", 0))]
-    periods = sorted({int(row["period"]) for row in rows if "period" in row})
-    intervals: list[OnIceInterval] = []
+def _classify_shift_row(row: dict) -> tuple[str, bool] | None:
+    """Return ``(side, is_goalie)`` for a shift row, or None when unsided."""
+    side = _extract_sideshift_value(row, "team_side", "side")
+    if side not in ("home", "away"):
+        return None
+    position = _extract_sideshift_value(row, "position", "position_code", "positionCode")
+    return side, str(position or "").upper() == "G"
+
+
+def _active_ids(counts: dict[int, int]) -> list[int]:
+    return sorted(counts)
 
-    for period in periods:
-        period_rows = [row for row in rows if int(row["period"]) == period]
-        boundaries = sorted({int(row["start_seconds"]) for row in period_rows} | {int(row["end_seconds"]) for row in period_rows})
-        for start_s, end_s in zip(boundaries, boundaries[1:]):
-            if end_s <= start_s:
-                continue
-
-            active_rows = [
-                row for row in period_rows
-                if int(row["start_seconds"]) < end_s and int(row["end_seconds"]) > start_s
-            ]
-
-            home_skaters = sorted({
-                int(row["player_id"]) for row in active_rows
-                if _extract_sideshift_value(row, "team_side", "side") == "home"
-                and str(_extract_sideshift_value(row, "position", "position_code", "positionCode") or "").upper() != "G"
-            })
-            away_skaters = sorted({
-                int(row["player_id"]) for row in active_rows
-                if _extract_sideshift_value(row, "team_side", "side") == "away"
-                and str(_extract_sideshift_value(row, "position", "position_code", "positionCode") or "").upper() != "G"
-            })
-            home_goalie_ids = sorted({
-                int(row["player_id"]) for row in active_rows
-                if _extract_sideshift_value(row, "team_side", "side") == "home"
-                and str(_extract_sideshift_value(row, "position", "position_code", "positionCode") or "").upper() == "G"
-            })
-            away_goalie_ids = sorted({
-                int(row["player_id"]) for row in active_rows
-                if _extract_sideshift_value(row, "team_side", "side") == "away"
-                and str(_extract_sideshift_value(row, "position", "position_code", "positionCode") or "").upper() == "G"
-            })
-
-            if not home_skaters and not away_skaters:
-                continue
-
-            intervals.append(
-                OnIceInterval(
-                    game_id=game_id,
-                    period=period,
-                    start_s=start_s,
-                    end_s=end_s,
-                    home_skaters_json=json.dumps(home_skaters),
-                    away_skaters_json=json.dumps(away_skaters),
-                    home_goalie_player_id=home_goalie_ids[0] if home_goalie_ids else None,
-                    away_goalie_player_id=away_goalie_ids[0] if away_goalie_ids else None,
-                    strength_state=_derive_strength_state(home_skaters, away_skaters),
-                )
+
+def _sweep_period(game_id: int, period: int, events: list[tuple[int, int, tuple]]) -> list[OnIceInterval]:
+    """Sweep one period's sorted ``(time, delta, (side, is_goalie, player_id))`` events.
+
+    Keeps per-group player counts (a player can have overlapping shift rows)
+    and emits one interval per pair of adjacent boundaries. Unsided rows
+    carry a None key: they add boundaries but no players.
+    """
+    groups: dict[tuple[str, bool], dict[int, int]] = {
+        ("home", False): {}, ("away", False): {}, ("home", True): {}, ("away", True): {},
+    }
+    intervals: list[OnIceInterval] = []
+    event_index = 0
+    event_count = len(events)
+    while event_index < event_count:
+        boundary = events[event_index][0]
+        while event_index < event_count and events[event_index][0] == boundary:
+            _, delta, key = events[event_index]
+            if key is not None:
+                side, is_goalie, player_id = key
+                counts = groups[(side, is_goalie)]
+                count = counts.get(player_id, 0) + delta
+                if count:
+                    counts[player_id] = count
+                else:
+                    del counts[player_id]
+            event_index += 1
+        if event_index == event_count:
+            break
+
+        home_skaters = _active_ids(groups[("home", False)])
+        away_skaters = _active_ids(groups[("away", False)])
+        if not home_skaters and not away_skaters:
+            continue
+
+        home_goalie_ids = _active_ids(groups[("home", True)])
+        away_goalie_ids = _active_ids(groups[("away", True)])
+        intervals.append(
+            OnIceInterval(
+                game_id=game_id,
+                period=period,
+                start_s=boundary,
+                end_s=events[event_index][0],
+                home_skaters_json=json.dumps(home_skaters),
+                away_skaters_json=json.dumps(away_skaters),
+                home_goalie_player_id=home_goalie_ids[0] if home_goalie_ids else None,
+                away_goalie_player_id=away_goalie_ids[0] if away_goalie_ids else None,
+                strength_state=_derive_strength_state(home_skaters, away_skaters),
             )
+        )
+    return intervals
+
+
+def build_on_ice_intervals(game_id: int, shift_rows: Iterable[dict]) -> list[OnIceInterval]:
+    """Build intervalized on-ice representation from normalized shift rows.
+
+    Sweep line: each shift becomes a start and an end event, and the active
+    home/away skater and goalie sets are updated incrementally between
+    boundaries, so a period costs O(shifts log shifts).
+    """
+    events_by_period: dict[int, list[tuple[int, int, tuple | None]]] = {}
+    for row in shift_rows:
+        start_s = int(row.get("start_seconds", 0))
+        end_s = int(row.get("end_seconds", 0))
+        if end_s <= start_s or "period" not in row:
+            continue
+        classified = _classify_shift_row(row)
+        key = None if classified is None else (*classified, int(row["player_id"]))
+        period_events = events_by_period.setdefault(int(row["period"]), [])
+        period_events.append((start_s, 1, key))
+        period_events.append((end_s, -1, key))
+
+    intervals: list[OnIceInterval] = []
+    for period in sorted(events_by_period):
+        period_events = events_by_period[period]
+        period_events.sort(key=lambda event: event[0])
+        intervals.extend(_sweep_period(game_id, period, period_events))
     return intervals
 
 
+@dataclass
+class _PeriodIntervalIndex:
+    """Sorted intervals of one (game, period) with bisect keys.
+
+    ``prefix_max_ends[i]`` is the largest ``end_s`` among the first ``i + 1``
+    intervals; it is non-decreasing, so the first interval containing a time
+    can be found by bisecting it even when intervals overlap.
+    """
+
+    intervals: list[OnIceInterval]
+    starts: list[int]
+    prefix_max_ends: list[int]
+    slots: list[dict[str, int | None] | None]
+
+    def match(self, seconds_in_period: int) -> int:
+        """Return the index of the first interval containing the time.
+
+        Falls back to the last interval when none contains it.
+        """
+        last_started = bisect_right(self.starts, seconds_in_period) - 1
+        first_open = bisect_right(self.prefix_max_ends, seconds_in_period)
+        if first_open <= last_started:
+            return first_open
+        return len(self.intervals) - 1
+
+    def slots_for(self, index: int) -> dict[str, int | None]:
+        """Return the 12 shot slot values, decoding the skater JSON once."""
+        slots = self.slots[index]
+        if slots is None:
+            interval = self.intervals[index]
+            slots = self.slots[index] = dict(zip(
+                SHOT_SLOT_TEMPLATE_KEYS,
+                _finalize_slots(json.loads(interval.home_skaters_json), interval.home_goalie_player_id)
+                + _finalize_slots(json.loads(interval.away_skaters_json), interval.away_goalie_player_id),
+            ))
+        return slots
+
+
+def _index_intervals(intervals: Iterable[OnIceInterval]) -> dict[tuple[int, int], _PeriodIntervalIndex]:
+    grouped: dict[tuple[int, int], list[OnIceInterval]] = {}
+    for interval in intervals:
+        grouped.setdefault((interval.game_id, interval.period), []).append(interval)
+
+    index: dict[tuple[int, int], _PeriodIntervalIndex] = {}
+    for key, period_intervals in grouped.items():
+        period_intervals.sort(key=lambda i: (i.start_s, i.end_s))
+        index[key] = _PeriodIntervalIndex(
+            intervals=period_intervals,
+            starts=[interval.start_s for interval in period_intervals],
+            prefix_max_ends=list(accumulate((interval.end_s for interval in period_intervals), max)),
+            slots=[None] * len(period_intervals),
+        )
+    return index
+
+
 def attach_on_ice_slots_to_shots(shot_rows: Iterable[dict], interval_rows: Iterable[OnIceInterval]) -> list[dict]:
-    """Populate shot rows with 12 on-ice slots from intervalized shift data."""
+    """Populate shot rows with 12 on-ice slots from intervalized shift data.
+
+    Each shot takes the first interval (by start, end) of its game and period
+    that contains the shot time, or the period's last interval when none
+    does. Matching bisects the sorted interval starts, and each interval's
+    skater JSON is decoded at most once.
+    """
     intervals = list(interval_rows)
     if not intervals:
         return list(shot_rows)
 
-    interval_lookup: dict[tuple[int, int], list[OnIceInterval]] = {}
-    for interval in intervals:
-        key = (interval.game_id, interval.period)
-        interval_lookup.setdefault(key, []).append(interval)
-
-    for key in interval_lookup:
-        interval_lookup[key].sort(key=lambda i: (i.start_s, i.end_s))
+    interval_index = _index_intervals(intervals)
 
     enriched_shots: list[dict] = []
     for shot in shot_rows:
         updated_shot = dict(shot)
-        for slot_key in SHOT_SLOT_TEMPLATE_KEYS:
-            updated_shot.setdefault(slot_key, None)
-
         shot_period = int(updated_shot.get("period", 0))
         shot_seconds = clock_to_seconds(updated_shot.get("time_in_period", 0))
         shot_game_id = int(updated_shot.get("game_id", 0))
-        candidates = interval_lookup.get((shot_game_id, shot_period), [])
-
-        matched_interval = next((interval for interval in candidates if _interval_contains(interval, shot_seconds)), None)
-        if matched_interval is None and candidates:
-            matched_interval = candidates[-1]
-
-        if matched_interval is not None:
-            home_skaters = json.loads(matched_interval.home_skaters_json)
-            away_skaters = json.loads(matched_interval.away_skaters_json)
-            home_slots = _finalize_slots(home_skaters, matched_interval.home_goalie_player_id)
-            away_slots = _finalize_slots(away_skaters, matched_interval.away_goalie_player_id)
-
-            for slot_index, player_id in enumerate(home_slots, start=1):
-                updated_shot[f"home_on_ice_{slot_index}_player_id"] = player_id
-            for slot_index, player_id in enumerate(away_slots, start=1):
-                updated_shot[f"away_on_ice_{slot_index}_player_id"] = player_id
+        period_index = interval_index.get((shot_game_id, shot_period))
+
+        if period_index is not None:
+            updated_shot.update(period_index.slots_for(period_index.match(shot_seconds)))
+        else:
+            for slot_key in SHOT_SLOT_TEMPLATE_KEYS:
+                updated_shot.setdefault(slot_key, None)
 
         enriched_shots.append(updated_shot)
 
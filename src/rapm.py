@@ -1,8 +1,40 @@
-"""RAPM model scaffolding."""
+"""Sparse ridge RAPM fitted from on-ice intervals.
 
-from dataclasses import dataclass
+Every on-ice interval in the chosen strength states is a stint and gives two
+regression rows, one per attacking side. In a row, the attacking skaters'
+offense columns and the defending skaters' defense columns are 1, the target
+is the attacking side's event rate per 60 minutes, and the weight is the
+stint length in minutes. Two unpenalized intercepts absorb the home and away
+base rates. Offense and defense come from one ridge solve of the normal
+equations by preconditioned conjugate gradients, so a season never builds a
+dense matrix. Standard errors come from a game-block bootstrap of that
+solve, spread over a process pool.
+"""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Iterable, Mapping, Sequence
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import cg
+
+from database import load_season_shot_rows, load_season_stint_player_rows
 
 RAPM_MODEL_VERSION = "v1"
+RAPM_TARGETS = ("shots", "goals", "xg")
+DEFAULT_RAPM_STRENGTH_STATES = ("5v5",)
+DEFAULT_RAPM_LAMBDAS = (30.0, 100.0, 300.0, 1000.0, 3000.0)
+DEFAULT_RAPM_CV_FOLDS = 5
+DEFAULT_RAPM_BOOTSTRAP_REPLICATES = 200
+_INTERCEPT_COLUMNS = 2  # home attacking, away attacking
+_PERIOD_KEY_SPAN = 100
+_TIME_KEY_SPAN = 1 << 13  # seconds; longer than any period
+_CG_RTOL = 1e-10
+_SIDE_CODES = {"home": 0, "away": 1}
 
 
 @dataclass(frozen=True)
@@ -11,11 +43,330 @@ class RapmRating:
     player_id: int
     rapm_off: float
     rapm_def: float
-    rapm_off_se: float
-    rapm_def_se: float
+    rapm_off_se: float | None = None
+    rapm_def_se: float | None = None
     model_version: str = RAPM_MODEL_VERSION
 
 
-def fit_rapm_for_season(season: str) -> list[RapmRating]:
-    _ = season
-    return []
+@dataclass(frozen=True)
+class RapmDesign:
+    """Stint-side rows of the RAPM regression.
+
+    ``matrix`` columns are the offense block and the defense block (one
+    column per entry of ``player_ids`` each) followed by the two intercepts.
+    Row ``2 * stint`` has home attacking and row ``2 * stint + 1`` away.
+    """
+
+    matrix: sparse.csr_matrix
+    target: np.ndarray
+    weights: np.ndarray
+    row_game_ids: np.ndarray
+    player_ids: np.ndarray
+
+    @property
+    def player_count(self) -> int:
+        return len(self.player_ids)
+
+
+@dataclass(frozen=True)
+class RapmFit:
+    """Solved coefficients; ``cv_errors`` maps each lambda to held-out weighted MSE.
+
+    ``offense_se`` and ``defense_se`` stay None until
+    `bootstrap_rapm_standard_errors` fills them.
+    """
+
+    player_ids: np.ndarray
+    offense: np.ndarray
+    defense: np.ndarray
+    intercepts: np.ndarray
+    lam: float
+    cv_errors: dict[float, float]
+    offense_se: np.ndarray | None = None
+    defense_se: np.ndarray | None = None
+
+    @property
+    def coefficients(self) -> np.ndarray:
+        return np.concatenate([self.offense, self.defense, self.intercepts])
+
+    def ratings(self, season: str) -> list[RapmRating]:
+        count = len(self.player_ids)
+        offense_se = self.offense_se.tolist() if self.offense_se is not None else [None] * count
+        defense_se = self.defense_se.tolist() if self.defense_se is not None else [None] * count
+        return [
+            RapmRating(season=str(season), player_id=player_id, rapm_off=off, rapm_def=defense,
+                       rapm_off_se=off_se, rapm_def_se=def_se)
+            for player_id, off, defense, off_se, def_se in zip(
+                self.player_ids.tolist(), self.offense.tolist(), self.defense.tolist(),
+                offense_se, defense_se,
+            )
+        ]
+
+
+def _stint_keys(game_ids, periods, seconds):
+    return (game_ids * _PERIOD_KEY_SPAN + periods) * _TIME_KEY_SPAN + seconds
+
+
+def build_rapm_design(stint_player_rows, shot_rows, target: str = "shots",
+                      shot_values: Mapping[int, float] | None = None) -> RapmDesign:
+    """Build the CSR design from `load_season_stint_player_rows` and `load_season_shot_rows` tuples.
+
+    ``target`` counts every shot attempt ("shots"), goals ("goals"), or sums
+    ``shot_values`` keyed by shot_event_id ("xg"; missing shots count 0).
+    A shot belongs to the stint whose [start, end] holds its time; shots
+    outside every stint (other strength states) are dropped.
+    """
+    if target not in RAPM_TARGETS:
+        raise ValueError(f"Unknown RAPM target {target!r}; expected one of {RAPM_TARGETS}")
+    if target == "xg" and shot_values is None:
+        raise ValueError("RAPM target 'xg' needs shot_values")
+
+    members = np.asarray(
+        [(game_id, period, start_s, end_s, _SIDE_CODES[side], player_id)
+         for game_id, period, start_s, end_s, side, player_id in stint_player_rows
+         if side in _SIDE_CODES and end_s > start_s],
+        dtype=np.int64,
+    ).reshape(-1, 6)
+    game_ids, periods, starts, ends, sides, players = members.T
+
+    stint_start_keys, first_member, member_stints = np.unique(
+        _stint_keys(game_ids, periods, starts), return_index=True, return_inverse=True
+    )
+    member_stints = member_stints.reshape(-1)
+    stint_end_keys = _stint_keys(game_ids, periods, ends)[first_member]
+    stint_minutes = (ends - starts)[first_member] / 60.0
+    stint_count = len(stint_start_keys)
+
+    player_ids, member_columns = np.unique(players, return_inverse=True)
+    member_columns = member_columns.reshape(-1)
+    player_count = len(player_ids)
+
+    events = np.zeros(2 * stint_count)
+    shots = list(shot_rows)
+    if shots and stint_count:
+        shot_event_ids, shot_games, shot_periods, shot_seconds, is_home, is_goal = (
+            np.asarray([value if value is not None else 0 for value in column], dtype=np.int64)
+            for column in zip(*shots)
+        )
+        shot_keys = _stint_keys(shot_games, shot_periods, shot_seconds)
+        shot_stints = np.searchsorted(stint_start_keys, shot_keys, side="right") - 1
+        matched = shot_stints >= 0
+        matched[matched] = shot_keys[matched] <= stint_end_keys[shot_stints[matched]]
+        if target == "shots":
+            values = np.ones(len(shots))
+        elif target == "goals":
+            values = (is_goal == 1).astype(float)
+        else:
+            values = np.asarray([float(shot_values.get(shot_id, 0.0))
+                                 for shot_id in shot_event_ids.tolist()])
+        attack_rows = 2 * shot_stints[matched] + (is_home[matched] != 1)
+        events = np.bincount(attack_rows, weights=values[matched], minlength=2 * stint_count)
+
+    # A member of side d attacks in row 2s + d and defends in row 2s + (1 - d).
+    offense_rows = 2 * member_stints + sides
+    defense_rows = 2 * member_stints + (1 - sides)
+    intercept_rows = np.arange(2 * stint_count)
+    rows = np.concatenate([offense_rows, defense_rows, intercept_rows])
+    columns = np.concatenate([
+        member_columns,
+        player_count + member_columns,
+        2 * player_count + intercept_rows % 2,
+    ])
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows)), (rows, columns)),
+        shape=(2 * stint_count, 2 * player_count + _INTERCEPT_COLUMNS),
+    )
+    row_minutes = np.repeat(stint_minutes, 2)
+    return RapmDesign(
+        matrix=matrix,
+        target=events / np.where(row_minutes > 0, row_minutes, 1.0) * 60.0,
+        weights=row_minutes,
+        row_game_ids=np.repeat(stint_start_keys // (_PERIOD_KEY_SPAN * _TIME_KEY_SPAN), 2),
+        player_ids=player_ids,
+    )
+
+
+def load_rapm_design(conn, season, target: str = "shots",
+                     shot_values: Mapping[int, float] | None = None,
+                     strength_states: Sequence[str] = DEFAULT_RAPM_STRENGTH_STATES) -> RapmDesign:
+    """Load one season's stints and shots and build its `RapmDesign`."""
+    return build_rapm_design(
+        load_season_stint_player_rows(conn, season, strength_states=strength_states),
+        load_season_shot_rows(conn, season),
+        target=target,
+        shot_values=shot_values,
+    )
+
+
+def rapm_normal_equations(matrix, target, weights):
+    """Return ``(X'WX, X'Wy)`` for the weighted rows."""
+    weighted = sparse.diags(weights) @ matrix
+    return (matrix.T @ weighted).tocsr(), weighted.T @ target
+
+
+def solve_rapm_ridge(gram, rhs, lam: float, x0=None) -> np.ndarray:
+    """Solve ``(X'WX + lam * P) b = X'Wy`` where P leaves the intercepts unpenalized."""
+    penalty = np.full(gram.shape[0], float(lam))
+    penalty[-_INTERCEPT_COLUMNS:] = 0.0
+    system = (gram + sparse.diags(penalty)).tocsr()
+    diagonal = system.diagonal()
+    preconditioner = sparse.diags(1.0 / np.where(diagonal > 0, diagonal, 1.0))
+    coefficients, info = cg(system, rhs, x0=x0, rtol=_CG_RTOL,
+                            maxiter=10 * gram.shape[0], M=preconditioner)
+    if info > 0:
+        raise RuntimeError(f"RAPM ridge solve did not converge (lambda={lam})")
+    return coefficients
+
+
+def _game_folds(row_game_ids, folds):
+    games, row_games = np.unique(row_game_ids, return_inverse=True)
+    return np.arange(len(games))[row_games.reshape(-1)] % min(folds, len(games))
+
+
+def select_rapm_lambda(design: RapmDesign, lambdas: Sequence[float] = DEFAULT_RAPM_LAMBDAS,
+                       folds: int = DEFAULT_RAPM_CV_FOLDS, x0=None) -> tuple[float, dict[float, float]]:
+    """Pick lambda by game-blocked K-fold CV on held-out weighted MSE.
+
+    Games are dealt to folds in game_id order. Each fold's normal equations
+    are built once and subtracted from the full ones for its training set,
+    and each fold walks the lambda path warm-started from the previous
+    solution.
+    """
+    lambdas = sorted(float(lam) for lam in lambdas)
+    if len(lambdas) == 1 or len(np.unique(design.row_game_ids)) < 2:
+        return lambdas[len(lambdas) // 2], {}
+
+    row_folds = _game_folds(design.row_game_ids, folds)
+    full_gram, full_rhs = rapm_normal_equations(design.matrix, design.target, design.weights)
+    squared_errors = dict.fromkeys(lambdas, 0.0)
+    for fold in np.unique(row_folds).tolist():
+        held_out = row_folds == fold
+        held_matrix = design.matrix[held_out]
+        held_target = design.target[held_out]
+        held_weights = design.weights[held_out]
+        fold_gram, fold_rhs = rapm_normal_equations(held_matrix, held_target, held_weights)
+        coefficients = x0
+        for lam in lambdas:
+            coefficients = solve_rapm_ridge(full_gram - fold_gram, full_rhs - fold_rhs, lam,
+                                            x0=coefficients)
+            residuals = held_target - held_matrix @ coefficients
+            squared_errors[lam] += float(held_weights @ residuals ** 2)
+
+    total_weight = float(design.weights.sum())
+    cv_errors = {lam: error / total_weight for lam, error in squared_errors.items()}
+    return min(cv_errors, key=cv_errors.get), cv_errors
+
+
+def _warm_start_vector(design: RapmDesign, warm_start: Iterable[RapmRating]):
+    """Initial coefficients from earlier ratings (e.g. last season's); others start at 0."""
+    x0 = np.zeros(design.matrix.shape[1])
+    for side in range(_INTERCEPT_COLUMNS):
+        side_rows = slice(side, None, 2)
+        side_weight = design.weights[side_rows].sum()
+        if side_weight > 0:
+            x0[2 * design.player_count + side] = (
+                design.weights[side_rows] @ design.target[side_rows] / side_weight
+            )
+    column_of = {player_id: column for column, player_id in enumerate(design.player_ids.tolist())}
+    for rating in warm_start:
+        column = column_of.get(rating.player_id)
+        if column is not None:
+            x0[column] = rating.rapm_off
+            x0[design.player_count + column] = rating.rapm_def
+    return x0
+
+
+def fit_rapm(design: RapmDesign, lambdas: Sequence[float] = DEFAULT_RAPM_LAMBDAS,
+             cv_folds: int = DEFAULT_RAPM_CV_FOLDS,
+             warm_start: Iterable[RapmRating] = ()) -> RapmFit:
+    """Choose lambda by CV and solve the full-season ridge regression."""
+    x0 = _warm_start_vector(design, warm_start)
+    lam, cv_errors = select_rapm_lambda(design, lambdas, folds=cv_folds, x0=x0)
+    gram, rhs = rapm_normal_equations(design.matrix, design.target, design.weights)
+    coefficients = solve_rapm_ridge(gram, rhs, lam, x0=x0)
+    player_count = design.player_count
+    return RapmFit(
+        player_ids=design.player_ids,
+        offense=coefficients[:player_count],
+        defense=coefficients[player_count:2 * player_count],
+        intercepts=coefficients[2 * player_count:],
+        lam=lam,
+        cv_errors=cv_errors,
+    )
+
+
+_bootstrap_worker_state = None
+
+
+def _init_bootstrap_worker(matrix, target, weights, row_games, game_count, lam, x0):
+    global _bootstrap_worker_state
+    _bootstrap_worker_state = (matrix, target, weights, row_games, game_count, lam, x0)
+
+
+def _bootstrap_replicate(seed_sequence) -> np.ndarray:
+    """Refit on one game-block resample and return its player coefficients (worker process)."""
+    matrix, target, weights, row_games, game_count, lam, x0 = _bootstrap_worker_state
+    rng = np.random.default_rng(seed_sequence)
+    game_draws = np.bincount(rng.integers(0, game_count, game_count), minlength=game_count)
+    row_weights = weights * game_draws[row_games]
+    kept = np.flatnonzero(row_weights)
+    gram, rhs = rapm_normal_equations(matrix[kept], target[kept], row_weights[kept])
+    return solve_rapm_ridge(gram, rhs, lam, x0=x0)[:-_INTERCEPT_COLUMNS]
+
+
+def bootstrap_rapm_standard_errors(design: RapmDesign, fit: RapmFit,
+                                   replicates: int = DEFAULT_RAPM_BOOTSTRAP_REPLICATES,
+                                   seed: int = 0, workers: int | None = None) -> RapmFit:
+    """Return ``fit`` with offense/defense SEs from a game-block bootstrap.
+
+    Each replicate redraws the season's games with replacement, keeps the
+    drawn games' rows of the shared design (a game drawn twice counts
+    twice) and re-solves at ``fit.lam``, starting from ``fit``. The design
+    goes to each worker once through the pool initializer, so replicates
+    only select rows. Replicate seeds are spawned from ``seed``, so the
+    result does not depend on ``workers`` (default: CPU count; 1 runs
+    inline).
+    """
+    games, row_games = np.unique(design.row_game_ids, return_inverse=True)
+    initargs = (design.matrix, design.target, design.weights, row_games.reshape(-1),
+                len(games), fit.lam, fit.coefficients)
+    seeds = np.random.SeedSequence(seed).spawn(replicates)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_bootstrap_worker(*initargs)
+        draws = list(map(_bootstrap_replicate, seeds))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_bootstrap_worker,
+                                 initargs=initargs) as executor:
+            draws = list(executor.map(_bootstrap_replicate, seeds))
+
+    player_count = design.player_count
+    spread = np.std(np.asarray(draws), axis=0, ddof=1)
+    return replace(fit, offense_se=spread[:player_count], defense_se=spread[player_count:])
+
+
+def fit_rapm_for_season(conn, season: str, target: str = "shots",
+                        shot_values: Mapping[int, float] | None = None,
+                        strength_states: Sequence[str] = DEFAULT_RAPM_STRENGTH_STATES,
+                        lambdas: Sequence[float] = DEFAULT_RAPM_LAMBDAS,
+                        cv_folds: int = DEFAULT_RAPM_CV_FOLDS,
+                        warm_start: Iterable[RapmRating] = (),
+                        bootstrap_replicates: int = 0, seed: int = 0,
+                        workers: int | None = None) -> list[RapmRating]:
+    """Fit offense/defense RAPM for one season's skaters.
+
+    ``rapm_off`` is the player's effect on their side's event rate per 60 and
+    ``rapm_def`` on the opponent's (lower is better). Pass the previous
+    season's ratings as ``warm_start`` to start the solver near them.
+    Standard errors are filled when ``bootstrap_replicates`` is at least 2.
+    """
+    design = load_rapm_design(conn, season, target=target, shot_values=shot_values,
+                              strength_states=strength_states)
+    if design.player_count == 0:
+        return []
+    fit = fit_rapm(design, lambdas=lambdas, cv_folds=cv_folds, warm_start=warm_start)
+    if bootstrap_replicates >= 2:
+        fit = bootstrap_rapm_standard_errors(design, fit, replicates=bootstrap_replicates,
+                                             seed=seed, workers=workers)
+    return fit.ratings(season)
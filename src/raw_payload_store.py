@@ -0,0 +1,206 @@
+"""Content-addressed on-disk store for raw NHL API payloads.
+
+Payloads are serialized as canonical JSON (sorted keys, compact separators),
+gzip-compressed, and written once under ``objects/<sha[:2]>/<sha>.json.gz``
+where ``sha`` is the SHA-256 of the uncompressed JSON. A SQLite manifest
+maps ``(endpoint, game_id)`` to the object hash, the response ETag, and the
+fetch timestamp, so re-extraction after a feature change can read every
+payload locally instead of re-downloading it.
+"""
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime
+
+from database import DATABASE_DIR
+
+RAW_PAYLOAD_DIR = os.path.join(DATABASE_DIR, "raw_payloads")
+ENDPOINT_PLAY_BY_PLAY = "play-by-play"
+ENDPOINT_SHIFT_CHARTS = "shiftcharts"
+
+_MANIFEST_FILENAME = "manifest.db"
+_OBJECTS_DIRNAME = "objects"
+_OBJECT_SUFFIX = ".json.gz"
+_TMP_SUFFIX = ".tmp"
+_OBJECT_FANOUT_CHARS = 2
+_GZIP_COMPRESSLEVEL = 6
+_GZIP_MTIME = 0  # keep compressed bytes reproducible for identical payloads
+_MANIFEST_TIMEOUT_SECONDS = 30
+
+
+@dataclass(frozen=True)
+class RawPayloadEntry:
+    endpoint: str
+    game_id: int
+    sha256: str
+    etag: str | None
+    fetched_at: str
+    byte_size: int
+
+
+def _canonical_json_bytes(payload):
+    return json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+class RawPayloadStore:
+    """Read/write raw API payloads keyed by endpoint and game id.
+
+    Safe to use from several threads or processes: every manifest operation
+    opens its own short-lived SQLite connection, and objects are written to
+    a temp file and renamed into place.
+    """
+
+    def __init__(self, root_dir=RAW_PAYLOAD_DIR):
+        self.root_dir = root_dir
+        self.objects_dir = os.path.join(root_dir, _OBJECTS_DIRNAME)
+        self.manifest_path = os.path.join(root_dir, _MANIFEST_FILENAME)
+        os.makedirs(self.objects_dir, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS raw_payload_manifest (
+                    endpoint TEXT NOT NULL,
+                    game_id INTEGER NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    etag TEXT,
+                    fetched_at TEXT NOT NULL,
+                    byte_size INTEGER NOT NULL,
+                    PRIMARY KEY (endpoint, game_id)
+                )
+                """
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.manifest_path, timeout=_MANIFEST_TIMEOUT_SECONDS)
+
+    def object_path(self, sha256):
+        """Return the path of the compressed object for a content hash."""
+        return os.path.join(
+            self.objects_dir, sha256[:_OBJECT_FANOUT_CHARS], f"{sha256}{_OBJECT_SUFFIX}"
+        )
+
+    def _write_object(self, sha256, raw_bytes):
+        path = self.object_path(sha256)
+        if os.path.exists(path):
+            return os.path.getsize(path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        compressed = gzip.compress(
+            raw_bytes, compresslevel=_GZIP_COMPRESSLEVEL, mtime=_GZIP_MTIME
+        )
+        # A unique temp file per writer: threads of one process may store the
+        # same payload concurrently.
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(path), prefix=f"{sha256}.", suffix=_TMP_SUFFIX
+        )
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(compressed)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return len(compressed)
+
+    def put(self, endpoint, game_id, payload, etag=None, fetched_at=None):
+        """Store a payload and point the ``(endpoint, game_id)`` entry at it.
+
+        Re-storing an identical payload only refreshes the manifest row.
+        Returns the resulting `RawPayloadEntry`.
+        """
+        raw_bytes = _canonical_json_bytes(payload)
+        sha256 = hashlib.sha256(raw_bytes).hexdigest()
+        byte_size = self._write_object(sha256, raw_bytes)
+        entry = RawPayloadEntry(
+            endpoint=endpoint,
+            game_id=int(game_id),
+            sha256=sha256,
+            etag=etag if isinstance(etag, str) else None,
+            fetched_at=fetched_at or datetime.now().isoformat(),
+            byte_size=byte_size,
+        )
+        conn = self._connect()
+        try:
+            conn.execute(
+                """INSERT INTO raw_payload_manifest
+                       (endpoint, game_id, sha256, etag, fetched_at, byte_size)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(endpoint, game_id) DO UPDATE SET
+                       sha256 = excluded.sha256,
+                       etag = excluded.etag,
+                       fetched_at = excluded.fetched_at,
+                       byte_size = excluded.byte_size""",
+                (entry.endpoint, entry.game_id, entry.sha256, entry.etag,
+                 entry.fetched_at, entry.byte_size),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        return entry
+
+    def entry(self, endpoint, game_id):
+        """Return the manifest entry for ``(endpoint, game_id)``, or None."""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                """SELECT endpoint, game_id, sha256, etag, fetched_at, byte_size
+                   FROM raw_payload_manifest
+                   WHERE endpoint = ? AND game_id = ?""",
+                (endpoint, int(game_id)),
+            ).fetchone()
+        finally:
+            conn.close()
+        return RawPayloadEntry(*row) if row else None
+
+    def has(self, endpoint, game_id):
+        return self.entry(endpoint, game_id) is not None
+
+    def load_object(self, sha256):
+        """Return the decoded payload for a content hash, or None if missing."""
+        path = self.object_path(sha256)
+        if not os.path.exists(path):
+            return None
+        with gzip.open(path, "rb") as handle:
+            return json.loads(handle.read().decode("utf-8"))
+
+    def get(self, endpoint, game_id):
+        """Return the stored payload for ``(endpoint, game_id)``, or None."""
+        entry = self.entry(endpoint, game_id)
+        if entry is None:
+            return None
+        return self.load_object(entry.sha256)
+
+    def entries(self, endpoint):
+        """Return every manifest entry for ``endpoint``, ordered by game id."""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                """SELECT endpoint, game_id, sha256, etag, fetched_at, byte_size
+                   FROM raw_payload_manifest
+                   WHERE endpoint = ?
+                   ORDER BY game_id""",
+                (endpoint,),
+            ).fetchall()
+        finally:
+            conn.close()
+        return [RawPayloadEntry(*row) for row in rows]
+
+    def game_ids(self, endpoint):
+        """Return sorted game ids that have a stored payload for ``endpoint``."""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT game_id FROM raw_payload_manifest "
+                "WHERE endpoint = ? ORDER BY game_id",
+                (endpoint,),
+            ).fetchall()
+        finally:
+            conn.close()
+        return [row[0] for row in rows]
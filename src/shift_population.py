@@ -5,18 +5,24 @@ from typing import Callable, Iterable
 
 from database import (
     DATABASE_PATH,
+    GAME_STAGE_ON_ICE_SLOTS,
+    GAME_STAGE_SHIFTS,
     create_connection,
     ensure_xg_schema,
     ensure_player_database_schema,
-    game_has_current_shift_data,
+    get_current_game_stages,
+    get_game_ids_with_current_stages,
     get_shift_backfill_game_ids,
     insert_shift_records,
     load_game_shots,
     load_game_team_ids,
     load_player_positions,
+    record_game_stages,
     replace_game_on_ice_intervals,
+    unit_of_work,
     update_shot_event_on_ice_slots,
 )
+from nhl_api import ConcurrentFetcher
 from on_ice_builder import attach_on_ice_slots_to_shots, build_on_ice_intervals
 from shifts import (
     extract_shift_player_ids,
@@ -27,6 +33,9 @@ from shifts import (
 
 FetchShiftRows = Callable[[int], list[dict]]
 
+_SHIFT_STAGES = (GAME_STAGE_SHIFTS, GAME_STAGE_ON_ICE_SLOTS)
+_SHIFT_FETCH_MAX_IN_FLIGHT = 4  # shift charts prefetched ahead of the writer
+
 
 @dataclass(frozen=True)
 class ShiftPopulationResult:
@@ -63,26 +72,33 @@ def populate_shift_data_for_game(
     conn,
     game_id: int,
     fetch_fn: FetchShiftRows = fetch_shift_rows_for_game,
+    shift_records=None,
 ) -> ShiftPopulationResult:
-    """Populate shifts, intervals, and shot on-ice slots for one game."""
-    if game_has_current_shift_data(conn, game_id):
+    """Populate shifts, intervals, and shot on-ice slots for one game.
+
+    Skipped when game_pipeline_state already records both shift stages at
+    their current versions. ``shift_records``, when given, is an already
+    computed `parse_shift_rows` result (e.g. from a parse worker process)
+    and replaces fetch and parse.
+    """
+    if get_current_game_stages(conn, game_id).issuperset(_SHIFT_STAGES):
         return ShiftPopulationResult(games_scanned=1, games_skipped=1)
 
-    raw_rows = fetch_fn(game_id)
-    if not raw_rows:
-        return ShiftPopulationResult(games_scanned=1, games_skipped=1)
+    if shift_records is None:
+        raw_rows = fetch_fn(game_id)
+        if not raw_rows:
+            return ShiftPopulationResult(games_scanned=1, games_skipped=1)
 
-    home_team_id, away_team_id = load_game_team_ids(conn, game_id)
-    player_positions = load_player_positions(conn, extract_shift_player_ids(raw_rows))
-    shift_records = _valid_shift_records(
-        parse_shift_rows(
+        home_team_id, away_team_id = load_game_team_ids(conn, game_id)
+        player_positions = load_player_positions(conn, extract_shift_player_ids(raw_rows))
+        shift_records = parse_shift_rows(
             game_id,
             raw_rows,
             home_team_id=home_team_id,
             away_team_id=away_team_id,
             player_positions=player_positions,
         )
-    )
+    shift_records = _valid_shift_records(shift_records)
     if not shift_records:
         return ShiftPopulationResult(games_scanned=1, games_skipped=1)
     if not _has_resolved_shift_context(shift_records):
@@ -96,18 +112,11 @@ def populate_shift_data_for_game(
     shot_rows = load_game_shots(conn, game_id)
     enriched_shots = attach_on_ice_slots_to_shots(shot_rows, intervals)
 
-    try:
-        shift_rows_inserted = insert_shift_records(conn, shift_records, commit=False)
-        interval_rows_inserted = replace_game_on_ice_intervals(
-            conn, game_id, intervals, commit=False
-        )
-        shot_rows_updated = update_shot_event_on_ice_slots(
-            conn, enriched_shots, commit=False
-        )
-        conn.commit()
-    except Exception:
-        conn.rollback()
-        raise
+    with unit_of_work(conn):
+        shift_rows_inserted = insert_shift_records(conn, shift_records)
+        interval_rows_inserted = replace_game_on_ice_intervals(conn, game_id, intervals)
+        shot_rows_updated = update_shot_event_on_ice_slots(conn, enriched_shots)
+        record_game_stages(conn, game_id, _SHIFT_STAGES)
 
     return ShiftPopulationResult(
         games_scanned=1,
@@ -122,13 +131,39 @@ def populate_shift_data_for_games(
     conn,
     game_ids: Iterable[int],
     fetch_fn: FetchShiftRows = fetch_shift_rows_for_game,
+    max_in_flight: int = _SHIFT_FETCH_MAX_IN_FLIGHT,
 ) -> ShiftPopulationResult:
-    """Populate shift-derived tables for a sequence of games."""
+    """Populate shift-derived tables for a sequence of games.
+
+    Shift charts for up to ``max_in_flight`` upcoming games are fetched on
+    worker threads while the current game is built and written; games whose
+    shift stages are already current are never fetched. ``fetch_fn`` must be
+    safe to call from several threads (the default draws from the shared
+    stats API token bucket). Games are still written one at a time, in
+    order, so the totals match a sequential run.
+    """
+    game_ids = [int(game_id) for game_id in game_ids]
     result = ShiftPopulationResult()
-    for game_id in game_ids:
-        result = result.plus(
-            populate_shift_data_for_game(conn, int(game_id), fetch_fn=fetch_fn)
-        )
+    if max_in_flight <= 1:
+        for game_id in game_ids:
+            result = result.plus(
+                populate_shift_data_for_game(conn, game_id, fetch_fn=fetch_fn)
+            )
+        return result
+
+    complete_ids = get_game_ids_with_current_stages(conn, _SHIFT_STAGES)
+    fetch_ids = [game_id for game_id in game_ids if game_id not in complete_ids]
+    with ConcurrentFetcher(fetch_fn, max_in_flight=max_in_flight) as fetcher:
+        prefetched = fetcher.imap(fetch_ids)
+        for game_id in game_ids:
+            if game_id in complete_ids:
+                game_result = populate_shift_data_for_game(conn, game_id, fetch_fn=fetch_fn)
+            else:
+                _, raw_rows = next(prefetched)
+                game_result = populate_shift_data_for_game(
+                    conn, game_id, fetch_fn=lambda _game_id, rows=raw_rows: rows
+                )
+            result = result.plus(game_result)
     return result
 
 
@@ -160,6 +195,7 @@ def backfill_shift_data(
     limit=None,
     game_id=None,
     fetch_fn: FetchShiftRows = fetch_shift_rows_for_game,
+    max_in_flight: int = _SHIFT_FETCH_MAX_IN_FLIGHT,
 ) -> ShiftPopulationResult:
     """Open the database and populate shift-derived tables for selected games."""
     conn = create_connection(database_path)
@@ -169,6 +205,8 @@ def backfill_shift_data(
         game_ids = select_shift_backfill_game_ids(
             conn, all_games=all_games, limit=limit, game_id=game_id
         )
-        return populate_shift_data_for_games(conn, game_ids, fetch_fn=fetch_fn)
+        return populate_shift_data_for_games(
+            conn, game_ids, fetch_fn=fetch_fn, max_in_flight=max_in_flight
+        )
     finally:
         conn.close()
@@ -4,7 +4,8 @@ from dataclasses import dataclass
 from typing import Iterable, List
 
 from database import _SHIFT_SCHEMA_VERSION
-from nhl_api import _api_get
+from nhl_api import _api_get, acquire_stats_api_token, get_raw_payload_store
+from raw_payload_store import ENDPOINT_PLAY_BY_PLAY, ENDPOINT_SHIFT_CHARTS
 
 SHIFT_TIME_DRIFT_TOLERANCE_SECONDS = 1
 SHIFT_SCHEMA_VERSION = _SHIFT_SCHEMA_VERSION
@@ -147,15 +148,47 @@ def shift_record_has_resolved_context(record: ShiftRecord) -> bool:
     return record.position is not None and record.team_side in VALID_SHIFT_TEAM_SIDES
 
 
+def _shift_rows_from_payload(payload) -> list[dict]:
+    if isinstance(payload, list):
+        return payload
+    return payload.get("data", [])
+
+
 def fetch_shift_rows_for_game(game_id: int) -> list[dict]:
-    """Fetch raw shift rows for a single game from NHL shift charts endpoint."""
+    """Fetch raw shift rows for a single game from NHL shift charts endpoint.
+
+    Reads through the raw payload store when one is configured. A payload is
+    only stored once the game's final play-by-play is stored too, so shift
+    charts for in-progress games are never frozen in the cache. API requests
+    draw from the shared stats API token bucket, so concurrent callers stay
+    polite.
+    """
+    store = get_raw_payload_store()
+    if store is not None:
+        cached = store.get(ENDPOINT_SHIFT_CHARTS, game_id)
+        if cached is not None:
+            return _shift_rows_from_payload(cached)
+
     url = _NHL_SHIFT_CHARTS_URL_TEMPLATE.format(game_id=game_id)
+    acquire_stats_api_token()
     payload = _api_get(url)
     if payload is None:
         return []
-    if isinstance(payload, list):
-        return payload
-    return payload.get("data", [])
+    rows = _shift_rows_from_payload(payload)
+    if store is not None and rows and store.has(ENDPOINT_PLAY_BY_PLAY, game_id):
+        store.put(ENDPOINT_SHIFT_CHARTS, game_id, payload)
+    return rows
+
+
+def load_stored_shift_rows(store, game_id: int) -> list[dict]:
+    """Return a game's shift rows from a raw payload store, never the API.
+
+    Empty when the store holds no shift charts for the game.
+    """
+    payload = store.get(ENDPOINT_SHIFT_CHARTS, game_id)
+    if payload is None:
+        return []
+    return _shift_rows_from_payload(payload)
 
 
 def parse_shift_rows(
@@ -10,7 +10,10 @@ from database import (
     _quote_identifier,
     PlayerMetadataNotFound,
     backfill_player_metadata,
+    create_connection,
     create_core_dimension_tables,
+    create_schedule_tables,
+    create_game_pipeline_state_table,
     create_collection_log_table,
     create_player_game_features_table,
     create_player_game_stats_table,
@@ -18,7 +21,18 @@ from database import (
     create_on_ice_intervals_table,
     create_shot_events_table,
     create_shifts_table,
-    create_table,
+    create_raw_events_table,
+    get_collected_game_ids,
+    get_incomplete_game_stages,
+    get_current_game_stages,
+    record_game_stages,
+    GAME_STAGE_RAW,
+    GAME_STAGE_METADATA,
+    GAME_STAGE_SHOT_EVENTS,
+    GAME_STAGE_ON_ICE_SLOTS,
+    GAME_STAGE_SHIFT_QUALITY,
+    GAME_STAGE_PLAYER_FEATURES,
+    GAME_STAGE_PLAYER_STATS,
     ensure_player_database_schema,
     deduplicate_existing_tables,
     fix_incomplete_collection_log,
@@ -26,6 +40,8 @@ from database import (
     game_has_current_shift_data,
     get_missing_player_ids,
     get_random_game_id,
+    get_schedule_days,
+    get_schedule_refresh_start,
     insert_shift_records,
     insert_data,
     delete_game_shot_events,
@@ -39,6 +55,8 @@ from database import (
     populate_player_game_features,
     populate_player_game_stats,
     replace_game_on_ice_intervals,
+    replace_schedule_week,
+    unit_of_work,
     upsert_game_metadata,
     upsert_player,
     upsert_players,
@@ -66,36 +84,173 @@ def test_quote_identifier_rejects_invalid_names(bad_name):
         _quote_identifier(bad_name)
 
 
-def test_create_table_is_idempotent_and_has_unique_constraint(conn):
-    create_table(conn, "2023020001")
-    create_table(conn, "2023020001")
+def test_create_raw_events_table_is_idempotent_and_indexed(conn):
+    create_raw_events_table(conn)
+    create_raw_events_table(conn)
 
     cur = conn.cursor()
-    cur.execute(
-        "SELECT name FROM sqlite_master WHERE type='table' AND name='game_2023020001'"
-    )
-    assert cur.fetchone() is not None
+    cur.execute("PRAGMA table_info(raw_events)")
+    cols = [row[1] for row in cur.fetchall()]
+    assert cols == ["game_id", "event_idx", "period", "time", "event", "description"]
 
-    cur.execute(
-        "SELECT sql FROM sqlite_master WHERE type='table' AND name='game_2023020001'"
-    )
-    schema = cur.fetchone()[0]
-    assert "UNIQUE(period, time, event, description)" in schema
+    cur.execute("PRAGMA index_list(raw_events)")
+    indexes = {row[1]: row[2] for row in cur.fetchall()}
+    assert indexes["idx_raw_events_dedup"] == 1
+    assert "idx_raw_events_game_event" in indexes
 
 
 def test_insert_data_inserts_rows_and_ignores_duplicates(conn):
-    create_table(conn, "2023020002")
+    create_raw_events_table(conn)
     rows = [
         {"period": 1, "time": "10:00", "event": "SHOT", "description": "One"},
         {"period": 1, "time": "10:00", "event": "SHOT", "description": "One"},
     ]
 
     insert_data(conn, "2023020002", rows)
+    insert_data(conn, "2023020002", rows)
 
     cur = conn.cursor()
-    cur.execute("SELECT period, time, event, description FROM game_2023020002")
+    cur.execute(
+        "SELECT game_id, period, time, event, description FROM raw_events"
+    )
     fetched = cur.fetchall()
-    assert fetched == [(1, "10:00", "SHOT", "One")]
+    assert fetched == [(2023020002, 1, "10:00", "SHOT", "One")]
+
+
+def test_insert_data_appends_new_plays_after_existing_ones(conn):
+    create_raw_events_table(conn)
+    insert_data(
+        conn, 2023020002,
+        [{"period": 1, "time": "10:00", "event": "SHOT", "description": "One"}],
+    )
+    insert_data(
+        conn, 2023020002,
+        [
+            {"period": 1, "time": "10:00", "event": "SHOT", "description": "One"},
+            {"period": 1, "time": "12:00", "event": "GOAL", "description": "Two"},
+        ],
+    )
+
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT event FROM raw_events WHERE game_id = ? ORDER BY event_idx",
+        (2023020002,),
+    )
+    assert [row[0] for row in cur.fetchall()] == ["SHOT", "GOAL"]
+
+
+def test_insert_data_rejects_unknown_columns(conn):
+    create_raw_events_table(conn)
+    with pytest.raises(ValueError):
+        insert_data(conn, 2023020002, [{"period": 1, "bogus": "x"}])
+
+
+def test_create_connection_read_write_uses_wal_and_tuned_pragmas(tmp_path):
+    connection = create_connection(str(tmp_path / "nhl.db"), cache_size_kib=1024)
+    try:
+        cur = connection.cursor()
+        assert cur.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert cur.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert cur.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+        assert cur.execute("PRAGMA cache_size").fetchone()[0] == -1024
+    finally:
+        connection.close()
+
+
+def test_create_connection_read_only_reads_alongside_writer(tmp_path):
+    database_path = str(tmp_path / "nhl.db")
+    writer = create_connection(database_path)
+    create_collection_log_table(writer)
+    mark_date_collected(writer, "2024-01-01", 1, 1)
+    writer.execute(
+        "INSERT INTO collection_log (date, games_found, games_collected) VALUES ('2024-01-02', 1, 0)"
+    )  # left uncommitted: WAL readers still see the last committed state
+
+    reader = create_connection(database_path, read_only=True)
+    try:
+        assert reader.execute("SELECT COUNT(*) FROM collection_log").fetchone()[0] == 1
+        with pytest.raises(sqlite3.OperationalError):
+            reader.execute("DELETE FROM collection_log")
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_create_connection_read_only_returns_none_for_missing_file(tmp_path):
+    assert create_connection(str(tmp_path / "missing.db"), read_only=True) is None
+
+
+def test_unit_of_work_commits_once_at_end(tmp_path):
+    database_path = str(tmp_path / "nhl.db")
+    writer = create_connection(database_path)
+    create_collection_log_table(writer)
+    reader = create_connection(database_path, read_only=True)
+    try:
+        with unit_of_work(writer):
+            mark_date_collected(writer, "2024-01-01", 1, 1)
+            mark_date_collected(writer, "2024-01-02", 1, 1)
+            assert reader.execute("SELECT COUNT(*) FROM collection_log").fetchone()[0] == 0
+        assert reader.execute("SELECT COUNT(*) FROM collection_log").fetchone()[0] == 2
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_unit_of_work_rolls_back_on_error(conn):
+    create_collection_log_table(conn)
+    with pytest.raises(RuntimeError):
+        with unit_of_work(conn):
+            mark_date_collected(conn, "2024-01-01", 1, 1)
+            raise RuntimeError("boom")
+
+    assert conn.execute("SELECT COUNT(*) FROM collection_log").fetchone()[0] == 0
+    mark_date_collected(conn, "2024-01-02", 1, 1)  # commits normally again
+    conn.rollback()
+    assert conn.execute("SELECT COUNT(*) FROM collection_log").fetchone()[0] == 1
+
+
+def test_unit_of_work_nested_failure_only_undoes_inner_block(conn):
+    create_collection_log_table(conn)
+    with unit_of_work(conn):
+        mark_date_collected(conn, "2024-01-01", 1, 1)
+        with pytest.raises(RuntimeError):
+            with unit_of_work(conn):
+                mark_date_collected(conn, "2024-01-02", 1, 1)
+                raise RuntimeError("boom")
+
+    rows = conn.execute("SELECT date FROM collection_log").fetchall()
+    assert rows == [("2024-01-01",)]
+
+
+def test_get_schedule_days_includes_empty_dates_and_moved_games(conn):
+    create_schedule_tables(conn)
+    replace_schedule_week(conn, {
+        "2024-01-01": [(11, "OFF"), (10, "OFF")],
+        "2024-01-02": [],
+        "2024-01-03": [(12, "PPD")],
+    }, "2024-01-08")
+    replace_schedule_week(conn, {"2024-01-09": [(12, "FUT")]}, None)
+
+    assert get_schedule_days(conn, date(2024, 1, 1), date(2024, 1, 9)) == [
+        ("2024-01-01", [10, 11]),
+        ("2024-01-02", []),
+        ("2024-01-03", []),
+        ("2024-01-09", [12]),
+    ]
+
+
+def test_get_schedule_refresh_start_covers_gaps_and_live_window(conn):
+    create_schedule_tables(conn)
+    start = date(2024, 1, 1)
+    assert get_schedule_refresh_start(conn, start, date(2024, 6, 1)) == start
+
+    replace_schedule_week(conn, {"2024-01-01": [(1, "OFF")]}, "2024-01-08")
+    replace_schedule_week(conn, {"2024-01-08": [(2, "OFF")]}, "2024-10-01")
+
+    # The off-season gap up to nextStartDate counts as fetched.
+    assert get_schedule_refresh_start(conn, start, date(2024, 12, 1)) == date(2024, 10, 1)
+    assert get_schedule_refresh_start(conn, start, date(2024, 3, 1)) == date(2024, 3, 1)
+    assert get_schedule_refresh_start(conn, date(2023, 12, 1), date(2024, 3, 1)) == date(2023, 12, 1)
 
 
 def test_create_collection_log_table_creates_expected_columns(conn):
@@ -111,13 +266,13 @@ def test_is_game_collected_false_when_table_missing(conn):
     assert is_game_collected(conn, 2023020999) is False
 
 
-def test_is_game_collected_false_when_table_empty(conn):
-    create_table(conn, "2023020003")
+def test_is_game_collected_false_when_game_has_no_rows(conn):
+    create_raw_events_table(conn)
     assert is_game_collected(conn, 2023020003) is False
 
 
 def test_is_game_collected_true_when_table_has_rows(conn):
-    create_table(conn, "2023020004")
+    create_raw_events_table(conn)
     insert_data(
         conn,
         "2023020004",
@@ -173,11 +328,10 @@ def test_is_date_range_collected_false_when_any_date_missing(conn):
     assert is_date_range_collected(conn, date(2024, 1, 1), date(2024, 1, 3)) is False
 
 
-def test_deduplicate_existing_tables_removes_duplicates_and_adds_unique_constraint(conn):
-    cur = conn.cursor()
+def _create_legacy_game_table(cur, game_id, rows):
     cur.execute(
-        """
-        CREATE TABLE game_2023020005 (
+        f"""
+        CREATE TABLE game_{game_id} (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             period INTEGER,
             time TEXT,
@@ -187,40 +341,94 @@ def test_deduplicate_existing_tables_removes_duplicates_and_adds_unique_constrai
         """
     )
     cur.executemany(
-        "INSERT INTO game_2023020005 (period, time, event, description) VALUES (?, ?, ?, ?)",
+        f"INSERT INTO game_{game_id} (period, time, event, description) VALUES (?, ?, ?, ?)",
+        rows,
+    )
+
+
+def test_deduplicate_existing_tables_migrates_legacy_tables_into_raw_events(conn):
+    cur = conn.cursor()
+    _create_legacy_game_table(
+        cur,
+        2023020005,
         [
             (1, "01:00", "SHOT", "Dup"),
             (1, "01:00", "SHOT", "Dup"),
             (2, "02:00", "GOAL", "Unique"),
         ],
     )
+    _create_legacy_game_table(cur, 2023020006, [(1, "03:00", "HIT", "Once")])
     conn.commit()
 
     deduplicate_existing_tables(conn)
 
-    cur.execute("SELECT COUNT(*) FROM game_2023020005")
-    assert cur.fetchone()[0] == 2
-
     cur.execute(
-        "SELECT sql FROM sqlite_master WHERE type='table' AND name='game_2023020005'"
+        "SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'game_%'"
     )
-    schema = cur.fetchone()[0]
-    assert "UNIQUE(period, time, event, description)" in schema
+    assert cur.fetchall() == []
+    cur.execute(
+        "SELECT game_id, event FROM raw_events ORDER BY game_id, event_idx"
+    )
+    assert cur.fetchall() == [
+        (2023020005, "SHOT"),
+        (2023020005, "GOAL"),
+        (2023020006, "HIT"),
+    ]
+    assert get_collected_game_ids(conn) == [2023020005, 2023020006]
 
 
-def test_deduplicate_existing_tables_leaves_already_unique_tables_untouched(conn):
-    create_table(conn, "2023020006")
+def test_deduplicate_existing_tables_resumes_after_partial_migration(conn):
+    create_raw_events_table(conn)
     insert_data(
         conn,
-        "2023020006",
-        [{"period": 1, "time": "01:00", "event": "SHOT", "description": "Once"}],
+        2023020005,
+        [{"period": 1, "time": "01:00", "event": "SHOT", "description": "Done"}],
     )
+    cur = conn.cursor()
+    _create_legacy_game_table(cur, 2023020006, [(1, "01:00", "SHOT", "Left")])
+    conn.commit()
 
     deduplicate_existing_tables(conn)
+    deduplicate_existing_tables(conn)
 
-    cur = conn.cursor()
-    cur.execute("SELECT COUNT(*) FROM game_2023020006")
-    assert cur.fetchone()[0] == 1
+    cur.execute("SELECT game_id, description FROM raw_events ORDER BY game_id")
+    assert cur.fetchall() == [(2023020005, "Done"), (2023020006, "Left")]
+
+
+def test_deduplicate_existing_tables_appends_after_existing_raw_events(conn):
+    create_raw_events_table(conn)
+    insert_data(
+        conn,
+        2023020005,
+        [
+            {"period": 1, "time": "01:00", "event": "SHOT", "description": "Kept"},
+            {"period": 1, "time": "02:00", "event": "HIT", "description": "Kept"},
+        ],
+    )
+    cur = conn.cursor()
+    _create_legacy_game_table(
+        cur,
+        2023020005,
+        [
+            (1, "01:00", "SHOT", "Kept"),
+            (2, "05:00", "GOAL", "Legacy"),
+            (3, "06:00", "SHOT", "Legacy"),
+        ],
+    )
+    conn.commit()
+
+    deduplicate_existing_tables(conn)
+
+    cur.execute(
+        "SELECT event_idx, event, description FROM raw_events "
+        "WHERE game_id = 2023020005 ORDER BY event_idx"
+    )
+    assert cur.fetchall() == [
+        (0, "SHOT", "Kept"),
+        (1, "HIT", "Kept"),
+        (3, "GOAL", "Legacy"),
+        (4, "SHOT", "Legacy"),
+    ]
 
 
 def test_deduplicate_existing_tables_ignores_games_dimension_table(conn):
@@ -528,6 +736,77 @@ def test_get_random_game_id_season_accepts_int(conn):
     _seed_game_env(conn)
     _seed_game(conn, 700, "20232024", n_shots=5)
     assert get_random_game_id(conn, season=20232024, seed=0) == 700
+
+
+def test_get_incomplete_game_stages_reports_missing_stages_per_game(conn):
+    _seed_game_env(conn)
+    create_raw_events_table(conn)
+    create_game_pipeline_state_table(conn)
+    play = [{"period": 1, "time": "00:10", "event": "SHOT", "description": "x"}]
+    for game_id in (900, 901, 902, 903):
+        insert_data(conn, game_id, play)
+    _seed_game(conn, 900, "20232024", n_shots=2)
+    _seed_game(conn, 901, "20232024", n_shots=2, version="v2")
+    upsert_game_metadata(
+        conn, 902, game_date="2023-10-15", season="20232024",
+        home_team_id=1, away_team_id=2,
+    )
+    _seed_game(conn, 999, "20232024", n_shots=1)  # no raw rows: not collected
+
+    assert get_incomplete_game_stages(conn) == {
+        901: (GAME_STAGE_SHOT_EVENTS,),
+        902: (GAME_STAGE_SHOT_EVENTS,),
+        903: (GAME_STAGE_METADATA, GAME_STAGE_SHOT_EVENTS),
+    }
+
+
+def test_get_incomplete_game_stages_empty_without_pipeline_state_table(conn):
+    _seed_game_env(conn)
+    assert get_incomplete_game_stages(conn) == {}
+
+
+def test_create_game_pipeline_state_table_seeds_stages_from_fact_tables(conn):
+    _seed_game_env(conn)
+    create_raw_events_table(conn)
+    insert_data(conn, 910, [{"period": 1, "event": "SHOT"}])
+    _seed_game(conn, 910, "20232024", n_shots=1)
+    _seed_game(conn, 911, "20232024", n_shots=1, version="v2")
+
+    create_game_pipeline_state_table(conn)
+
+    assert get_current_game_stages(conn, 910) == {
+        GAME_STAGE_RAW, GAME_STAGE_METADATA, GAME_STAGE_SHOT_EVENTS,
+    }
+    assert get_current_game_stages(conn, 911) == {GAME_STAGE_METADATA}
+
+
+def test_game_pipeline_state_treats_older_stage_versions_as_stale(conn):
+    _seed_game_env(conn)
+    create_game_pipeline_state_table(conn)
+    record_game_stages(conn, 920, (GAME_STAGE_RAW, GAME_STAGE_METADATA))
+    conn.execute(
+        "UPDATE game_pipeline_state SET stage_version = 'v0' WHERE stage = ?",
+        (GAME_STAGE_METADATA,),
+    )
+
+    assert get_current_game_stages(conn, 920) == {GAME_STAGE_RAW}
+    assert get_incomplete_game_stages(conn) == {
+        920: (GAME_STAGE_METADATA, GAME_STAGE_SHOT_EVENTS),
+    }
+
+
+def test_delete_game_shot_events_clears_shot_and_slot_stages(conn):
+    _seed_game_env(conn)
+    create_game_pipeline_state_table(conn)
+    _seed_game(conn, 930, "20232024", n_shots=1)
+    assert GAME_STAGE_SHOT_EVENTS in get_current_game_stages(conn, 930)
+
+    record_game_stages(conn, 930, (GAME_STAGE_ON_ICE_SLOTS, GAME_STAGE_SHIFT_QUALITY))
+
+    delete_game_shot_events(conn, 930)
+
+    # Clearing on_ice_slots also clears the shift_quality stage computed from it.
+    assert get_current_game_stages(conn, 930) == {GAME_STAGE_METADATA}
 
 
 def test_load_game_shots_returns_rows_ordered_by_event_idx(conn):
@@ -783,6 +1062,7 @@ def test_replace_game_on_ice_intervals_is_idempotent(conn):
     insert_shift_records(conn, [shift])
     assert replace_game_on_ice_intervals(conn, 2025020001, [interval]) == 1
     assert replace_game_on_ice_intervals(conn, 2025020001, [interval]) == 1
+    create_game_pipeline_state_table(conn)
     assert game_has_current_shift_data(conn, 2025020001)
 
     cur = conn.cursor()
@@ -817,6 +1097,7 @@ def test_game_has_current_shift_data_rejects_unresolved_positions(conn):
         "away_goalie_player_id": None,
         "strength_state": "1v0",
     }])
+    create_game_pipeline_state_table(conn)
 
     assert not game_has_current_shift_data(conn, 2025020001)
 
@@ -1010,12 +1291,14 @@ def test_backfill_player_metadata_marks_unavailable_on_not_found(conn):
             raise PlayerMetadataNotFound(player_id)
         return _player_row(player_id)
 
+    upserted_ids = []
     attempted, upserted, unavailable = backfill_player_metadata(
-        conn, fake_fetch, batch_size=1
+        conn, fake_fetch, batch_size=1, upserted_ids=upserted_ids
     )
     assert attempted == 2
     assert upserted == 1
     assert unavailable == 1
+    assert upserted_ids == [101]
 
     cur = conn.cursor()
     cur.execute("SELECT player_id FROM player_metadata_unavailable ORDER BY player_id")
@@ -1211,6 +1494,55 @@ def test_populate_player_game_stats_clears_stale_rows_after_reprocess(conn):
     assert [r[0] for r in cur.fetchall()] == [101, 201]
 
 
+def _player_stat_groups(conn, game_id):
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT player_id, position_group, shots FROM player_game_stats "
+        "WHERE game_id = ? ORDER BY player_id",
+        (game_id,),
+    )
+    return cur.fetchall()
+
+
+def test_populate_player_game_stats_only_rebuilds_dirty_games(conn):
+    ensure_player_database_schema(conn)
+    create_shot_events_table(conn)
+    create_game_pipeline_state_table(conn)
+    for game_id in (916, 917):
+        upsert_game_metadata(conn, game_id, game_date="2023-10-15", season="20232024",
+                             home_team_id=1, away_team_id=2)
+        _seed_shot(conn, game_id, 1, shooter_id=101, goalie_id=201, shooting_team_id=1)
+
+    assert populate_player_game_stats(conn) == 4
+    assert GAME_STAGE_PLAYER_STATS in get_current_game_stages(conn, 916)
+    assert populate_player_game_stats(conn) == 0
+
+    # Rows of clean games are left alone; new shot events dirty only their game.
+    conn.execute("UPDATE player_game_stats SET shots = 99 WHERE game_id = 916")
+    _seed_shot(conn, 917, 2, shooter_id=102, goalie_id=201, shooting_team_id=1)
+    assert GAME_STAGE_PLAYER_STATS not in get_current_game_stages(conn, 917)
+    assert populate_player_game_stats(conn) == 3
+    assert _player_stat_groups(conn, 916) == [(101, "F", 99), (201, "G", 99)]
+    assert _player_stat_groups(conn, 917) == [(101, "F", 1), (102, "F", 1), (201, "G", 0)]
+
+    # A position backfill regroups only the given players' rows, in place.
+    upsert_player(conn, _player_row(101, position="D", team_id=1))
+    upsert_player(conn, _player_row(102, position="D", team_id=1))
+    record_game_stages(conn, 916, (GAME_STAGE_PLAYER_FEATURES,))
+    assert populate_player_game_stats(conn) == 0
+    assert _player_stat_groups(conn, 916)[0] == (101, "F", 99)
+    assert populate_player_game_stats(conn, regroup_player_ids=[101]) == 0
+    assert _player_stat_groups(conn, 916) == [(101, "D", 99), (201, "G", 99)]
+    assert _player_stat_groups(conn, 917) == [(101, "D", 1), (102, "F", 1), (201, "G", 0)]
+    assert GAME_STAGE_PLAYER_FEATURES not in get_current_game_stages(conn, 916)
+
+    assert populate_player_game_stats(conn, game_ids=[916]) == 2
+    assert _player_stat_groups(conn, 916)[0] == (101, "D", 1)
+    conn.execute("UPDATE player_game_stats SET shots = 99")
+    assert populate_player_game_stats(conn, full_rebuild=True) == 5
+    assert _player_stat_groups(conn, 917)[1] == (102, "D", 1)
+
+
 def _insert_player_game_stat(conn, player_id, game_id, position_group="F"):
     cur = conn.cursor()
     cur.execute(
@@ -1250,22 +1582,95 @@ def test_populate_player_game_features_covers_stats_and_orders_games(conn):
     ]
 
 
-def test_populate_player_game_features_sets_unsupported_columns_null(conn):
-    ensure_player_database_schema(conn)
-    upsert_game_metadata(conn, 922, game_date="2023-10-10", season="20232024",
-                         home_team_id=1, away_team_id=2)
-    _insert_player_game_stat(conn, 101, 922)
+def _insert_player_game_toi(conn, player_id, game_id, toi_seconds, goals=0,
+                            position_group="F"):
+    conn.execute(
+        """INSERT OR REPLACE INTO player_game_stats
+              (player_id, game_id, team_id, position_group, toi_seconds, goals)
+           VALUES (?, ?, 1, ?, ?, ?)""",
+        (player_id, game_id, position_group, toi_seconds, goals),
+    )
+    conn.commit()
 
-    populate_player_game_features(conn)
 
+def _rolling_features(conn, player_id):
     cur = conn.cursor()
     cur.execute(
-        """SELECT toi_rank_pos_5g, toi_rank_pos_10g,
+        """SELECT game_number_for_player, toi_rank_pos_5g, toi_rank_pos_10g,
                   toi_rolling_mean_5g, points_rolling_10g
            FROM player_game_features
-           WHERE player_id = 101 AND game_id = 922"""
+           WHERE player_id = ?
+           ORDER BY game_number_for_player""",
+        (player_id,),
     )
-    assert cur.fetchone() == (None, None, None, None)
+    return cur.fetchall()
+
+
+def test_populate_player_game_features_computes_rolling_windows(conn):
+    ensure_player_database_schema(conn)
+    for offset in range(12):
+        game_id = 940 + offset
+        upsert_game_metadata(conn, game_id, game_date=f"2023-10-{10 + offset:02d}",
+                             season="20232024", home_team_id=1, away_team_id=2)
+        # Player 101 leads the forwards in odd games, trails player 102 in even ones.
+        _insert_player_game_toi(conn, 101, game_id, 60 * (offset + 1), goals=offset % 2)
+        _insert_player_game_toi(conn, 102, game_id, 60 * (offset + 1) + (-1 if offset % 2 else 1))
+    _insert_player_game_toi(conn, 101, 952, 0, goals=1)  # no shift data yet
+    upsert_game_metadata(conn, 952, game_date="2023-10-22", season="20232024",
+                         home_team_id=1, away_team_id=2)
+
+    populate_player_game_features(conn)
+
+    rows = _rolling_features(conn, 101)
+    assert [row[0] for row in rows] == list(range(1, 14))
+    assert rows[0] == (1, 2.0, 2.0, 60.0, None)
+    assert rows[4] == (5, pytest.approx(1.6), pytest.approx(1.6), 180.0, None)
+    assert rows[11] == (12, 1.4, 1.5, 600.0, None)
+    # Games without TOI drop out of the TOI windows.
+    assert rows[12] == (13, 1.5, pytest.approx(13 / 9), 630.0, None)
+    issues = validate_player_game_features_quality(conn)
+    assert all(value == 0 for value in issues.values()), issues
+
+
+def test_populate_player_game_features_rewrites_only_from_dirty_games(conn):
+    ensure_player_database_schema(conn)
+    create_game_pipeline_state_table(conn)
+
+    def add_game(game_id, day, players=(101, 102)):
+        upsert_game_metadata(conn, game_id, game_date=f"2023-10-{day:02d}",
+                             season="20232024", home_team_id=1, away_team_id=2)
+        for player_id in players:
+            _insert_player_game_toi(conn, player_id, game_id, 600 + player_id, goals=1)
+        record_game_stages(conn, game_id, (GAME_STAGE_PLAYER_STATS,))
+
+    for offset in range(6):
+        add_game(960 + offset, 10 + offset)
+    assert populate_player_game_features(conn) == 12
+    assert GAME_STAGE_PLAYER_FEATURES in get_current_game_stages(conn, 960)
+    assert populate_player_game_features(conn) == 0
+
+    # A new latest game writes only its own rows.
+    conn.execute("UPDATE player_game_features SET toi_rolling_mean_5g = 1 WHERE game_id = 965")
+    add_game(966, 16)
+    assert populate_player_game_features(conn) == 2
+    assert _rolling_features(conn, 101)[5][3] == 1.0
+    assert _rolling_features(conn, 101)[6] == (7, 2.0, 2.0, 701.0, None)
+
+    # A backfilled earlier game renumbers everything after it.
+    add_game(959, 9, players=(101,))
+    assert populate_player_game_features(conn) == 8
+    assert [row[0] for row in _rolling_features(conn, 101)] == list(range(1, 9))
+    assert _rolling_features(conn, 101)[6][3] == 701.0
+
+    # Removed stats rows drop their features and shift later game numbers.
+    conn.execute("DELETE FROM player_game_stats WHERE player_id = 102 AND game_id = 962")
+    record_game_stages(conn, 962, (GAME_STAGE_PLAYER_STATS,))
+    assert populate_player_game_features(conn) == 9
+    cur = conn.cursor()
+    cur.execute("SELECT game_id, game_number_for_player FROM player_game_features "
+                "WHERE player_id = 102 ORDER BY game_id")
+    assert cur.fetchall() == [(960, 1), (961, 2), (963, 3), (964, 4), (965, 5), (966, 6)]
+    assert populate_player_game_features(conn, full_refresh=True) == 14
 
 
 def test_populate_player_game_features_is_idempotent(conn):
@@ -1382,7 +1787,7 @@ def test_validate_player_game_features_quality_reports_stale_versions(conn):
     assert report["stale_feature_set_version_rows"] == 1
 
 
-def test_validate_player_game_features_quality_reports_unsupported_values(conn):
+def test_validate_player_game_features_quality_reports_invalid_values(conn):
     ensure_player_database_schema(conn)
     upsert_game_metadata(conn, 928, game_date="2023-10-10", season="20232024",
                          home_team_id=1, away_team_id=2)
@@ -1391,13 +1796,30 @@ def test_validate_player_game_features_quality_reports_unsupported_values(conn):
 
     cur = conn.cursor()
     cur.execute(
-        "UPDATE player_game_features SET toi_rolling_mean_5g = ?",
-        (123.0,),
+        "UPDATE player_game_features SET toi_rank_pos_5g = ?",
+        (0.0,),
     )
     conn.commit()
 
     report = validate_player_game_features_quality(conn)
 
+    assert report["invalid_player_game_feature_value_rows"] == 1
+
+
+def test_validate_player_game_features_quality_reports_unsupported_values(conn):
+    ensure_player_database_schema(conn)
+    upsert_game_metadata(conn, 930, game_date="2023-10-10", season="20232024",
+                         home_team_id=1, away_team_id=2)
+    _insert_player_game_toi(conn, 101, 930, 600, goals=1)
+    populate_player_game_features(conn)
+    assert validate_player_game_features_quality(conn)[
+        "unsupported_player_game_feature_value_rows"] == 0
+
+    conn.execute("UPDATE player_game_features SET points_rolling_10g = 1")
+    conn.commit()
+
+    report = validate_player_game_features_quality(conn)
+
     assert report["unsupported_player_game_feature_value_rows"] == 1
 
 
@@ -1419,4 +1841,5 @@ def test_validate_player_database_readiness_passes_supported_player_tables(conn)
     assert report["player_game_pairs_missing_stats"] == 0
     assert report["missing_player_game_feature_rows"] == 0
     assert report["stale_feature_set_version_rows"] == 0
+    assert report["invalid_player_game_feature_value_rows"] == 0
     assert report["unsupported_player_game_feature_value_rows"] == 0
@@ -1,3 +1,4 @@
+import random
 import sqlite3
 
 import pytest
@@ -6,20 +7,27 @@ from database import (
     _GAME_CONTEXT_SCHEMA_VERSION,
     _VENUE_BIAS_Z_SCORE_THRESHOLD,
     create_core_dimension_tables,
+    create_team_games_table,
     create_game_context_table,
     create_venue_bias_corrections_table,
     create_venue_bias_diagnostics_table,
     create_shot_events_table,
+    create_game_pipeline_state_table,
+    create_venue_shot_sums_tables,
+    delete_game_shot_events,
     ensure_xg_schema,
     upsert_game_metadata,
     upsert_team,
     game_has_metadata,
     game_has_context,
     populate_game_context,
+    populate_game_contexts,
     compute_venue_season_stats,
     compute_league_season_stats,
     populate_venue_diagnostics,
     populate_venue_bias_corrections,
+    populate_venue_shot_sums,
+    load_venue_season_shot_sums,
     load_game_shots_with_venue_correction,
     validate_game_context_quality,
     _migrate_games_add_venue_columns,
@@ -101,6 +109,49 @@ def test_upsert_game_metadata_with_venue(conn):
     assert row == ("Scotiabank Arena", "Toronto", "-05:00")
 
 
+
+def _team_games(conn):
+    cur = conn.cursor()
+    cur.execute("SELECT team_id, game_date, game_id, is_home FROM team_games ORDER BY team_id, game_id")
+    return cur.fetchall()
+
+
+def test_upsert_game_metadata_keeps_team_games_in_sync(conn):
+    upsert_game_metadata(conn, 2024020001, "2024-10-08", 20242025, 10, 8)
+    upsert_game_metadata(conn, 2024020002, "2024-10-09", 20242025, 6, None)
+    assert _team_games(conn) == [
+        (6, "2024-10-09", 2024020002, 1),
+        (8, "2024-10-08", 2024020001, 0),
+        (10, "2024-10-08", 2024020001, 1),
+    ]
+
+    upsert_game_metadata(conn, 2024020001, "2024-10-10", 20242025, 8, 6)
+
+    assert _team_games(conn) == [
+        (6, "2024-10-10", 2024020001, 0),
+        (6, "2024-10-09", 2024020002, 1),
+        (8, "2024-10-10", 2024020001, 1),
+    ]
+
+
+def test_create_team_games_table_seeds_from_existing_games(conn):
+    upsert_game_metadata(conn, 2024020001, "2024-10-08", 20242025, 10, 8)
+    conn.execute("DROP TABLE team_games")
+
+    create_team_games_table(conn)
+    create_team_games_table(conn)
+
+    assert _team_games(conn) == [
+        (8, "2024-10-08", 2024020001, 0),
+        (10, "2024-10-08", 2024020001, 1),
+    ]
+    cur = conn.cursor()
+    cur.execute(
+        "EXPLAIN QUERY PLAN SELECT game_date FROM team_games "
+        "WHERE team_id = 10 AND game_date < '2024-10-09' ORDER BY game_date DESC LIMIT 1"
+    )
+    assert "idx_team_games_team_date" in " ".join(row[-1] for row in cur.fetchall())
+
 # ── game_has_metadata ───────────────────────────────────────────────
 
 
@@ -191,6 +242,20 @@ def test_populate_game_context_idempotent(conn):
     assert cur.fetchone()[0] == 1
 
 
+def test_populate_game_context_replaces_stale_version_row(conn):
+    upsert_game_metadata(conn, 2024020001, "2024-10-08", 20242025, 10, 8)
+    populate_game_context(conn, 2024020001)
+    conn.execute("UPDATE game_context SET context_schema_version = 'v0'")
+    assert not game_has_context(conn, 2024020001)
+
+    populate_game_context(conn, 2024020001)
+
+    assert game_has_context(conn, 2024020001)
+    cur = conn.cursor()
+    cur.execute("SELECT COUNT(*) FROM game_context WHERE game_id = 2024020001")
+    assert cur.fetchone()[0] == 1
+
+
 def test_populate_game_context_missing_game(conn):
     populate_game_context(conn, 9999)  # no games row, should not raise
 
@@ -228,6 +293,49 @@ def test_populate_game_context_rest_advantage(conn):
     assert row[2] == -2  # home has 2 fewer rest days
 
 
+
+def _context_rows(conn):
+    cur = conn.cursor()
+    cur.execute("SELECT * FROM game_context ORDER BY game_id")
+    return cur.fetchall()
+
+
+def test_populate_game_contexts_matches_per_game_builder(conn):
+    rng = random.Random(22)
+    for index in range(300):
+        home, away = rng.sample([1, 6, 8, 10, 22, 23, 99], 2)  # 99 has no arena
+        game_date = None if index % 97 == 0 else f"2024-{rng.randint(10, 12)}-{rng.randint(10, 28)}"
+        upsert_game_metadata(conn, 2024020001 + index, game_date, 20242025, home, away)
+    cur = conn.cursor()
+    cur.execute("SELECT game_id FROM games")
+    game_ids = [row[0] for row in cur.fetchall()]
+    for game_id in game_ids:
+        populate_game_context(conn, game_id)
+    expected = _context_rows(conn)
+    conn.execute("DELETE FROM game_context")
+
+    assert populate_game_contexts(conn) == 300
+    assert _context_rows(conn) == expected
+    assert populate_game_contexts(conn) == 0
+
+    conn.execute("UPDATE game_context SET context_schema_version = 'v0' WHERE game_id % 2 = 0")
+    assert populate_game_contexts(conn) == 150
+    assert populate_game_contexts(conn, game_ids=[2024020001]) == 1
+    assert _context_rows(conn) == expected
+
+
+def test_populate_game_contexts_refreshes_stale_pipeline_stage():
+    connection = sqlite3.connect(":memory:")
+    create_core_dimension_tables(connection)
+    ensure_xg_schema(connection)
+    upsert_game_metadata(connection, 2024020001, "2024-10-08", 20242025, 10, 8)
+    upsert_game_metadata(connection, 2024020002, "2024-10-09", 20242025, 10, 6)
+
+    assert populate_game_contexts(connection) == 2
+    assert populate_game_contexts(connection) == 0
+    assert game_has_context(connection, 2024020002)
+    assert _context_rows(connection)[1][1:3] == (1, None)
+
 # ── games table venue migration ─────────────────────────────────────
 
 
@@ -388,6 +496,125 @@ def test_populate_venue_diagnostics_idempotent(conn):
     assert cur.fetchone()[0] == 1
 
 
+def _reference_venue_stats(shots):
+    located = [(x, y, d) for x, y, d in shots if y is not None]
+    if not located:
+        return {"total_shots": 0}
+    xs = [x for x, _, _ in located]
+    ys = [y for _, y, _ in located]
+    distances = [d for _, _, d in located if d is not None]
+    return {
+        "total_shots": len(located),
+        "avg_distance": sum(distances) / len(distances) if distances else None,
+        "x_coord_mean": sum(xs) / len(xs),
+        "x_coord_stddev": _stddev(xs, sum(xs) / len(xs)),
+        "y_coord_mean": sum(ys) / len(ys),
+        "y_coord_stddev": _stddev(ys, sum(ys) / len(ys)),
+    }
+
+
+def test_venue_stats_match_per_venue_reference(conn):
+    rng = random.Random(24)
+    venues = ["Arena A", "Arena B", "Arena C", None]
+    shots_by_venue = {venue: [] for venue in venues}
+    for game_id in range(1, 41):
+        venue = venues[game_id % len(venues)]
+        season = "20242025" if game_id <= 36 else "20232024"
+        upsert_game_metadata(conn, game_id, "2024-10-08", season, 10, 8, venue_name=venue)
+        for event_idx in range(rng.randint(0, 12)):
+            x = rng.choice([None, rng.uniform(-99, 99)])
+            y = rng.choice([None, rng.uniform(-42, 42), rng.uniform(-42, 42)])
+            d = rng.choice([None, rng.uniform(5, 90), rng.uniform(5, 90)])
+            _insert_shot_for_venue(conn, game_id, event_idx, x, y, d)
+            if season == "20242025" and x is not None:
+                shots_by_venue[venue].append((x, y, d))
+
+    for venue in venues[:-1]:
+        stats = compute_venue_season_stats(conn, venue, "20242025")
+        expected = _reference_venue_stats(shots_by_venue[venue])
+        assert stats["total_shots"] == expected["total_shots"]
+        for key, value in expected.items():
+            assert stats[key] == pytest.approx(value)
+
+    league = compute_league_season_stats(conn, "20242025")
+    all_shots = [shot for shots in shots_by_venue.values() for shot in shots]
+    expected = _reference_venue_stats(all_shots)
+    assert league["total_shots"] == expected["total_shots"]
+    for key in ("avg_distance", "x_coord_mean", "y_coord_mean"):
+        assert league[key] == pytest.approx(expected[key])
+    venue_counts = [len(shots_by_venue[venue]) for venue in venues[:-1]]
+    venue_distances = [
+        sum(distances) / len(distances)
+        for distances in (
+            [d for _, _, d in shots_by_venue[venue] if d is not None]
+            for venue in venues[:-1]
+        )
+        if distances
+    ]
+    count_mean = sum(venue_counts) / len(venue_counts)
+    distance_mean = sum(venue_distances) / len(venue_distances)
+    assert league["venue_shot_count_mean"] == pytest.approx(count_mean)
+    assert league["venue_shot_count_stddev"] == pytest.approx(_stddev(venue_counts, count_mean))
+    assert league["venue_avg_distance_mean"] == pytest.approx(distance_mean)
+    assert league["venue_avg_distance_stddev"] == pytest.approx(
+        _stddev(venue_distances, distance_mean))
+
+    assert populate_venue_diagnostics(conn, "20242025") == league
+    cur = conn.cursor()
+    cur.execute("SELECT venue_name, total_shots FROM venue_bias_diagnostics ORDER BY venue_name")
+    assert cur.fetchall() == [
+        (venue, _reference_venue_stats(shots_by_venue[venue])["total_shots"])
+        for venue in venues[:-1]
+    ]
+
+
+def test_populate_venue_shot_sums_merges_only_dirty_seasons(conn):
+    create_venue_shot_sums_tables(conn)
+    create_game_pipeline_state_table(conn)
+    upsert_game_metadata(conn, 1, "2023-10-08", "20232024", 10, 8, venue_name="Arena A")
+    upsert_game_metadata(conn, 2, "2024-10-08", "20242025", 10, 8, venue_name="Arena A")
+    upsert_game_metadata(conn, 3, "2024-10-09", "20242025", 6, 5, venue_name="Arena B")
+    _insert_shot_for_venue(conn, 1, 1, 60.0, 1.0, 40.0)
+    _insert_shot_for_venue(conn, 2, 1, 70.0, 10.0, 30.0)
+    _insert_shot_for_venue(conn, 3, 1, 75.0, -5.0, None)
+
+    assert populate_venue_shot_sums(conn) == ["20232024", "20242025"]
+    assert populate_venue_shot_sums(conn) == []
+
+    # A new game of the current season only dirties that season.
+    upsert_game_metadata(conn, 4, "2024-10-10", "20242025", 10, 6, venue_name="Arena A")
+    _insert_shot_for_venue(conn, 4, 1, 80.0, 5.0, 20.0)
+    _insert_shot_for_venue(conn, 4, 2, 40.0, None, 50.0)
+    assert populate_venue_shot_sums(conn) == ["20242025"]
+
+    stored = load_venue_season_shot_sums(conn, "20242025")
+    scanned = compute_league_season_stats(conn, "20242025")
+    assert set(stored) == {"Arena A", "Arena B"}
+    assert stored["Arena A"]["shots"] == 2
+    assert stored["Arena A"]["located_shots"] == 3
+    league = populate_venue_diagnostics(conn, "20242025", venue_sums=stored)
+    assert league == pytest.approx(scanned)
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT total_shots, avg_distance, x_coord_mean, x_coord_stddev, "
+        "y_coord_mean, y_coord_stddev FROM venue_bias_diagnostics "
+        "WHERE venue_name = 'Arena A' AND season = '20242025'"
+    )
+    expected = compute_venue_season_stats(conn, "Arena A", "20242025")
+    assert cur.fetchone() == pytest.approx((
+        expected["total_shots"], expected["avg_distance"],
+        expected["x_coord_mean"], expected["x_coord_stddev"],
+        expected["y_coord_mean"], expected["y_coord_stddev"],
+    ))
+
+    # Deleted shots are retracted from the season totals.
+    delete_game_shot_events(conn, 4)
+    assert populate_venue_shot_sums(conn) == ["20242025"]
+    assert load_venue_season_shot_sums(conn, "20242025")["Arena A"]["shots"] == 1
+    assert populate_venue_shot_sums(conn, full_refresh=True) == ["20232024", "20242025"]
+    assert load_venue_season_shot_sums(conn, "20232024")["Arena A"]["x_sum"] == 60.0
+
+
 def test_populate_venue_bias_corrections_skips_small_samples(conn):
     upsert_game_metadata(conn, 1, "2024-10-08", "20242025", 10, 8, venue_name="Arena A")
     _insert_shot_for_venue(conn, 1, 1, 70.0, 10.0, 30.0)
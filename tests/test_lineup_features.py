@@ -0,0 +1,193 @@
+import json
+import random
+import sqlite3
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from database import (
+    GAME_STAGE_ON_ICE_SLOTS,
+    GAME_STAGE_SHIFT_QUALITY,
+    SEASON_SHIFT_COLUMNS,
+    ensure_player_database_schema,
+    ensure_xg_schema,
+    get_current_game_stages,
+    insert_shift_records,
+    populate_player_game_on_ice,
+    record_game_stages,
+    replace_game_on_ice_intervals,
+    replace_rapm_player_ratings,
+    upsert_game_metadata,
+)
+from lineup_features import (
+    PlayerRatingVector,
+    compute_shift_quality_features,
+    populate_shift_quality_features,
+)
+from on_ice_builder import build_on_ice_intervals
+
+
+def _random_shift_rows(rng, game_id):
+    rows = []
+    for period in (1, 2):
+        for side, base_player in (("home", 100), ("away", 200)):
+            rows.append((game_id, period, 0, 1200, base_player + 99, side, "G"))
+            for player_offset in range(10):
+                clock = rng.randint(0, 60)
+                while clock < 1200:
+                    length = rng.randint(5, 70)
+                    rows.append((game_id, period, clock, min(clock + length, 1200),
+                                 base_player + player_offset, side, rng.choice(["C", "D"])))
+                    clock += length + rng.randint(0, 150)
+        rows.append((game_id, period, 300, 400, 1, None, "C"))
+    return rows
+
+
+def _intervals_and_members(shift_rows):
+    by_game = {}
+    for row in shift_rows:
+        by_game.setdefault(row[0], []).append(dict(zip(SEASON_SHIFT_COLUMNS, row)))
+    intervals = [interval for game_id, rows in sorted(by_game.items())
+                 for interval in build_on_ice_intervals(game_id, rows)]
+    members = [
+        (i.game_id, i.period, i.start_s, i.end_s, side, player_id)
+        for i in intervals
+        for side, skaters in (("home", i.home_skaters_json), ("away", i.away_skaters_json))
+        for player_id in json.loads(skaters)
+    ]
+    return intervals, members
+
+
+def _reference_features(shift_rows, intervals, ratings):
+    offense = dict(zip(ratings.player_ids.tolist(), ratings.offense.tolist()))
+    defense = dict(zip(ratings.player_ids.tolist(), ratings.defense.tolist()))
+    expected = []
+    for game_id, period, start, end, player_id, side, position in shift_rows:
+        if side not in ("home", "away") or end <= start or position == "G":
+            continue
+        sums = [[0.0, 0.0], [0.0, 0.0], [0.0, 0.0], [0.0, 0.0]]
+        for i in intervals:
+            if (i.game_id, i.period) != (game_id, period) or not start <= i.start_s < end:
+                continue
+            own = json.loads(i.home_skaters_json if side == "home" else i.away_skaters_json)
+            other = json.loads(i.away_skaters_json if side == "home" else i.home_skaters_json)
+            mates = [p for p in own if p != player_id]
+            length = i.end_s - i.start_s
+            for index, (group, table) in enumerate(
+                    ((mates, offense), (mates, defense), (other, offense), (other, defense))):
+                if group:
+                    sums[index][0] += length * sum(table.get(p, 0.0) for p in group) / len(group)
+                    sums[index][1] += length
+        expected.append((game_id, period, start, end, player_id,
+                         *[total / weight if weight else None for total, weight in sums]))
+    return expected
+
+
+def test_shift_quality_features_match_reference():
+    rng = random.Random(19)
+    shift_rows = [row for game_id in (2024020002, 2024020001)
+                  for row in _random_shift_rows(rng, game_id)]
+    intervals, members = _intervals_and_members(shift_rows)
+    rated = np.arange(100, 110)  # away skaters and goalies are unrated
+    ratings = PlayerRatingVector(rated, np.linspace(-1, 1, 10), np.linspace(2, 0, 10))
+
+    features = compute_shift_quality_features(shift_rows, members, ratings)
+
+    expected = _reference_features(shift_rows, intervals, ratings)
+    assert sorted(row[:5] for row in features) == sorted(row[:5] for row in expected)
+    by_key = {row[:5]: row[5:] for row in features}
+    for row in expected:
+        assert by_key[row[:5]] == pytest.approx(row[5:])
+
+
+def test_shift_quality_features_are_null_without_teammates_or_opponents():
+    shift_rows = [
+        (1, 1, 0, 60, 10, "home", "C"),
+        (1, 1, 0, 30, 11, "home", "D"),
+        (1, 1, 0, 60, 30, "home", "G"),
+    ]
+    members = [
+        (1, 1, 0, 30, "home", 10), (1, 1, 0, 30, "home", 11),
+        (1, 1, 30, 60, "home", 10),
+    ]
+    ratings = PlayerRatingVector(np.array([10, 11]), np.array([1.0, 3.0]), np.array([0.5, 1.5]))
+
+    features = compute_shift_quality_features(shift_rows, members, ratings)
+
+    assert features == [
+        (1, 1, 0, 60, 10, 3.0, 1.5, None, None),
+        (1, 1, 0, 30, 11, 1.0, 0.5, None, None),
+    ]
+    assert compute_shift_quality_features([], members, ratings) == []
+
+
+def _seed_shift_game(conn, game_id, season="20242025"):
+    upsert_game_metadata(conn, game_id, game_date="2024-10-10", season=season,
+                         home_team_id=22, away_team_id=10)
+    shift_rows = [
+        (game_id, 1, 0, 60, player_id, side, position)
+        for player_id, side, position in [
+            (1, "home", "C"), (2, "home", "D"), (30, "home", "G"),
+            (11, "away", "C"), (12, "away", "D"), (40, "away", "G"),
+        ]
+    ] + [(game_id, 1, 60, 120, 3, "home", "C"), (game_id, 1, 60, 120, 11, "away", "C")]
+    insert_shift_records(conn, [
+        {"game_id": game_id, "player_id": player_id, "team_id": 22 if side == "home" else 10,
+         "team_side": side, "position": position, "period": period,
+         "start_seconds": start, "end_seconds": end}
+        for _, period, start, end, player_id, side, position in shift_rows
+    ])
+    intervals, _ = _intervals_and_members(shift_rows)
+    replace_game_on_ice_intervals(conn, game_id, intervals)
+    record_game_stages(conn, game_id, (GAME_STAGE_ON_ICE_SLOTS,))
+
+
+def _features(conn, player_id):
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT game_id, start_seconds, qot_off, qot_def, qoc_off, qoc_def "
+        "FROM shift_quality_features WHERE focal_player_id = ? ORDER BY game_id, start_seconds",
+        (player_id,),
+    )
+    return cur.fetchall()
+
+
+def test_populate_shift_quality_features_refreshes_incrementally():
+    conn = sqlite3.connect(":memory:")
+    ensure_player_database_schema(conn)
+    ensure_xg_schema(conn)
+    _seed_shift_game(conn, 2024020001)
+    _seed_shift_game(conn, 2023020001, season="20232024")
+    replace_rapm_player_ratings(conn, "20242025", "v1", [
+        {"season": "20242025", "player_id": player_id, "rapm_off": off, "rapm_def": defense,
+         "rapm_off_se": None, "rapm_def_se": None, "model_version": "v1"}
+        for player_id, off, defense in [(1, 1.0, -1.0), (2, 2.0, -2.0), (11, 4.0, 0.5)]
+    ])
+
+    summary = populate_shift_quality_features(conn, "20242025")
+
+    assert summary == {"games_refreshed": 1, "feature_rows_inserted": 6}
+    assert _features(conn, 1) == [(2024020001, 0, 2.0, -2.0, 2.0, 0.25)]
+    assert _features(conn, 11) == [
+        (2024020001, 0, 0.0, 0.0, 1.5, -1.5),
+        (2024020001, 60, None, None, 0.0, 0.0),
+    ]
+    assert GAME_STAGE_SHIFT_QUALITY in get_current_game_stages(conn, 2024020001)
+    assert GAME_STAGE_SHIFT_QUALITY not in get_current_game_stages(conn, 2023020001)
+    assert populate_shift_quality_features(conn, "20242025") == {
+        "games_refreshed": 0, "feature_rows_inserted": 0,
+    }
+
+    # Rebuilding a game's on-ice slots makes its features stale again.
+    record_game_stages(conn, 2024020001, (GAME_STAGE_ON_ICE_SLOTS,))
+    assert populate_shift_quality_features(conn, "20242025")["games_refreshed"] == 1
+
+    populate_player_game_on_ice(conn)
+    summary = populate_shift_quality_features(conn, "20242025", rating_source="toi",
+                                              full_refresh=True)
+    assert summary == {"games_refreshed": 1, "feature_rows_inserted": 6}
+    # Player 2 played 60s in one game, player 11 120s.
+    assert _features(conn, 1) == [(2024020001, 0, 1.0, 1.0, 1.5, 1.5)]
+    with pytest.raises(ValueError):
+        populate_shift_quality_features(conn, "20242025", rating_source="war")
@@ -6,12 +6,15 @@ from unittest.mock import patch, MagicMock
 import pytest
 
 import main
+import nhl_api
+import shift_population
 from database import (
     create_connection, create_collection_log_table,
     mark_date_collected, ensure_xg_schema,
     ensure_player_database_schema,
-    create_table, insert_data,
+    create_raw_events_table, insert_data,
 )
+from raw_payload_store import ENDPOINT_PLAY_BY_PLAY, ENDPOINT_SHIFT_CHARTS, RawPayloadStore
 
 
 class _UnclosableConn:
@@ -30,18 +33,26 @@ class _UnclosableConn:
 def _in_memory_conn():
     conn = _UnclosableConn(sqlite3.connect(":memory:"))
     create_collection_log_table(conn)
+    create_raw_events_table(conn)
     ensure_player_database_schema(conn)
     ensure_xg_schema(conn)
     return conn
 
 
+@pytest.fixture(autouse=True)
+def _isolated_raw_payload_store(monkeypatch, tmp_path):
+    monkeypatch.setattr(main, "RAW_PAYLOAD_DIR", str(tmp_path / "raw_payloads"))
+    monkeypatch.setattr(nhl_api, "_raw_payload_store", None)
+
+
 @pytest.fixture(autouse=True)
 def _disable_shift_population(monkeypatch):
     monkeypatch.setattr(
         main,
         "populate_shift_data_for_game",
-        lambda connection, game_id: SimpleNamespace(games_populated=0),
+        lambda connection, game_id, **kwargs: SimpleNamespace(games_populated=0),
     )
+    monkeypatch.setattr(main, "fetch_shift_rows_for_game", lambda game_id: [])
 
 
 def _simple_full_pbp(game_id, home_id=10, away_id=20):
@@ -82,6 +93,14 @@ def _simple_full_pbp(game_id, home_id=10, away_id=20):
     }
 
 
+def _with_final_states(schedule, next_start_date):
+    """Build a get_weekly_schedule_games result in which every game is final."""
+    return (
+        {day: [(game_id, "OFF") for game_id in ids] for day, ids in schedule.items()},
+        next_start_date,
+    )
+
+
 def _patch_datetime(end_date):
     """Return a mock datetime module that delegates real operations to datetime."""
     mock_dt = MagicMock()
@@ -92,18 +111,43 @@ def _patch_datetime(end_date):
     return mock_dt
 
 
+class _RecordingFetcher:
+    def __init__(self, fetch_fn):
+        self.fetch_fn = fetch_fn
+        self.requested = []
+
+    def fetch_all(self, game_ids):
+        self.requested.extend(game_ids)
+        return {game_id: self.fetch_fn(game_id) for game_id in game_ids}
+
+
+def test_fetch_schedule_day_prefetches_shifts_only_for_finished_games():
+    states = {1: "OFF", 2: "LIVE", 3: "FUT", 5: "FINAL"}
+    fetcher = _RecordingFetcher(lambda game_id: {"id": game_id, "gameState": states[game_id]})
+    shift_fetcher = _RecordingFetcher(lambda game_id: [])
+
+    day = main._fetch_schedule_day(
+        ("2024-10-10", [1, 2, 3, 4, 5]), fetcher, shift_fetcher,
+        complete_ids={4, 5}, shift_complete_ids={5},
+    )
+
+    assert fetcher.requested == [1, 2, 3]
+    assert shift_fetcher.requested == [1, 4]
+    assert set(day["shift_rows"]) == {1, 4}
+
+
 @patch("main.get_full_play_by_play")
-@patch("main.get_weekly_schedule")
+@patch("main.get_weekly_schedule_games")
 @patch("main.deduplicate_existing_tables")
 @patch("main.create_connection")
 def test_main_uses_weekly_schedule_instead_of_daily(
     mock_conn, mock_dedup, mock_weekly, mock_full_pbp,
 ):
-    """main() should call get_weekly_schedule, not get_game_ids_for_date."""
+    """main() should fetch weekly schedules, not get_game_ids_for_date."""
     conn = _in_memory_conn()
     mock_conn.return_value = conn
 
-    mock_weekly.return_value = (
+    mock_weekly.return_value = _with_final_states(
         {"2007-10-03": [2007020001]},
         None,
     )
@@ -117,7 +161,7 @@ def test_main_uses_weekly_schedule_instead_of_daily(
 
 
 @patch("main.get_full_play_by_play")
-@patch("main.get_weekly_schedule")
+@patch("main.get_weekly_schedule_games")
 @patch("main.deduplicate_existing_tables")
 @patch("main.create_connection")
 def test_main_advances_by_next_start_date(
@@ -127,10 +171,10 @@ def test_main_advances_by_next_start_date(
     conn = _in_memory_conn()
     mock_conn.return_value = conn
 
-    mock_weekly.side_effect = [
+    mock_weekly.side_effect = [_with_final_states(*week) for week in [
         ({"2007-10-03": [1], "2007-10-04": [2]}, "2007-10-08"),
         ({"2007-10-08": [3]}, None),
-    ]
+    ]]
     mock_full_pbp.return_value = _simple_full_pbp(1)
 
     with patch("main.datetime", _patch_datetime(datetime.date(2007, 10, 10))):
@@ -141,7 +185,7 @@ def test_main_advances_by_next_start_date(
 
 
 @patch("main.get_full_play_by_play")
-@patch("main.get_weekly_schedule")
+@patch("main.get_weekly_schedule_games")
 @patch("main.deduplicate_existing_tables")
 @patch("main.create_connection")
 def test_main_skips_dates_outside_range(
@@ -151,7 +195,7 @@ def test_main_skips_dates_outside_range(
     conn = _in_memory_conn()
     mock_conn.return_value = conn
 
-    mock_weekly.return_value = (
+    mock_weekly.return_value = _with_final_states(
         {
             "2007-10-03": [1],
             "2007-10-04": [2],
@@ -169,7 +213,7 @@ def test_main_skips_dates_outside_range(
 
 @patch("main.mark_date_collected")
 @patch("main.get_full_play_by_play")
-@patch("main.get_weekly_schedule")
+@patch("main.get_weekly_schedule_games")
 @patch("main.deduplicate_existing_tables")
 @patch("main.create_connection")
 def test_main_marks_each_date_collected(
@@ -179,7 +223,7 @@ def test_main_marks_each_date_collected(
     conn = _in_memory_conn()
     mock_conn.return_value = conn
 
-    mock_weekly.return_value = (
+    mock_weekly.return_value = _with_final_states(
         {
             "2007-10-03": [1, 2],
             "2007-10-04": [3],
@@ -198,7 +242,86 @@ def test_main_marks_each_date_collected(
 
 
 @patch("main.get_full_play_by_play")
-@patch("main.get_weekly_schedule")
+@patch("main.get_weekly_schedule_games")
+@patch("main.deduplicate_existing_tables")
+@patch("main.create_connection")
+def test_main_writes_days_in_schedule_order_across_weeks(
+    mock_conn, mock_dedup, mock_weekly, mock_full_pbp,
+):
+    conn = _in_memory_conn()
+    mock_conn.return_value = conn
+
+    mock_weekly.side_effect = [_with_final_states(*week) for week in [
+        ({"2007-10-04": [2], "2007-10-03": [1]}, "2007-10-08"),
+        ({"2007-10-08": [3], "2007-10-09": []}, None),
+    ]]
+    mock_full_pbp.side_effect = _simple_full_pbp
+
+    with patch("main.datetime", _patch_datetime(datetime.date(2007, 10, 10))):
+        main.main()
+
+    cur = conn.cursor()
+    cur.execute("SELECT date, games_collected FROM collection_log ORDER BY rowid")
+    assert cur.fetchall() == [
+        ("2007-10-03", 1), ("2007-10-04", 1), ("2007-10-08", 1), ("2007-10-09", 0),
+    ]
+
+
+@patch("main.get_full_play_by_play")
+@patch("main.get_weekly_schedule_games")
+@patch("main.deduplicate_existing_tables")
+@patch("main.create_connection")
+def test_main_reraises_fetch_stage_errors_without_marking_the_day(
+    mock_conn, mock_dedup, mock_weekly, mock_full_pbp,
+):
+    conn = _in_memory_conn()
+    mock_conn.return_value = conn
+
+    mock_weekly.return_value = _with_final_states({"2007-10-03": [1]}, None)
+    mock_full_pbp.side_effect = RuntimeError("network down")
+
+    with patch("main.datetime", _patch_datetime(datetime.date(2007, 10, 5))):
+        with pytest.raises(RuntimeError, match="network down"):
+            main.main()
+
+    cur = conn.cursor()
+    cur.execute("SELECT COUNT(*) FROM collection_log")
+    assert cur.fetchone()[0] == 0
+
+
+@patch("main.get_full_play_by_play")
+@patch("main.get_weekly_schedule_games")
+@patch("main.deduplicate_existing_tables")
+@patch("main.create_connection")
+def test_main_reads_stored_schedule_and_refetches_only_live_window(
+    mock_conn, mock_dedup, mock_weekly, mock_full_pbp,
+):
+    conn = _in_memory_conn()
+    mock_conn.return_value = conn
+
+    mock_weekly.side_effect = [_with_final_states(*week) for week in [
+        ({"2007-10-03": [1], "2007-10-04": [2]}, "2007-10-10"),
+        ({"2007-10-10": [3]}, "2007-10-17"),
+    ]]
+    mock_full_pbp.side_effect = _simple_full_pbp
+    with patch("main.datetime", _patch_datetime(datetime.date(2007, 10, 12))):
+        main.main()
+
+    mock_weekly.reset_mock()
+    mock_weekly.side_effect = None
+    mock_weekly.return_value = _with_final_states({"2007-10-17": [4]}, None)
+    with patch("main.datetime", _patch_datetime(datetime.date(2007, 10, 20))):
+        main.main()
+
+    # Coverage ran through 2007-10-16 and the live window starts 2007-10-17.
+    assert [c.args[0] for c in mock_weekly.call_args_list] == [datetime.date(2007, 10, 17)]
+    cur = conn.cursor()
+    cur.execute("SELECT COUNT(*) FROM shot_events WHERE game_id = 4")
+    assert cur.fetchone()[0] == 1
+
+
+@patch("main.get_full_play_by_play")
+@patch("main.get_weekly_schedule_games")
 @patch("main.deduplicate_existing_tables")
 @patch("main.create_connection")
 def test_main_stops_when_next_start_date_is_none(
@@ -208,7 +331,7 @@ def test_main_stops_when_next_start_date_is_none(
     conn = _in_memory_conn()
     mock_conn.return_value = conn
 
-    mock_weekly.return_value = ({"2007-10-03": []}, None)
+    mock_weekly.return_value = _with_final_states({"2007-10-03": []}, None)
 
     with patch("main.datetime", _patch_datetime(datetime.date(2007, 10, 10))):
         main.main()
@@ -218,7 +341,7 @@ def test_main_stops_when_next_start_date_is_none(
 
 
 @patch("main.get_full_play_by_play")
-@patch("main.get_weekly_schedule")
+@patch("main.get_weekly_schedule_games")
 @patch("main.deduplicate_existing_tables")
 @patch("main.create_connection")
 def test_main_resumes_from_last_collected_date(
@@ -229,7 +352,7 @@ def test_main_resumes_from_last_collected_date(
     mark_date_collected(conn, "2007-10-03", 2, 2)
     mock_conn.return_value = conn
 
-    mock_weekly.return_value = (
+    mock_weekly.return_value = _with_final_states(
         {
             "2007-10-04": [10],
             "2007-10-05": [11],
@@ -246,7 +369,7 @@ def test_main_resumes_from_last_collected_date(
 
 
 @patch("main.get_full_play_by_play")
-@patch("main.get_weekly_schedule")
+@patch("main.get_weekly_schedule_games")
 @patch("main.deduplicate_existing_tables")
 @patch("main.create_connection")
 def test_main_resumes_from_incomplete_date(
@@ -259,7 +382,7 @@ def test_main_resumes_from_incomplete_date(
     mark_date_collected(conn, "2007-10-05", 1, 1)  # complete
     mock_conn.return_value = conn
 
-    mock_weekly.return_value = (
+    mock_weekly.return_value = _with_final_states(
         {
             "2007-10-04": [20, 21],
             "2007-10-05": [22],
@@ -279,7 +402,7 @@ def test_main_resumes_from_incomplete_date(
 
 
 @patch("main.get_full_play_by_play")
-@patch("main.get_weekly_schedule")
+@patch("main.get_weekly_schedule_games")
 @patch("main.deduplicate_existing_tables")
 @patch("main.create_connection")
 def test_main_extracts_and_inserts_shot_events(
@@ -289,7 +412,7 @@ def test_main_extracts_and_inserts_shot_events(
     conn = _in_memory_conn()
     mock_conn.return_value = conn
 
-    mock_weekly.return_value = ({"2007-10-03": [2007020001]}, None)
+    mock_weekly.return_value = _with_final_states({"2007-10-03": [2007020001]}, None)
     mock_full_pbp.return_value = _simple_full_pbp(2007020001)
 
     with patch("main.datetime", _patch_datetime(datetime.date(2007, 10, 5))):
@@ -307,7 +430,7 @@ def test_main_extracts_and_inserts_shot_events(
 
 
 @patch("main.get_full_play_by_play")
-@patch("main.get_weekly_schedule")
+@patch("main.get_weekly_schedule_games")
 @patch("main.deduplicate_existing_tables")
 @patch("main.create_connection")
 def test_main_counts_null_api_response_as_collected(
@@ -318,7 +441,7 @@ def test_main_counts_null_api_response_as_collected(
     conn = _in_memory_conn()
     mock_conn.return_value = conn
 
-    mock_weekly.return_value = ({"2007-10-03": [1, 2]}, None)
+    mock_weekly.return_value = _with_final_states({"2007-10-03": [1, 2]}, None)
     mock_full_pbp.return_value = None  # API returns nothing for both games
 
     with patch("main.datetime", _patch_datetime(datetime.date(2007, 10, 5))):
@@ -336,7 +459,7 @@ def test_main_counts_null_api_response_as_collected(
 
 
 @patch("main.get_full_play_by_play")
-@patch("main.get_weekly_schedule")
+@patch("main.get_weekly_schedule_games")
 @patch("main.deduplicate_existing_tables")
 @patch("main.create_connection")
 def test_main_skips_shot_extraction_when_already_processed(
@@ -346,7 +469,7 @@ def test_main_skips_shot_extraction_when_already_processed(
     conn = _in_memory_conn()
     mock_conn.return_value = conn
 
-    mock_weekly.return_value = ({"2007-10-03": [2007020001]}, None)
+    mock_weekly.return_value = _with_final_states({"2007-10-03": [2007020001]}, None)
     mock_full_pbp.return_value = _simple_full_pbp(2007020001)
 
     # First run inserts shot events
@@ -355,7 +478,7 @@ def test_main_skips_shot_extraction_when_already_processed(
 
     # Second run — game is already collected, so get_full_play_by_play won't be called
     mock_full_pbp.reset_mock()
-    mock_weekly.return_value = ({"2007-10-03": [2007020001]}, None)
+    mock_weekly.return_value = _with_final_states({"2007-10-03": [2007020001]}, None)
 
     with patch("main.datetime", _patch_datetime(datetime.date(2007, 10, 5))):
         main.main()
@@ -368,7 +491,7 @@ def test_main_skips_shot_extraction_when_already_processed(
 
 
 @patch("main.get_full_play_by_play")
-@patch("main.get_weekly_schedule")
+@patch("main.get_weekly_schedule_games")
 @patch("main.deduplicate_existing_tables")
 @patch("main.create_connection")
 def test_main_backfills_shot_events_for_existing_raw_game(
@@ -379,7 +502,6 @@ def test_main_backfills_shot_events_for_existing_raw_game(
     mock_conn.return_value = conn
 
     game_id = 2007020001
-    create_table(conn, game_id)
     insert_data(conn, game_id, [{
         "period": 1,
         "time": "01:00",
@@ -387,7 +509,7 @@ def test_main_backfills_shot_events_for_existing_raw_game(
         "description": "shot-on-goal",
     }])
 
-    mock_weekly.return_value = ({"2007-10-03": [game_id]}, None)
+    mock_weekly.return_value = _with_final_states({"2007-10-03": [game_id]}, None)
     mock_full_pbp.return_value = _simple_full_pbp(game_id)
 
     with patch("main.datetime", _patch_datetime(datetime.date(2007, 10, 5))):
@@ -420,6 +542,46 @@ def test_process_game_populates_shift_data_after_shot_events(mock_full_pbp, monk
 
 
 @patch("main.get_full_play_by_play")
+def test_process_game_rolls_back_game_when_shift_population_fails(mock_full_pbp, monkeypatch):
+    conn = _in_memory_conn()
+    game_id = 2007020001
+
+    def failing_shift_population(connection, shifted_game_id):
+        raise RuntimeError("shift chart exploded")
+
+    mock_full_pbp.return_value = _simple_full_pbp(game_id)
+    monkeypatch.setattr(main, "populate_shift_data_for_game", failing_shift_population)
+
+    with pytest.raises(RuntimeError):
+        main._process_game(conn, game_id)
+
+    cur = conn.cursor()
+    cur.execute("SELECT COUNT(*) FROM shot_events WHERE game_id = ?", (game_id,))
+    assert cur.fetchone()[0] == 0
+    cur.execute("SELECT COUNT(*) FROM raw_events WHERE game_id = ?", (game_id,))
+    assert cur.fetchone()[0] == 0
+
+
+@patch("main.get_full_play_by_play")
+def test_process_game_uses_supplied_fetch_fn(mock_full_pbp):
+    conn = _in_memory_conn()
+    game_id = 2007020001
+    fetched = []
+
+    def fetch_fn(requested_game_id):
+        fetched.append(requested_game_id)
+        return _simple_full_pbp(requested_game_id)
+
+    assert main._process_game(conn, game_id, fetch_fn=fetch_fn)
+
+    assert fetched == [game_id]
+    mock_full_pbp.assert_not_called()
+    cur = conn.cursor()
+    cur.execute("SELECT COUNT(*) FROM shot_events WHERE game_id = ?", (game_id,))
+    assert cur.fetchone()[0] == 1
+
+
+@patch("main.get_full_play_by_play")
 @patch("main.deduplicate_existing_tables")
 @patch("main.create_connection")
 def test_backfill_missing_game_data_processes_existing_raw_games(
@@ -430,7 +592,6 @@ def test_backfill_missing_game_data_processes_existing_raw_games(
     mock_conn.return_value = conn
 
     game_id = 2007020001
-    create_table(conn, game_id)
     insert_data(conn, game_id, [{
         "period": 1,
         "time": "01:00",
@@ -461,7 +622,6 @@ def test_backfill_missing_game_data_is_idempotent(
     mock_conn.return_value = conn
 
     game_id = 2007020001
-    create_table(conn, game_id)
     insert_data(conn, game_id, [{
         "period": 1,
         "time": "01:00",
@@ -497,7 +657,6 @@ def test_backfill_missing_game_data_skips_fully_processed_games(
     mock_conn.return_value = conn
 
     game_id = 2007020001
-    create_table(conn, game_id)
     insert_data(conn, game_id, [{
         "period": 1,
         "time": "01:00",
@@ -516,23 +675,168 @@ def test_backfill_missing_game_data_skips_fully_processed_games(
     mock_full_pbp.assert_not_called()
 
 
+def _store_final_pbp(game_ids):
+    store = RawPayloadStore(main.RAW_PAYLOAD_DIR)
+    for game_id in game_ids:
+        payload = _simple_full_pbp(game_id)
+        payload["gameState"] = "OFF"
+        store.put(ENDPOINT_PLAY_BY_PLAY, game_id, payload)
+    return store
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+@patch("main.get_full_play_by_play")
+@patch("main.deduplicate_existing_tables")
+@patch("main.create_connection")
+def test_reextract_game_data_rebuilds_from_stored_payloads(
+    mock_conn, mock_dedup, mock_full_pbp, workers,
+):
+    """Re-extraction should parse stored payloads without touching the API."""
+    conn = _in_memory_conn()
+    mock_conn.return_value = conn
+    game_ids = [2007020001, 2007020002, 2007020003]
+    _store_final_pbp(game_ids)
+
+    processed_games = main.reextract_game_data(workers=workers)
+
+    assert processed_games == 3
+    mock_full_pbp.assert_not_called()
+    cur = conn.cursor()
+    cur.execute("SELECT game_id, COUNT(*) FROM shot_events GROUP BY game_id ORDER BY game_id")
+    assert cur.fetchall() == [(game_id, 1) for game_id in game_ids]
+    cur.execute("SELECT COUNT(*) FROM games")
+    assert cur.fetchone()[0] == 3
+
+
+@patch("main.deduplicate_existing_tables")
+@patch("main.create_connection")
+def test_reextract_game_data_skips_complete_games_unless_forced(mock_conn, mock_dedup):
+    conn = _in_memory_conn()
+    mock_conn.return_value = conn
+    _store_final_pbp([2007020001])
+
+    assert main.reextract_game_data(workers=1) == 1
+    assert main.reextract_game_data(workers=1) == 0
+    assert main.reextract_game_data(workers=1, force=True) == 1
+
+    cur = conn.cursor()
+    cur.execute("SELECT COUNT(*) FROM shot_events")
+    assert cur.fetchone()[0] == 1
+
+
+def _stored_shift_payload(game_id, home_id=10, away_id=20):
+    rows = []
+    for team_id, skaters, goalie in ((home_id, range(100, 105), 300),
+                                     (away_id, range(110, 115), 200)):
+        for player_id, position in zip([*skaters, goalie], "CLRDDG"):
+            rows.append({
+                "gameId": game_id,
+                "playerId": player_id,
+                "teamId": team_id,
+                "positionCode": position,
+                "period": 1,
+                "startTime": "00:00",
+                "endTime": "02:00",
+            })
+    return {"data": rows}
+
+
+@patch("main.deduplicate_existing_tables")
+@patch("main.create_connection")
+def test_reextract_game_data_keeps_on_ice_slots_when_forced(
+    mock_conn, mock_dedup, monkeypatch,
+):
+    """Rewritten shots get their on-ice slots back from stored shift charts."""
+    monkeypatch.setattr(main, "populate_shift_data_for_game",
+                        shift_population.populate_shift_data_for_game)
+    monkeypatch.setattr(main, "fetch_shift_rows_for_game", MagicMock(
+        side_effect=AssertionError("re-extraction must not fetch shift charts")))
+    conn = _in_memory_conn()
+    mock_conn.return_value = conn
+    game_id = 2007020001
+    store = _store_final_pbp([game_id])
+    store.put(ENDPOINT_SHIFT_CHARTS, game_id, _stored_shift_payload(game_id))
+
+    def slots():
+        cur = conn.cursor()
+        cur.execute(
+            """SELECT home_on_ice_1_player_id, away_on_ice_1_player_id,
+                      home_on_ice_6_player_id, away_on_ice_6_player_id
+               FROM shot_events WHERE game_id = ?""",
+            (game_id,),
+        )
+        return cur.fetchall()
+
+    assert main.reextract_game_data(workers=1) == 1
+    assert slots() == [(100, 110, 300, 200)]
+
+    assert main.reextract_game_data(workers=1, force=True) == 1
+    assert slots() == [(100, 110, 300, 200)]
+
+
+@pytest.mark.parametrize("parse_workers", [1, 2])
+@patch("main.get_full_play_by_play")
+@patch("main.get_weekly_schedule_games")
+@patch("main.deduplicate_existing_tables")
+@patch("main.create_connection")
+def test_main_parses_shift_rows_in_parse_stage_and_never_fetches_from_writer(
+    mock_conn, mock_dedup, mock_weekly, mock_full_pbp, monkeypatch, parse_workers,
+):
+    """Shift rows are parsed with the play-by-play; unprefetched games are left for later."""
+    monkeypatch.setattr(main, "populate_shift_data_for_game",
+                        shift_population.populate_shift_data_for_game)
+    fetch_shifts = MagicMock(side_effect=lambda game_id: _stored_shift_payload(game_id)["data"])
+    monkeypatch.setattr(main, "fetch_shift_rows_for_game", fetch_shifts)
+    conn = _in_memory_conn()
+    mock_conn.return_value = conn
+    final_id, live_id = 2007020001, 2007020002
+    mock_weekly.return_value = _with_final_states({"2007-10-03": [final_id, live_id]}, None)
+
+    def full_pbp(game_id):
+        payload = _simple_full_pbp(game_id)
+        payload["gameState"] = "OFF" if game_id == final_id else "LIVE"
+        return payload
+
+    mock_full_pbp.side_effect = full_pbp
+
+    with patch("main.datetime", _patch_datetime(datetime.date(2007, 10, 5))):
+        main.main(parse_workers=parse_workers)
+
+    fetch_shifts.assert_called_once_with(final_id)
+    cur = conn.cursor()
+    cur.execute(
+        """SELECT game_id, home_on_ice_1_player_id, away_on_ice_6_player_id
+           FROM shot_events ORDER BY game_id"""
+    )
+    assert cur.fetchall() == [(final_id, 100, 200), (live_id, None, None)]
+
+
 @patch("main.populate_player_game_features")
 @patch("main.populate_player_game_stats")
+@patch("main.populate_player_game_on_ice")
 @patch("main.backfill_player_metadata")
 def test_refresh_player_tables_runs_stats_then_features(
-    mock_backfill_metadata, mock_populate_stats, mock_populate_features,
+    mock_backfill_metadata, mock_populate_on_ice, mock_populate_stats,
+    mock_populate_features,
 ):
     conn = _in_memory_conn()
     call_order = []
 
-    def fake_backfill(connection, fetch_fn):
+    def fake_backfill(connection, fetch_fn, upserted_ids):
         assert connection is conn
         assert fetch_fn is main.get_player_metadata
         call_order.append("metadata")
+        upserted_ids.extend([8471214, 8478402])
         return 3, 2, 1
 
-    def fake_populate_stats(connection):
+    def fake_populate_on_ice(connection):
+        assert connection is conn
+        call_order.append("on_ice")
+        return 4
+
+    def fake_populate_stats(connection, regroup_player_ids):
         assert connection is conn
+        assert regroup_player_ids == [8471214, 8478402]
         call_order.append("stats")
         return 10
 
@@ -542,16 +846,18 @@ def test_refresh_player_tables_runs_stats_then_features(
         return 10
 
     mock_backfill_metadata.side_effect = fake_backfill
+    mock_populate_on_ice.side_effect = fake_populate_on_ice
     mock_populate_stats.side_effect = fake_populate_stats
     mock_populate_features.side_effect = fake_populate_features
 
     result = main.refresh_player_tables(conn)
 
-    assert call_order == ["metadata", "stats", "features"]
+    assert call_order == ["metadata", "on_ice", "stats", "features"]
     assert result == {
         "metadata_attempted": 3,
         "metadata_upserted": 2,
         "metadata_unavailable": 1,
+        "player_on_ice_games": 4,
         "player_game_stats_rows": 10,
         "player_game_features_rows": 10,
     }
@@ -607,3 +913,27 @@ def test_finalize_season_diagnostics_idempotent():
     cursor.execute("SELECT COUNT(*) FROM venue_bias_diagnostics")
     # INSERT OR REPLACE keyed on (venue_name, season) — no duplication.
     assert cursor.fetchone()[0] <= 1
+
+
+@patch("main.run_scraper_and_backfill")
+def test_cli_applies_rate_limit_overrides(mock_run, monkeypatch):
+    monkeypatch.setattr(nhl_api, "_game_api_bucket", nhl_api._game_api_bucket)
+    monkeypatch.setattr(nhl_api, "_stats_api_bucket", nhl_api._stats_api_bucket)
+
+    main.cli(["--game-api-rps", "1", "--stats-api-burst", "3", "--backfill-limit", "5"])
+
+    assert (nhl_api._game_api_bucket.rate, nhl_api._game_api_bucket.burst) == (
+        1.0, nhl_api._GAME_API_BURST)
+    assert (nhl_api._stats_api_bucket.rate, nhl_api._stats_api_bucket.burst) == (
+        nhl_api._STATS_API_REQUESTS_PER_SECOND, 3.0)
+    mock_run.assert_called_once_with(backfill_limit=5)
+
+
+@patch("main.run_scraper_and_backfill")
+def test_cli_rejects_non_positive_rate(mock_run, monkeypatch):
+    monkeypatch.setattr(nhl_api, "_game_api_bucket", nhl_api._game_api_bucket)
+
+    with pytest.raises(SystemExit):
+        main.cli(["--game-api-rps", "0"])
+
+    mock_run.assert_not_called()
@@ -1,16 +1,35 @@
 import datetime
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import Mock, patch
 
 import pytest
 
 import nhl_api
 from database import PlayerMetadataNotFound
-
-
-def _mock_response(status_code, payload):
+from raw_payload_store import ENDPOINT_PLAY_BY_PLAY, RawPayloadStore
+
+
+@pytest.fixture(autouse=True)
+def _fresh_game_api_bucket(monkeypatch):
+    monkeypatch.setattr(
+        nhl_api, "_game_api_bucket",
+        nhl_api.TokenBucket(nhl_api._GAME_API_REQUESTS_PER_SECOND, nhl_api._GAME_API_BURST),
+    )
+    monkeypatch.setattr(
+        nhl_api, "_stats_api_bucket",
+        nhl_api.TokenBucket(nhl_api._STATS_API_REQUESTS_PER_SECOND, nhl_api._STATS_API_BURST),
+    )
+
+
+def _mock_response(status_code, payload, headers=None):
     response = Mock()
     response.status_code = status_code
     response.json.return_value = payload
+    response.headers = headers or {}
     return response
 
 
@@ -218,6 +237,31 @@ def test_get_weekly_schedule_makes_single_api_call(mock_get):
     assert mock_get.call_count == 1
 
 
+@patch.object(nhl_api._session, "get")
+def test_get_weekly_schedule_games_keeps_game_states(mock_get):
+    mock_get.return_value = _mock_response(
+        200,
+        {
+            "gameWeek": [
+                {"date": "2024-01-01", "games": [
+                    {"id": 1, "gameState": "OFF"},
+                    {"id": 2, "gameState": "FUT"},
+                ]},
+                {"date": "2024-01-02", "games": [{"id": 3}]},
+            ],
+            "nextStartDate": "2024-01-08",
+        },
+    )
+
+    schedule, next_date = nhl_api.get_weekly_schedule_games("2024-01-01")
+
+    assert schedule == {
+        "2024-01-01": [(1, "OFF"), (2, "FUT")],
+        "2024-01-02": [(3, None)],
+    }
+    assert next_date == "2024-01-08"
+
+
 # --- get_play_by_play_data tests (new NHL API: api-web.nhle.com) ---
 
 
@@ -225,7 +269,6 @@ def test_get_weekly_schedule_makes_single_api_call(mock_get):
 @patch("nhl_api.time.sleep")
 @patch("nhl_api.time.monotonic", side_effect=[1000, 1001])
 def test_get_play_by_play_data_returns_shaped_rows(monotonic_mock, sleep_mock, mock_get):
-    nhl_api._last_game_api_call = 0
     mock_get.return_value = _mock_response(
         200,
         {
@@ -257,7 +300,6 @@ def test_get_play_by_play_data_returns_shaped_rows(monotonic_mock, sleep_mock, m
 @patch("nhl_api.time.sleep")
 @patch("nhl_api.time.monotonic", side_effect=[1000, 1001])
 def test_get_play_by_play_data_returns_none_on_non_200(monotonic_mock, sleep_mock, mock_get):
-    nhl_api._last_game_api_call = 0
     mock_get.return_value = _mock_response(404, {})
 
     assert nhl_api.get_play_by_play_data(2023020001) is None
@@ -267,7 +309,6 @@ def test_get_play_by_play_data_returns_none_on_non_200(monotonic_mock, sleep_moc
 @patch("nhl_api.time.sleep")
 @patch("nhl_api.time.monotonic", side_effect=[1000, 1001])
 def test_get_play_by_play_data_returns_empty_list_when_no_plays(monotonic_mock, sleep_mock, mock_get):
-    nhl_api._last_game_api_call = 0
     mock_get.return_value = _mock_response(200, {"plays": []})
 
     assert nhl_api.get_play_by_play_data(2023020001) == []
@@ -277,7 +318,6 @@ def test_get_play_by_play_data_returns_empty_list_when_no_plays(monotonic_mock,
 @patch("nhl_api.time.sleep")
 @patch("nhl_api.time.monotonic", side_effect=[1000, 1001])
 def test_get_play_by_play_data_handles_missing_nested_keys(monotonic_mock, sleep_mock, mock_get):
-    nhl_api._last_game_api_call = 0
     mock_get.return_value = _mock_response(
         200,
         {
@@ -299,33 +339,84 @@ def test_get_play_by_play_data_handles_missing_nested_keys(monotonic_mock, sleep
 # --- rate limiting tests ---
 
 
-def test_rate_limit_interval_is_two_seconds():
-    """Verify the rate limit was reduced from 15s to 2s."""
-    assert nhl_api._GAME_API_MIN_INTERVAL == 2
+def test_game_api_rate_limit_defaults_are_positive():
+    assert nhl_api._GAME_API_REQUESTS_PER_SECOND > 0
+    assert nhl_api._GAME_API_BURST >= 1
+    assert nhl_api._GAME_API_MAX_IN_FLIGHT >= 1
+
+
+@pytest.mark.parametrize("rate, burst", [(0, 1), (-1, 1), (1, 0)])
+def test_token_bucket_rejects_invalid_configuration(rate, burst):
+    with pytest.raises(ValueError):
+        nhl_api.TokenBucket(rate, burst)
+
+
+@patch("nhl_api.time.sleep")
+@patch("nhl_api.time.monotonic")
+def test_token_bucket_allows_burst_then_waits_for_refill(monotonic_mock, sleep_mock):
+    clock = [100.0]
+    monotonic_mock.side_effect = lambda: clock[0]
+
+    def advance(seconds):
+        clock[0] += seconds
+
+    sleep_mock.side_effect = advance
+    bucket = nhl_api.TokenBucket(rate=2.0, burst=3)
+
+    waits = [bucket.acquire() for _ in range(4)]
+
+    assert waits[:3] == [0.0, 0.0, 0.0]
+    assert waits[3] == pytest.approx(0.5)
+    sleep_mock.assert_called_once()
+
+
+@patch("nhl_api.time.sleep")
+@patch("nhl_api.time.monotonic")
+def test_token_bucket_refills_up_to_burst_only(monotonic_mock, sleep_mock):
+    clock = [0.0]
+    monotonic_mock.side_effect = lambda: clock[0]
+    bucket = nhl_api.TokenBucket(rate=1.0, burst=2)
+    bucket.acquire()
+    bucket.acquire()
+
+    clock[0] += 60.0  # long idle period
+    bucket.acquire()
+    bucket.acquire()
+    sleep_mock.assert_not_called()
+
+    sleep_mock.side_effect = lambda seconds: clock.__setitem__(0, clock[0] + seconds)
+    bucket.acquire()
+    sleep_mock.assert_called_once_with(pytest.approx(1.0))
 
 
 @patch.object(nhl_api._session, "get")
 @patch("nhl_api.time.sleep")
-@patch("nhl_api.time.monotonic", side_effect=[5, 10])
-def test_get_play_by_play_data_rate_limits_when_called_too_fast(monotonic_mock, sleep_mock, mock_get):
-    nhl_api._last_game_api_call = 5  # same as first monotonic() return
+@patch("nhl_api.time.monotonic")
+def test_get_play_by_play_data_rate_limits_when_bucket_empty(monotonic_mock, sleep_mock, mock_get):
+    clock = [5.0]
+    monotonic_mock.side_effect = lambda: clock[0]
+    sleep_mock.side_effect = lambda seconds: clock.__setitem__(0, clock[0] + seconds)
+    nhl_api.configure_game_api_rate_limit(requests_per_second=0.5, burst=1)
     mock_get.return_value = _mock_response(200, {"plays": []})
 
     nhl_api.get_play_by_play_data(2023020001)
+    sleep_mock.assert_not_called()
+
+    nhl_api.get_play_by_play_data(2023020002)
 
     sleep_mock.assert_called_once()
-    wait_time = sleep_mock.call_args[0][0]
-    assert wait_time == nhl_api._GAME_API_MIN_INTERVAL
+    assert sleep_mock.call_args[0][0] == pytest.approx(2.0)
 
 
 @patch.object(nhl_api._session, "get")
 @patch("nhl_api.time.sleep")
 @patch("nhl_api.time.monotonic", side_effect=[100, 200])
 def test_get_play_by_play_data_skips_sleep_when_enough_time_elapsed(monotonic_mock, sleep_mock, mock_get):
-    nhl_api._last_game_api_call = 0  # long ago
+    nhl_api.configure_game_api_rate_limit(requests_per_second=0.5, burst=1)
     mock_get.return_value = _mock_response(200, {"plays": []})
 
     nhl_api.get_play_by_play_data(2023020001)
+    nhl_api.get_play_by_play_data(2023020002)
 
     sleep_mock.assert_not_called()
 
@@ -337,7 +428,6 @@ def test_get_play_by_play_data_skips_sleep_when_enough_time_elapsed(monotonic_mo
 @patch("nhl_api.time.sleep")
 @patch("nhl_api.time.monotonic", side_effect=[1000, 1001])
 def test_get_full_play_by_play_returns_full_json(monotonic_mock, sleep_mock, mock_get):
-    nhl_api._last_game_api_call = 0
     payload = {"plays": [{"eventId": 1}], "homeTeam": {"id": 10}}
     mock_get.return_value = _mock_response(200, payload)
 
@@ -349,7 +439,6 @@ def test_get_full_play_by_play_returns_full_json(monotonic_mock, sleep_mock, moc
 @patch("nhl_api.time.sleep")
 @patch("nhl_api.time.monotonic", side_effect=[1000, 1001])
 def test_get_full_play_by_play_returns_none_on_non_200(monotonic_mock, sleep_mock, mock_get):
-    nhl_api._last_game_api_call = 0
     mock_get.return_value = _mock_response(404, {})
 
     assert nhl_api.get_full_play_by_play(2023020001) is None
@@ -357,14 +446,28 @@ def test_get_full_play_by_play_returns_none_on_non_200(monotonic_mock, sleep_moc
 
 @patch.object(nhl_api._session, "get")
 @patch("nhl_api.time.sleep")
-@patch("nhl_api.time.monotonic", side_effect=[5, 10])
-def test_get_full_play_by_play_rate_limits(monotonic_mock, sleep_mock, mock_get):
-    nhl_api._last_game_api_call = 5
+def test_get_full_play_by_play_draws_from_shared_bucket(sleep_mock, mock_get):
+    bucket = nhl_api.configure_game_api_rate_limit(requests_per_second=1.0, burst=5)
     mock_get.return_value = _mock_response(200, {"plays": []})
 
     nhl_api.get_full_play_by_play(2023020001)
+    nhl_api.get_full_play_by_play(2023020002)
 
-    sleep_mock.assert_called_once()
+    assert bucket._tokens < 4
+    sleep_mock.assert_not_called()
+
+
+@patch("nhl_api.time.sleep")
+def test_stats_api_bucket_is_separate_from_game_api_bucket(sleep_mock):
+    game_bucket = nhl_api.configure_game_api_rate_limit(requests_per_second=1.0, burst=1)
+    stats_bucket = nhl_api.configure_stats_api_rate_limit(requests_per_second=1.0, burst=2)
+
+    nhl_api.acquire_stats_api_token()
+    nhl_api.acquire_stats_api_token()
+
+    assert stats_bucket._tokens < 1
+    assert game_bucket._tokens == 1
+    sleep_mock.assert_not_called()
 
 
 @patch.object(nhl_api._session, "get")
@@ -372,7 +475,6 @@ def test_get_full_play_by_play_rate_limits(monotonic_mock, sleep_mock, mock_get)
 @patch("nhl_api.time.monotonic", side_effect=[1000, 1001])
 def test_get_play_by_play_data_delegates_to_full(monotonic_mock, sleep_mock, mock_get):
     """get_play_by_play_data makes exactly one HTTP call via delegation."""
-    nhl_api._last_game_api_call = 0
     mock_get.return_value = _mock_response(200, {
         "plays": [
             {"periodDescriptor": {"number": 1}, "timeInPeriod": "10:00", "typeDescKey": "shot-on-goal"},
@@ -382,6 +484,158 @@ def test_get_play_by_play_data_delegates_to_full(monotonic_mock, sleep_mock, moc
     data = nhl_api.get_play_by_play_data(2023020001)
     assert data == [{"period": 1, "time": "10:00", "event": "shot-on-goal", "description": "shot-on-goal"}]
     assert mock_get.call_count == 1
+
+
+# --- raw payload store read-through tests ---
+
+
+@pytest.fixture
+def raw_store(tmp_path, monkeypatch):
+    store = RawPayloadStore(str(tmp_path / "raw_payloads"))
+    monkeypatch.setattr(nhl_api, "_raw_payload_store", store)
+    return store
+
+
+@patch.object(nhl_api._session, "get")
+def test_get_full_play_by_play_stores_final_games(mock_get, raw_store):
+    payload = {"id": 2023020001, "gameState": "OFF", "plays": []}
+    mock_get.return_value = _mock_response(200, payload, headers={"ETag": '"v1"'})
+
+    assert nhl_api.get_full_play_by_play(2023020001) == payload
+    assert nhl_api.get_full_play_by_play(2023020001) == payload
+
+    assert mock_get.call_count == 1
+    assert raw_store.entry(ENDPOINT_PLAY_BY_PLAY, 2023020001).etag == '"v1"'
+
+
+@patch.object(nhl_api._session, "get")
+def test_get_full_play_by_play_does_not_store_live_games(mock_get, raw_store):
+    mock_get.return_value = _mock_response(
+        200, {"id": 2023020001, "gameState": "LIVE", "plays": []}
+    )
+
+    nhl_api.get_full_play_by_play(2023020001)
+    nhl_api.get_full_play_by_play(2023020001)
+
+    assert mock_get.call_count == 2
+    assert not raw_store.has(ENDPOINT_PLAY_BY_PLAY, 2023020001)
+
+
+@patch.object(nhl_api._session, "get")
+def test_get_full_play_by_play_does_not_store_failures(mock_get, raw_store):
+    mock_get.return_value = _mock_response(500, {})
+
+    assert nhl_api.get_full_play_by_play(2023020001) is None
+    assert raw_store.game_ids(ENDPOINT_PLAY_BY_PLAY) == []
+
+
+def test_set_raw_payload_store_returns_previous(monkeypatch):
+    monkeypatch.setattr(nhl_api, "_raw_payload_store", None)
+    sentinel = object()
+
+    assert nhl_api.set_raw_payload_store(sentinel) is None
+    assert nhl_api.get_raw_payload_store() is sentinel
+    assert nhl_api.set_raw_payload_store(None) is sentinel
+
+
+# --- concurrent fetch engine tests (local stub HTTP server) ---
+
+
+_STUB_PLAY_BY_PLAY_PATH = re.compile(r"^/v1/gamecenter/(\d+)/play-by-play$")
+_STUB_RESPONSE_DELAY_SECONDS = 0.05
+
+
+class _StubNhlApiHandler(BaseHTTPRequestHandler):
+    """Serves `{"id": <game_id>}` for play-by-play URLs and 404 otherwise."""
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            server.requested_paths.append(self.path)
+        try:
+            time.sleep(_STUB_RESPONSE_DELAY_SECONDS)
+            match = _STUB_PLAY_BY_PLAY_PATH.match(self.path)
+            if match is None or int(match.group(1)) in server.missing_game_ids:
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = json.dumps({"id": int(match.group(1)), "plays": []}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_nhl_api(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubNhlApiHandler)
+    server.lock = threading.Lock()
+    server.in_flight = 0
+    server.max_in_flight = 0
+    server.requested_paths = []
+    server.missing_game_ids = set()
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+    )
+    thread.start()
+    monkeypatch.setattr(
+        nhl_api, "_NHL_API_BASE_URL", f"http://127.0.0.1:{server.server_port}/v1"
+    )
+    nhl_api.configure_game_api_rate_limit(requests_per_second=1000.0, burst=100)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_concurrent_fetcher_keeps_requests_in_flight(stub_nhl_api):
+    game_ids = list(range(2023020001, 2023020013))
+
+    with nhl_api.ConcurrentFetcher(nhl_api.get_full_play_by_play, max_in_flight=4) as fetcher:
+        results = list(fetcher.imap(game_ids))
+
+    assert [game_id for game_id, _ in results] == game_ids
+    assert [payload["id"] for _, payload in results] == game_ids
+    assert 1 < stub_nhl_api.max_in_flight <= 4
+    assert len(stub_nhl_api.requested_paths) == len(game_ids)
+
+
+def test_concurrent_fetcher_returns_none_for_failed_games(stub_nhl_api, capsys):
+    stub_nhl_api.missing_game_ids.add(2023020002)
+
+    with nhl_api.ConcurrentFetcher(nhl_api.get_full_play_by_play, max_in_flight=2) as fetcher:
+        results = fetcher.fetch_all([2023020001, 2023020002, 2023020003])
+
+    assert results[2023020001]["id"] == 2023020001
+    assert results[2023020002] is None
+    assert results[2023020003]["id"] == 2023020003
+    assert "Status code: 404" in capsys.readouterr().out
+
+
+def test_concurrent_fetcher_respects_sustained_rate(stub_nhl_api):
+    nhl_api.configure_game_api_rate_limit(requests_per_second=40.0, burst=1)
+    game_ids = list(range(2023020001, 2023020009))
+
+    started = time.monotonic()
+    with nhl_api.ConcurrentFetcher(nhl_api.get_full_play_by_play, max_in_flight=8) as fetcher:
+        fetcher.fetch_all(game_ids)
+    elapsed = time.monotonic() - started
+
+    # One token up front, then seven refills at 40/s.
+    assert elapsed >= (len(game_ids) - 1) / 40.0 * 0.9
+
+
+def test_concurrent_fetcher_rejects_non_positive_in_flight():
+    with pytest.raises(ValueError):
+        nhl_api.ConcurrentFetcher(lambda key: key, max_in_flight=0)
 
 
 # --- get_player_metadata tests ---
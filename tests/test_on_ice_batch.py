@@ -0,0 +1,156 @@
+import json
+import random
+import sqlite3
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from database import (
+    GAME_STAGE_ON_ICE_SLOTS,
+    GAME_STAGE_SHIFTS,
+    SEASON_SHIFT_COLUMNS,
+    ensure_player_database_schema,
+    ensure_xg_schema,
+    get_current_game_stages,
+    insert_shift_records,
+    insert_shot_events,
+    load_season_shift_rows,
+    record_game_stages,
+    replace_game_on_ice_intervals,
+    upsert_game_metadata,
+)
+from on_ice_batch import (
+    build_on_ice_intervals_batch,
+    rebuild_season_on_ice_intervals,
+    shift_arrays_from_rows,
+)
+from on_ice_builder import OnIceInterval, build_on_ice_intervals
+
+
+def _random_shift_rows(rng, game_id):
+    rows = []
+    for period in (1, 2, 3, 4):
+        period_length = 300 if period == 4 else 1200
+        for side, base_player in (("home", 100), ("away", 200)):
+            rows.append((game_id, period, 0, period_length - rng.choice([0, 60]),
+                         base_player + 99, side, "G"))
+            for player_offset in range(12):
+                clock = rng.randint(0, 60)
+                while clock < period_length:
+                    length = rng.randint(1, 70)
+                    rows.append((game_id, period, clock, min(clock + length, period_length),
+                                 base_player + player_offset, side,
+                                 rng.choice(["C", "L", "R", "D", None])))
+                    clock += length + rng.randint(0, 200)
+        rows.append((game_id, period, 333, 444, 1, None, "C"))
+        rows.append((game_id, period, 500, 500, 100, "home", "C"))
+        rows.append((game_id, period, 10, 900, 101, "home", "C"))
+        rows.append((game_id, period, 400, 1000, 101, "home", "C"))
+    rng.shuffle(rows)
+    return rows
+
+
+def _per_game_reference(rows):
+    by_game = {}
+    for row in rows:
+        by_game.setdefault(row[0], []).append(dict(zip(SEASON_SHIFT_COLUMNS, row)))
+    intervals = []
+    for game_id in sorted(by_game):
+        intervals.extend(build_on_ice_intervals(game_id, by_game[game_id]))
+    return intervals
+
+
+def test_batch_builder_matches_per_game_builder():
+    rng = random.Random(7)
+    rows = []
+    for game_id in (2024020003, 2024020001, 2024020002):
+        rows.extend(_random_shift_rows(rng, game_id))
+
+    assert build_on_ice_intervals_batch(shift_arrays_from_rows(rows)) == (
+        _per_game_reference(rows)
+    )
+
+
+def test_batch_builder_handles_empty_and_invalid_rows():
+    assert build_on_ice_intervals_batch(shift_arrays_from_rows([])) == []
+    assert build_on_ice_intervals_batch(
+        shift_arrays_from_rows([(1, 1, 50, 50, 7, "home", "C")])
+    ) == []
+
+
+def test_batch_builder_skips_goalie_only_segments():
+    rows = [
+        (1, 1, 0, 100, 30, "home", "G"),
+        (1, 1, 20, 40, 5, "away", "D"),
+    ]
+
+    intervals = build_on_ice_intervals_batch(shift_arrays_from_rows(rows))
+
+    assert [(i.start_s, i.end_s) for i in intervals] == [(20, 40)]
+    assert json.loads(intervals[0].away_skaters_json) == [5]
+    assert intervals[0].home_goalie_player_id == 30
+    assert intervals[0].strength_state == "0v1"
+
+
+def _seed_season_game(conn, game_id, season):
+    upsert_game_metadata(conn, game_id, game_date="2024-10-10", season=season,
+                         home_team_id=22, away_team_id=10)
+    insert_shot_events(conn, [{
+        "game_id": game_id, "event_idx": 1, "shot_event_type": "shot-on-goal",
+        "period": 1, "time_in_period": "00:20", "time_remaining_seconds": 1180,
+        "shot_type": "wrist", "x_coord": 70, "y_coord": 10,
+        "distance_to_goal": 22.36, "angle_to_goal": 26.56, "is_goal": 0,
+        "shooting_team_id": 22, "goalie_id": 40, "shooter_id": 1,
+        "score_state": "tied", "manpower_state": "5v5",
+    }])
+    insert_shift_records(conn, [
+        {"game_id": game_id, "player_id": player_id, "team_id": team_id,
+         "team_side": side, "position": position, "period": 1,
+         "start_seconds": 0, "end_seconds": 40}
+        for player_id, team_id, side, position in [
+            (1, 22, "home", "C"), (30, 22, "home", "G"),
+            (11, 10, "away", "C"), (40, 10, "away", "G"),
+        ]
+    ])
+
+
+def test_rebuild_season_on_ice_intervals_only_touches_current_shift_games():
+    conn = sqlite3.connect(":memory:")
+    ensure_player_database_schema(conn)
+    ensure_xg_schema(conn)
+    _seed_season_game(conn, 2024020001, "20242025")
+    _seed_season_game(conn, 2024020002, "20242025")
+    _seed_season_game(conn, 2023020001, "20232024")
+    # Current shifts that yield no intervals; its old on-ice rows are stale.
+    upsert_game_metadata(conn, 2024020003, game_date="2024-10-11", season="20242025",
+                         home_team_id=22, away_team_id=10)
+    insert_shift_records(conn, [
+        {"game_id": 2024020003, "player_id": 1, "team_id": 22, "team_side": "home",
+         "position": "C", "period": 1, "start_seconds": 50, "end_seconds": 50},
+    ])
+    replace_game_on_ice_intervals(conn, 2024020003, [
+        OnIceInterval(2024020003, 1, 0, 40, "[1]", "[11]", 30, 40, "1v1"),
+    ])
+    record_game_stages(conn, 2024020001, (GAME_STAGE_SHIFTS,))
+    record_game_stages(conn, 2024020003, (GAME_STAGE_SHIFTS,))
+    record_game_stages(conn, 2023020001, (GAME_STAGE_SHIFTS,))
+
+    assert len(load_season_shift_rows(conn, "20242025")) == 9
+
+    summary = rebuild_season_on_ice_intervals(conn, "20242025")
+
+    assert summary == {"games_rebuilt": 2, "interval_rows_inserted": 1,
+                       "shot_rows_updated": 1}
+    assert GAME_STAGE_ON_ICE_SLOTS in get_current_game_stages(conn, 2024020001)
+    assert GAME_STAGE_ON_ICE_SLOTS in get_current_game_stages(conn, 2024020003)
+    assert GAME_STAGE_ON_ICE_SLOTS not in get_current_game_stages(conn, 2024020002)
+    assert GAME_STAGE_ON_ICE_SLOTS not in get_current_game_stages(conn, 2023020001)
+    cur = conn.cursor()
+    cur.execute("SELECT DISTINCT game_id FROM on_ice_intervals")
+    assert cur.fetchall() == [(2024020001,)]
+    cur.execute(
+        "SELECT home_on_ice_1_player_id, home_on_ice_6_player_id "
+        "FROM shot_events WHERE game_id = 2024020001"
+    )
+    assert cur.fetchone() == (1, 30)
@@ -0,0 +1,95 @@
+import importlib.util
+import random
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from on_ice_builder import build_on_ice_intervals
+
+_SCRIPT_PATH = (
+    Path(__file__).resolve().parents[1] / "scripts" / "benchmark_on_ice_builder.py"
+)
+_SPEC = importlib.util.spec_from_file_location("benchmark_on_ice_builder", _SCRIPT_PATH)
+benchmark = importlib.util.module_from_spec(_SPEC)
+_SPEC.loader.exec_module(benchmark)
+
+
+def _random_game_shifts(rng, game_id):
+    rows = []
+    for period in (1, 2, 3):
+        for side, base_player in (("home", 100), ("away", 200)):
+            rows.append({"game_id": game_id, "player_id": base_player + 99, "team_side": side,
+                         "position": "G", "period": period,
+                         "start_seconds": 0, "end_seconds": rng.choice([1140, 1200])})
+            for player_offset in range(12):
+                clock = rng.randint(0, 60)
+                while clock < 1200:
+                    length = rng.randint(1, 70)
+                    rows.append({
+                        "game_id": game_id,
+                        "player_id": base_player + player_offset,
+                        "team_side": side,
+                        "position": rng.choice(["C", "L", "R", "D", "d"]),
+                        "period": period,
+                        "start_seconds": clock,
+                        "end_seconds": min(clock + length, 1200),
+                    })
+                    clock += length + rng.randint(0, 200)
+        # Unsided, zero-length and overlapping duplicate rows.
+        rows.append({"game_id": game_id, "player_id": 1, "team_side": None, "position": "C",
+                     "period": period, "start_seconds": 333, "end_seconds": 444})
+        rows.append({"game_id": game_id, "player_id": 100, "team_side": "home", "position": "C",
+                     "period": period, "start_seconds": 500, "end_seconds": 500})
+        rows.append({"game_id": game_id, "player_id": 101, "team_side": "home", "position": "C",
+                     "period": period, "start_seconds": 10, "end_seconds": 900})
+        rows.append({"game_id": game_id, "player_id": 101, "team_side": "home", "position": "C",
+                     "period": period, "start_seconds": 400, "end_seconds": 1000})
+    rng.shuffle(rows)
+    return rows
+
+
+def test_sweep_builder_matches_reference_on_randomized_games():
+    rng = random.Random(20252026)
+    for game_id in range(2025020001, 2025020021):
+        rows = _random_game_shifts(rng, game_id)
+        assert build_on_ice_intervals(game_id, rows) == (
+            benchmark.reference_build_on_ice_intervals(game_id, rows)
+        )
+
+
+def test_run_benchmark_reports_timings_and_mismatches():
+    rows_by_game = {
+        1: [{"player_id": 1, "team_side": "home", "position": "C", "period": 1,
+             "start_seconds": 0, "end_seconds": 10}],
+        2: [],
+    }
+
+    timings, mismatched = benchmark.run_benchmark(
+        rows_by_game,
+        {"reference": benchmark.reference_build_on_ice_intervals,
+         "broken": lambda game_id, rows: [] if game_id == 1 else
+         benchmark.reference_build_on_ice_intervals(game_id, rows)},
+    )
+
+    assert set(timings) == {"reference", "broken"}
+    assert mismatched == [1]
+
+
+def test_group_shift_rows_by_game_and_time_batch_build():
+    rows = [
+        (2, 1, 0, 30, 7, "home", "C"),
+        (1, 1, 0, 30, 8, "away", "D"),
+    ]
+
+    rows_by_game = benchmark.group_shift_rows_by_game(rows)
+    seconds, batch_by_game = benchmark.time_batch_build(rows)
+
+    assert rows_by_game[2] == [{
+        "game_id": 2, "period": 1, "start_seconds": 0, "end_seconds": 30,
+        "player_id": 7, "team_side": "home", "position": "C",
+    }]
+    assert seconds >= 0
+    for game_id, game_rows in rows_by_game.items():
+        assert batch_by_game[game_id] == build_on_ice_intervals(game_id, game_rows)
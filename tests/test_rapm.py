@@ -0,0 +1,178 @@
+import sqlite3
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from database import (
+    ensure_player_database_schema,
+    ensure_xg_schema,
+    insert_shot_events,
+    load_rapm_player_ratings,
+    replace_game_on_ice_intervals,
+    replace_rapm_player_ratings,
+    upsert_game_metadata,
+)
+from on_ice_builder import OnIceInterval
+from rapm import (
+    RAPM_MODEL_VERSION,
+    RapmRating,
+    bootstrap_rapm_standard_errors,
+    build_rapm_design,
+    fit_rapm,
+    fit_rapm_for_season,
+)
+
+
+def _synthetic_season(seed=0, games=160):
+    rng = np.random.default_rng(seed)
+    rosters = {team: list(range(team * 100, team * 100 + 12)) for team in range(8)}
+    truth_off = {p: rng.normal(0, 5) for roster in rosters.values() for p in roster}
+    truth_def = {p: rng.normal(0, 5) for roster in rosters.values() for p in roster}
+    stint_rows, shot_rows = [], []
+    for game_index in range(games):
+        game_id = 2024020001 + game_index
+        home, away = rng.choice(8, 2, replace=False)
+        clock = 0
+        while clock < 3600:
+            end = min(clock + int(rng.integers(20, 60)), 3600)
+            home_skaters = rng.choice(rosters[home], 5, replace=False)
+            away_skaters = rng.choice(rosters[away], 5, replace=False)
+            stint_rows += [(game_id, 1, clock, end, "home", int(p)) for p in home_skaters]
+            stint_rows += [(game_id, 1, clock, end, "away", int(p)) for p in away_skaters]
+            for is_home, attackers, defenders in ((1, home_skaters, away_skaters),
+                                                  (0, away_skaters, home_skaters)):
+                rate = 60 + sum(truth_off[p] for p in attackers) + sum(truth_def[p] for p in defenders)
+                for _ in range(rng.poisson(max(rate, 1.0) * (end - clock) / 3600)):
+                    shot_rows.append((len(shot_rows) + 1, game_id, 1,
+                                      int(rng.integers(clock, end)), is_home, 0))
+            clock = end
+    return stint_rows, shot_rows, truth_off, truth_def
+
+
+def test_build_rapm_design_assigns_shots_to_stints():
+    stint_rows = [
+        (1, 1, 0, 60, "home", 10), (1, 1, 0, 60, "away", 20),
+        (1, 1, 60, 90, "home", 11), (1, 1, 60, 90, "away", 20),
+    ]
+    shot_rows = [
+        (1, 1, 1, 30, 1, 1),    # home goal in stint 0
+        (2, 1, 1, 60, 0, 0),    # boundary: belongs to the stint starting at 60
+        (3, 1, 1, 200, 1, 0),   # outside every stint
+        (4, 1, 2, 10, 1, 0),    # other period
+    ]
+
+    design = build_rapm_design(stint_rows, shot_rows)
+
+    assert design.player_ids.tolist() == [10, 11, 20]
+    assert design.matrix.shape == (4, 8)
+    assert design.weights.tolist() == [1.0, 1.0, 0.5, 0.5]
+    assert design.target.tolist() == [60.0, 0.0, 0.0, 120.0]
+    assert design.row_game_ids.tolist() == [1, 1, 1, 1]
+    # Row 0: home attacks (player 10 offense), away defends (player 20 defense).
+    assert design.matrix[0].toarray().tolist() == [[1, 0, 0, 0, 0, 1, 1, 0]]
+    assert design.matrix[3].toarray().tolist() == [[0, 0, 1, 0, 1, 0, 0, 1]]
+
+    goals = build_rapm_design(stint_rows, shot_rows, target="goals")
+    assert goals.target.tolist() == [60.0, 0.0, 0.0, 0.0]
+    xg = build_rapm_design(stint_rows, shot_rows, target="xg", shot_values={1: 0.25})
+    assert xg.target.tolist() == [15.0, 0.0, 0.0, 0.0]
+    with pytest.raises(ValueError):
+        build_rapm_design(stint_rows, shot_rows, target="xg")
+    with pytest.raises(ValueError):
+        build_rapm_design(stint_rows, shot_rows, target="corsi")
+
+
+def test_fit_rapm_recovers_synthetic_player_effects():
+    stint_rows, shot_rows, truth_off, truth_def = _synthetic_season()
+    design = build_rapm_design(stint_rows, shot_rows)
+
+    fit = fit_rapm(design, lambdas=(1.0, 10.0, 100.0), cv_folds=4)
+
+    assert set(fit.cv_errors) == {1.0, 10.0, 100.0}
+    assert fit.cv_errors[fit.lam] == min(fit.cv_errors.values())
+    player_ids = fit.player_ids.tolist()
+    assert np.corrcoef(fit.offense, [truth_off[p] for p in player_ids])[0, 1] > 0.8
+    assert np.corrcoef(fit.defense, [truth_def[p] for p in player_ids])[0, 1] > 0.8
+
+
+def test_fit_rapm_warm_start_reaches_same_solution():
+    stint_rows, shot_rows, _, _ = _synthetic_season(seed=1, games=40)
+    design = build_rapm_design(stint_rows, shot_rows)
+    cold = fit_rapm(design, lambdas=(50.0,))
+    previous = [RapmRating("20232024", player_id, off + 1.0, defense - 1.0)
+                for player_id, off, defense in zip(cold.player_ids, cold.offense, cold.defense)]
+
+    warm = fit_rapm(design, lambdas=(50.0,), warm_start=previous)
+
+    assert cold.cv_errors == {}
+    np.testing.assert_allclose(warm.offense, cold.offense, atol=1e-6)
+    np.testing.assert_allclose(warm.defense, cold.defense, atol=1e-6)
+
+
+def test_bootstrap_standard_errors_are_deterministic_across_workers():
+    stint_rows, shot_rows, _, _ = _synthetic_season(seed=2, games=40)
+    design = build_rapm_design(stint_rows, shot_rows)
+    fit = fit_rapm(design, lambdas=(20.0,))
+
+    inline = bootstrap_rapm_standard_errors(design, fit, replicates=12, seed=5, workers=1)
+    pooled = bootstrap_rapm_standard_errors(design, fit, replicates=12, seed=5, workers=2)
+
+    np.testing.assert_allclose(pooled.offense_se, inline.offense_se)
+    np.testing.assert_allclose(pooled.defense_se, inline.defense_se)
+    assert (inline.offense_se > 0).all() and (inline.defense_se > 0).all()
+    np.testing.assert_array_equal(inline.offense, fit.offense)
+    ratings = inline.ratings("20242025")
+    assert ratings[0].rapm_off_se == pytest.approx(inline.offense_se[0])
+    assert ratings[0].rapm_def_se == pytest.approx(inline.defense_se[0])
+    other = bootstrap_rapm_standard_errors(design, fit, replicates=12, seed=6, workers=1)
+    assert not np.allclose(other.offense_se, inline.offense_se)
+
+
+def _seed_rapm_game(conn, game_id, season):
+    upsert_game_metadata(conn, game_id, game_date="2024-10-10", season=season,
+                         home_team_id=22, away_team_id=10)
+    replace_game_on_ice_intervals(conn, game_id, [
+        OnIceInterval(game_id, 1, 0, 60, "[1, 2, 3, 4, 5]", "[11, 12, 13, 14, 15]",
+                      30, 40, "5v5"),
+        OnIceInterval(game_id, 1, 60, 120, "[1, 2, 3, 4, 5]", "[11, 12, 13, 14]",
+                      30, 40, "5v4"),
+        OnIceInterval(game_id, 1, 120, 240, "[6, 7, 8, 9, 10]", "[16, 17, 18, 19, 20]",
+                      30, 40, "5v5"),
+    ])
+    insert_shot_events(conn, [{
+        "game_id": game_id, "event_idx": event_idx, "shot_event_type": "shot-on-goal",
+        "period": 1, "time_in_period": clock, "time_remaining_seconds": 1200,
+        "shot_type": "wrist", "x_coord": 70, "y_coord": 10, "distance_to_goal": 22.4,
+        "angle_to_goal": 26.6, "is_goal": 0, "shooting_team_id": team_id,
+        "goalie_id": None, "shooter_id": None, "score_state": "tied",
+        "manpower_state": "5v5",
+    } for event_idx, clock, team_id in [(1, "00:30", 22), (2, "01:30", 22), (3, "03:00", 10)]])
+
+
+def test_fit_rapm_for_season_uses_season_skaters_and_round_trips():
+    conn = sqlite3.connect(":memory:")
+    ensure_player_database_schema(conn)
+    ensure_xg_schema(conn)
+    _seed_rapm_game(conn, 2024020001, "20242025")
+    _seed_rapm_game(conn, 2023020001, "20232024")
+
+    ratings = fit_rapm_for_season(conn, "20242025", lambdas=(10.0,))
+
+    assert [rating.player_id for rating in ratings] == list(range(1, 21))
+    assert all(rating.season == "20242025" and rating.rapm_off_se is None for rating in ratings)
+    by_player = {rating.player_id: rating for rating in ratings}
+    assert by_player[1].rapm_off > by_player[6].rapm_off
+    assert fit_rapm_for_season(conn, "20212022") == []
+    bootstrapped = fit_rapm_for_season(conn, "20242025", lambdas=(10.0,),
+                                       bootstrap_replicates=5, workers=1)
+    assert all(rating.rapm_off_se is not None for rating in bootstrapped)
+
+    assert replace_rapm_player_ratings(conn, "20242025", RAPM_MODEL_VERSION, ratings) == 20
+    stored = load_rapm_player_ratings(conn, "20242025", RAPM_MODEL_VERSION)
+    assert stored[0][:4] == ("20242025", 1, pytest.approx(by_player[1].rapm_off),
+                             pytest.approx(by_player[1].rapm_def))
+    assert stored[0][4:] == (None, None, RAPM_MODEL_VERSION)
+    replace_rapm_player_ratings(conn, "20242025", RAPM_MODEL_VERSION, ratings[:3])
+    assert len(load_rapm_player_ratings(conn, "20242025", RAPM_MODEL_VERSION)) == 3
@@ -0,0 +1,95 @@
+import gzip
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from raw_payload_store import (
+    ENDPOINT_PLAY_BY_PLAY,
+    ENDPOINT_SHIFT_CHARTS,
+    RawPayloadStore,
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return RawPayloadStore(str(tmp_path / "raw_payloads"))
+
+
+def test_put_then_get_round_trips_payload(store):
+    payload = {"id": 2023020001, "plays": [{"eventId": 1, "typeDescKey": "faceoff"}]}
+
+    entry = store.put(ENDPOINT_PLAY_BY_PLAY, 2023020001, payload, etag='"abc"')
+
+    assert store.get(ENDPOINT_PLAY_BY_PLAY, 2023020001) == payload
+    assert entry.etag == '"abc"'
+    assert entry.byte_size > 0
+    assert store.entry(ENDPOINT_PLAY_BY_PLAY, 2023020001) == entry
+
+
+def test_get_returns_none_for_unknown_key(store):
+    assert store.get(ENDPOINT_PLAY_BY_PLAY, 1) is None
+    assert store.entry(ENDPOINT_PLAY_BY_PLAY, 1) is None
+    assert not store.has(ENDPOINT_PLAY_BY_PLAY, 1)
+
+
+def test_objects_are_content_addressed_and_gzip_compressed(store):
+    first = store.put(ENDPOINT_PLAY_BY_PLAY, 1, {"b": 2, "a": 1})
+    second = store.put(ENDPOINT_SHIFT_CHARTS, 2, {"a": 1, "b": 2})
+
+    assert first.sha256 == second.sha256
+    path = store.object_path(first.sha256)
+    assert path.endswith(".json.gz")
+    with gzip.open(path, "rb") as handle:
+        assert json.loads(handle.read()) == {"a": 1, "b": 2}
+    object_files = [
+        name for _, _, names in os.walk(store.objects_dir) for name in names
+    ]
+    assert len(object_files) == 1
+
+
+def test_concurrent_puts_of_same_payload_share_one_object(store):
+    payload = {"id": 7, "plays": list(range(2000))}
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        entries = list(pool.map(
+            lambda game_id: store.put(ENDPOINT_PLAY_BY_PLAY, game_id, payload), range(32)
+        ))
+
+    assert len({entry.sha256 for entry in entries}) == 1
+    object_files = [
+        name for _, _, names in os.walk(store.objects_dir) for name in names
+    ]
+    assert object_files == [os.path.basename(store.object_path(entries[0].sha256))]
+    assert store.get(ENDPOINT_PLAY_BY_PLAY, 31) == payload
+
+
+def test_put_replaces_manifest_entry_for_same_key(store):
+    store.put(ENDPOINT_PLAY_BY_PLAY, 1, {"version": 1}, fetched_at="2025-01-01T00:00:00")
+    entry = store.put(ENDPOINT_PLAY_BY_PLAY, 1, {"version": 2}, fetched_at="2025-01-02T00:00:00")
+
+    assert store.get(ENDPOINT_PLAY_BY_PLAY, 1) == {"version": 2}
+    assert store.entry(ENDPOINT_PLAY_BY_PLAY, 1).fetched_at == entry.fetched_at
+
+
+def test_game_ids_are_scoped_by_endpoint(store):
+    store.put(ENDPOINT_PLAY_BY_PLAY, 3, {"id": 3})
+    store.put(ENDPOINT_PLAY_BY_PLAY, 1, {"id": 1})
+    store.put(ENDPOINT_SHIFT_CHARTS, 2, {"data": []})
+
+    assert store.game_ids(ENDPOINT_PLAY_BY_PLAY) == [1, 3]
+    assert store.game_ids(ENDPOINT_SHIFT_CHARTS) == [2]
+
+
+def test_store_reopens_existing_manifest(store):
+    store.put(ENDPOINT_PLAY_BY_PLAY, 7, {"id": 7})
+
+    reopened = RawPayloadStore(store.root_dir)
+
+    assert reopened.get(ENDPOINT_PLAY_BY_PLAY, 7) == {"id": 7}
+
+
+def test_non_string_etag_is_not_recorded(store):
+    entry = store.put(ENDPOINT_PLAY_BY_PLAY, 1, {"id": 1}, etag=object())
+    assert entry.etag is None
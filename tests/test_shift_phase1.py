@@ -1,7 +1,16 @@
 import json
+import random
+import time
 
+import nhl_api
 import shifts
-from on_ice_builder import attach_on_ice_slots_to_shots, build_on_ice_intervals
+from raw_payload_store import ENDPOINT_PLAY_BY_PLAY, ENDPOINT_SHIFT_CHARTS, RawPayloadStore
+from on_ice_builder import (
+    OnIceInterval,
+    _finalize_slots,
+    attach_on_ice_slots_to_shots,
+    build_on_ice_intervals,
+)
 from shifts import ShiftRecord, fetch_shift_rows_for_game, parse_shift_rows, validate_shift_records
 
 
@@ -96,6 +105,46 @@ def test_fetch_shift_rows_uses_stats_rest_shiftcharts_endpoint(monkeypatch):
     ]
 
 
+def test_fetch_shift_rows_reads_through_raw_payload_store(monkeypatch, tmp_path):
+    store = RawPayloadStore(str(tmp_path / "raw_payloads"))
+    monkeypatch.setattr(nhl_api, "_raw_payload_store", store)
+    calls = []
+
+    def fake_api_get(url):
+        calls.append(url)
+        return {"data": [{"gameId": 2025020001, "playerId": 8478402}]}
+
+    monkeypatch.setattr(shifts, "_api_get", fake_api_get)
+
+    # Not cached until the game's final play-by-play is stored.
+    fetch_shift_rows_for_game(2025020001)
+    assert not store.has(ENDPOINT_SHIFT_CHARTS, 2025020001)
+
+    store.put(ENDPOINT_PLAY_BY_PLAY, 2025020001, {"id": 2025020001, "gameState": "OFF"})
+    fetch_shift_rows_for_game(2025020001)
+    rows = fetch_shift_rows_for_game(2025020001)
+
+    assert rows == [{"gameId": 2025020001, "playerId": 8478402}]
+    assert len(calls) == 2
+    assert store.has(ENDPOINT_SHIFT_CHARTS, 2025020001)
+
+
+def test_fetch_shift_rows_draws_from_stats_api_bucket_only_on_miss(monkeypatch, tmp_path):
+    store = RawPayloadStore(str(tmp_path / "raw_payloads"))
+    monkeypatch.setattr(nhl_api, "_raw_payload_store", store)
+    acquired = []
+    monkeypatch.setattr(shifts, "acquire_stats_api_token", lambda: acquired.append(1))
+    monkeypatch.setattr(
+        shifts, "_api_get", lambda url: {"data": [{"gameId": 2025020001}]}
+    )
+    store.put(ENDPOINT_PLAY_BY_PLAY, 2025020001, {"id": 2025020001, "gameState": "OFF"})
+
+    fetch_shift_rows_for_game(2025020001)
+    fetch_shift_rows_for_game(2025020001)
+
+    assert len(acquired) == 1
+
+
 def test_validate_shift_records_reports_invalid_rows():
     records = [
         ShiftRecord(game_id=1, player_id=10, period=1, start_seconds=1, end_seconds=2),
@@ -144,3 +193,108 @@ def test_build_on_ice_intervals_and_attach_to_shots():
     assert enriched[0]["away_on_ice_1_player_id"] == 11
     assert enriched[0]["away_on_ice_5_player_id"] == 15
     assert enriched[0]["away_on_ice_6_player_id"] == 40
+
+
+def _linear_scan_attach(shot_rows, intervals):
+    """The original per-shot linear scan, kept as the matching oracle."""
+    lookup = {}
+    for interval in intervals:
+        lookup.setdefault((interval.game_id, interval.period), []).append(interval)
+    for candidates in lookup.values():
+        candidates.sort(key=lambda i: (i.start_s, i.end_s))
+
+    enriched = []
+    for shot in shot_rows:
+        updated = dict(shot)
+        for slot_index in range(1, 7):
+            updated.setdefault(f"home_on_ice_{slot_index}_player_id", None)
+            updated.setdefault(f"away_on_ice_{slot_index}_player_id", None)
+        candidates = lookup.get((int(shot["game_id"]), int(shot["period"])), [])
+        seconds = shifts.clock_to_seconds(shot["time_in_period"])
+        matched = next((i for i in candidates if i.start_s <= seconds < i.end_s), None)
+        if matched is None and candidates:
+            matched = candidates[-1]
+        if matched is not None:
+            home = _finalize_slots(json.loads(matched.home_skaters_json), matched.home_goalie_player_id)
+            away = _finalize_slots(json.loads(matched.away_skaters_json), matched.away_goalie_player_id)
+            for slot_index, player_id in enumerate(home, start=1):
+                updated[f"home_on_ice_{slot_index}_player_id"] = player_id
+            for slot_index, player_id in enumerate(away, start=1):
+                updated[f"away_on_ice_{slot_index}_player_id"] = player_id
+        enriched.append(updated)
+    return enriched
+
+
+def _interval(game_id, period, start_s, end_s, home, away=(11,)):
+    return OnIceInterval(
+        game_id=game_id, period=period, start_s=start_s, end_s=end_s,
+        home_skaters_json=json.dumps(list(home)), away_skaters_json=json.dumps(list(away)),
+        home_goalie_player_id=30, away_goalie_player_id=40, strength_state=None,
+    )
+
+
+def _random_intervals_and_shots(rng, game_count, intervals_per_period, shots_per_period):
+    intervals = []
+    shots = []
+    for game_id in range(1, game_count + 1):
+        for period in (1, 2, 3):
+            clock = 0
+            for _ in range(intervals_per_period):
+                length = rng.randint(1, 40)
+                # Occasional gaps and overlaps exercise the fallback paths.
+                start = max(0, clock + rng.choice([0, 0, 0, 5, -3]))
+                intervals.append(_interval(game_id, period, start, start + length,
+                                           rng.sample(range(1, 25), rng.randint(0, 6))))
+                clock = start + length
+            for event_idx in range(shots_per_period):
+                seconds = rng.randint(0, clock + 30)
+                shots.append({"game_id": game_id, "period": period, "event_idx": event_idx,
+                              "time_in_period": f"{seconds // 60:02d}:{seconds % 60:02d}"})
+    rng.shuffle(intervals)
+    return intervals, shots
+
+
+def test_attach_on_ice_slots_matches_linear_scan_with_gaps_and_overlaps():
+    rng = random.Random(14)
+    intervals, shots = _random_intervals_and_shots(rng, game_count=5,
+                                                   intervals_per_period=60,
+                                                   shots_per_period=40)
+    shots.append({"game_id": 99, "period": 1, "event_idx": 1, "time_in_period": "01:00"})
+
+    assert attach_on_ice_slots_to_shots(shots, intervals) == _linear_scan_attach(shots, intervals)
+
+
+def test_attach_on_ice_slots_prefers_first_containing_overlapping_interval():
+    intervals = [
+        _interval(1, 1, 0, 100, home=[1]),
+        _interval(1, 1, 10, 20, home=[2]),
+        _interval(1, 1, 30, 40, home=[3]),
+    ]
+    shots = [
+        {"game_id": 1, "period": 1, "time_in_period": 15},
+        {"game_id": 1, "period": 1, "time_in_period": 150},
+    ]
+
+    enriched = attach_on_ice_slots_to_shots(shots, intervals)
+
+    assert enriched[0]["home_on_ice_1_player_id"] == 1
+    # No interval contains 150s, so the period's last interval is used.
+    assert enriched[1]["home_on_ice_1_player_id"] == 3
+
+
+def test_attach_on_ice_slots_is_faster_than_linear_scan():
+    rng = random.Random(2014)
+    intervals, shots = _random_intervals_and_shots(rng, game_count=2,
+                                                   intervals_per_period=1500,
+                                                   shots_per_period=1500)
+
+    started = time.perf_counter()
+    fast = attach_on_ice_slots_to_shots(shots, intervals)
+    fast_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    slow = _linear_scan_attach(shots, intervals)
+    slow_seconds = time.perf_counter() - started
+
+    assert fast == slow
+    # Linear matching is O(shots x intervals); bisect should win comfortably.
+    assert fast_seconds * 2 < slow_seconds
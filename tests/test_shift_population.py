@@ -1,16 +1,29 @@
 import sqlite3
 
 from database import (
+    GAME_STAGE_ON_ICE_SLOTS,
+    GAME_STAGE_PLAYER_ON_ICE,
+    GAME_STAGE_SHIFTS,
+    create_on_ice_interval_players_table,
     ensure_player_database_schema,
     ensure_xg_schema,
     game_has_current_shift_data,
+    get_current_game_stages,
     insert_shift_records,
     insert_shot_events,
+    populate_player_game_on_ice,
+    populate_player_game_stats,
+    record_game_stages,
     replace_game_on_ice_intervals,
     upsert_game_metadata,
     upsert_player,
 )
-from shift_population import populate_shift_data_for_game, select_shift_backfill_game_ids
+from on_ice_builder import OnIceInterval
+from shift_population import (
+    populate_shift_data_for_game,
+    populate_shift_data_for_games,
+    select_shift_backfill_game_ids,
+)
 
 
 def _conn():
@@ -266,6 +279,206 @@ def test_select_shift_backfill_game_ids_respects_game_id_and_limit():
         "away_goalie_player_id": None,
         "strength_state": "1v0",
     }])
+    record_game_stages(connection, first_game_id, (GAME_STAGE_SHIFTS, GAME_STAGE_ON_ICE_SLOTS))
 
     assert select_shift_backfill_game_ids(connection, game_id=first_game_id) == [first_game_id]
     assert select_shift_backfill_game_ids(connection, all_games=True, limit=1) == [second_game_id]
+
+
+def _seed_games_for_prefetch(connection, game_ids):
+    _seed_player_positions(connection)
+    for game_id in game_ids:
+        _seed_game(connection, game_id)
+
+
+def test_populate_shift_data_for_games_prefetch_matches_sequential_totals():
+    game_ids = [2025020001, 2025020002, 2025020003, 2025020004]
+
+    def fetch(game_id):
+        # One game with no shift chart, so skipped totals are exercised too.
+        return [] if game_id == 2025020003 else _full_shift_payload(game_id)
+
+    sequential_conn = _conn()
+    _seed_games_for_prefetch(sequential_conn, game_ids)
+    populate_shift_data_for_game(sequential_conn, game_ids[0], fetch_fn=fetch)
+    sequential = populate_shift_data_for_games(
+        sequential_conn, game_ids, fetch_fn=fetch, max_in_flight=1
+    )
+
+    prefetch_conn = _conn()
+    _seed_games_for_prefetch(prefetch_conn, game_ids)
+    populate_shift_data_for_game(prefetch_conn, game_ids[0], fetch_fn=fetch)
+    fetched = []
+
+    def recording_fetch(game_id):
+        fetched.append(game_id)
+        return fetch(game_id)
+
+    prefetched = populate_shift_data_for_games(
+        prefetch_conn, game_ids, fetch_fn=recording_fetch, max_in_flight=3
+    )
+
+    assert prefetched == sequential
+    assert prefetched.games_scanned == 4
+    assert prefetched.games_populated == 2
+    assert prefetched.games_skipped == 2
+    # The already-complete game is never fetched.
+    assert sorted(fetched) == [2025020002, 2025020003, 2025020004]
+
+    cur = prefetch_conn.cursor()
+    cur.execute("SELECT COUNT(DISTINCT game_id) FROM on_ice_intervals")
+    assert cur.fetchone()[0] == 3
+
+
+def _player_intervals(connection, player_id):
+    cur = connection.cursor()
+    cur.execute(
+        "SELECT game_id, period, start_s, end_s, side, is_goalie "
+        "FROM on_ice_interval_players WHERE player_id = ? "
+        "ORDER BY game_id, period, start_s",
+        (player_id,),
+    )
+    return cur.fetchall()
+
+
+def test_on_ice_interval_players_projection_supports_player_lookup():
+    connection = _conn()
+    _seed_game(connection, 2025020001)
+    _seed_player_positions(connection)
+    populate_shift_data_for_game(connection, 2025020001, fetch_fn=_full_shift_payload)
+
+    cur = connection.cursor()
+    cur.execute(
+        "SELECT side, is_goalie, COUNT(*) FROM on_ice_interval_players "
+        "GROUP BY side, is_goalie ORDER BY side, is_goalie"
+    )
+    assert cur.fetchall() == [("away", 0, 5), ("away", 1, 1), ("home", 0, 5), ("home", 1, 1)]
+    assert _player_intervals(connection, 4) == [(2025020001, 1, 0, 40, "home", 0)]
+    assert _player_intervals(connection, 40) == [(2025020001, 1, 0, 40, "away", 1)]
+    cur.execute(
+        "EXPLAIN QUERY PLAN SELECT game_id FROM on_ice_interval_players WHERE player_id = 4"
+    )
+    assert "idx_on_ice_interval_players_player" in " ".join(
+        str(row[-1]) for row in cur.fetchall()
+    )
+
+    replace_game_on_ice_intervals(connection, 2025020001, [])
+    assert _player_intervals(connection, 4) == []
+
+
+def test_on_ice_interval_players_seeded_from_existing_json():
+    connection = _conn()
+    connection.execute("DROP TABLE on_ice_interval_players")
+    connection.execute(
+        """INSERT INTO on_ice_intervals
+               (game_id, period, start_s, end_s, home_skaters_json, away_skaters_json,
+                home_goalie_player_id, away_goalie_player_id, strength_state)
+           VALUES (7, 2, 10, 20, '[1, 2]', '[3]', 30, NULL, '2v1'),
+                  (7, 2, 20, 30, '[2]', '[]', 2, 40, '1v0')"""
+    )
+
+    create_on_ice_interval_players_table(connection)
+
+    cur = connection.cursor()
+    cur.execute(
+        "SELECT start_s, player_id, side, is_goalie FROM on_ice_interval_players "
+        "ORDER BY start_s, player_id"
+    )
+    assert cur.fetchall() == [
+        (10, 1, "home", 0), (10, 2, "home", 0), (10, 3, "away", 0), (10, 30, "home", 1),
+        # A goalie also listed as a skater keeps the skater row.
+        (20, 2, "home", 0), (20, 40, "away", 1),
+    ]
+
+
+def _player_on_ice_rows(connection, player_id):
+    cur = connection.cursor()
+    cur.execute(
+        """SELECT strength_state, team_side, toi_seconds, shots_for, shots_against,
+                  goals_for, goals_against
+           FROM player_game_on_ice WHERE player_id = ? ORDER BY strength_state""",
+        (player_id,),
+    )
+    return cur.fetchall()
+
+
+def _seed_power_play_game(connection, game_id):
+    upsert_game_metadata(connection, game_id, game_date="2025-10-01", season="20252026",
+                         home_team_id=22, away_team_id=10)
+    # Home 5v5 for 40s, then an away penalty gives home a 5v4 for 20s.
+    replace_game_on_ice_intervals(connection, game_id, [
+        OnIceInterval(game_id, 1, 0, 40, "[1, 2, 3, 4, 5]", "[11, 12, 13, 14, 15]",
+                      30, 40, "5v5"),
+        OnIceInterval(game_id, 1, 40, 60, "[1, 2, 3, 4, 5]", "[11, 12, 13, 14]",
+                      30, 40, "5v4"),
+    ])
+    home_goal = dict(_shot(game_id, event_idx=1), is_goal=1, shooter_id=1)
+    away_shot = dict(_shot(game_id, event_idx=2), time_in_period="00:50",
+                     shooting_team_id=10, shooter_id=11, goalie_id=30,
+                     manpower_state="4v5")
+    insert_shot_events(connection, [home_goal, away_shot])
+    cur = connection.cursor()
+    cur.execute(
+        "UPDATE shot_events SET home_on_ice_1_player_id = 1, home_on_ice_6_player_id = 30, "
+        "away_on_ice_1_player_id = 11, away_on_ice_5_player_id = 15, "
+        "away_on_ice_6_player_id = 40 WHERE game_id = ?",
+        (game_id,),
+    )
+    cur.execute(
+        "UPDATE shot_events SET away_on_ice_5_player_id = NULL "
+        "WHERE game_id = ? AND event_idx = 2",
+        (game_id,),
+    )
+    record_game_stages(connection, game_id, (GAME_STAGE_ON_ICE_SLOTS,))
+
+
+def test_populate_player_game_on_ice_splits_toi_and_shots_by_own_strength():
+    connection = _conn()
+    _seed_power_play_game(connection, 2025020001)
+
+    assert populate_player_game_on_ice(connection) == 1
+
+    assert _player_on_ice_rows(connection, 1) == [
+        ("5v4", "home", 20, 0, 1, 0, 0),
+        ("5v5", "home", 40, 1, 0, 1, 0),
+    ]
+    assert _player_on_ice_rows(connection, 11) == [
+        ("4v5", "away", 20, 1, 0, 0, 0),
+        ("5v5", "away", 40, 0, 1, 0, 1),
+    ]
+    assert _player_on_ice_rows(connection, 15) == [("5v5", "away", 40, 0, 1, 0, 1)]
+    assert GAME_STAGE_PLAYER_ON_ICE in get_current_game_stages(connection, 2025020001)
+
+    populate_player_game_stats(connection)
+    cur = connection.cursor()
+    cur.execute(
+        "SELECT player_id, position_group, toi_seconds, shots FROM player_game_stats "
+        "WHERE player_id IN (1, 15, 30) ORDER BY player_id"
+    )
+    assert cur.fetchall() == [(1, "F", 60, 1), (15, "F", 40, 0), (30, "G", 60, 0)]
+
+
+def test_populate_player_game_on_ice_is_incremental_on_slot_stage():
+    connection = _conn()
+    _seed_power_play_game(connection, 2025020001)
+    _seed_power_play_game(connection, 2025020002)
+    assert populate_player_game_on_ice(connection) == 2
+    assert populate_player_game_on_ice(connection) == 0
+
+    connection.execute(
+        "UPDATE on_ice_intervals SET strength_state = '5v5' WHERE game_id = 2025020002"
+    )
+    record_game_stages(connection, 2025020002, (GAME_STAGE_ON_ICE_SLOTS,))
+    assert GAME_STAGE_PLAYER_ON_ICE not in get_current_game_stages(connection, 2025020002)
+
+    assert populate_player_game_on_ice(connection) == 1
+    cur = connection.cursor()
+    cur.execute(
+        "SELECT game_id, strength_state, toi_seconds FROM player_game_on_ice "
+        "WHERE player_id = 2 ORDER BY game_id, strength_state"
+    )
+    assert cur.fetchall() == [
+        (2025020001, "5v4", 20),
+        (2025020001, "5v5", 40),
+        (2025020002, "5v5", 60),
+    ]
@@ -14,6 +14,8 @@ from database import (
     NORMALIZED_Y_COORD_MAX,
     create_shot_events_table,
     create_core_dimension_tables,
+    create_raw_events_table,
+    insert_data,
     validate_shot_events_quality,
     ensure_xg_schema,
     insert_shot_events,
@@ -407,23 +409,15 @@ def test_migrate_shot_events_v4_to_v5_reconstructs_event_types(conn):
     """v4 rows can be promoted when raw non-blocked events match in order."""
     create_shot_events_table(conn)
     cur = conn.cursor()
-    cur.execute("""
-        CREATE TABLE game_2023020001 (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            period INTEGER,
-            time TEXT,
-            event TEXT,
-            description TEXT
-        )
-    """)
-    cur.executemany(
-        """INSERT INTO game_2023020001 (period, time, event, description)
-           VALUES (?, ?, ?, ?)""",
+    create_raw_events_table(conn)
+    insert_data(
+        conn,
+        2023020001,
         [
-            (1, "00:10", "shot-on-goal", "shot-on-goal"),
-            (1, "00:15", "blocked-shot", "blocked-shot"),
-            (1, "00:30", "missed-shot", "missed-shot"),
-            (1, "00:35", "goal", "goal"),
+            {"period": 1, "time": "00:10", "event": "shot-on-goal", "description": "shot-on-goal"},
+            {"period": 1, "time": "00:15", "event": "blocked-shot", "description": "blocked-shot"},
+            {"period": 1, "time": "00:30", "event": "missed-shot", "description": "missed-shot"},
+            {"period": 1, "time": "00:35", "event": "goal", "description": "goal"},
         ],
     )
     for event_idx, time_remaining in [(10, 1190), (30, 1170), (35, 1165)]:
@@ -457,18 +451,11 @@ def test_migrate_shot_events_v4_to_v5_leaves_mismatched_games_stale(conn):
     """Mismatched raw and derived sequences stay stale for API backfill."""
     create_shot_events_table(conn)
     cur = conn.cursor()
-    cur.execute("""
-        CREATE TABLE game_2023020002 (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            period INTEGER,
-            time TEXT,
-            event TEXT,
-            description TEXT
-        )
-    """)
-    cur.execute(
-        """INSERT INTO game_2023020002 (period, time, event, description)
-           VALUES (1, '00:10', 'shot-on-goal', 'shot-on-goal')"""
+    create_raw_events_table(conn)
+    insert_data(
+        conn,
+        2023020002,
+        [{"period": 1, "time": "00:10", "event": "shot-on-goal", "description": "shot-on-goal"}],
     )
     _insert_shot(
         cur,